@@ -0,0 +1,116 @@
+"""
+async_persistence.py
+
+Keeps file I/O off the asyncio thread of the crawl workers.
+
+- AsyncPersistence: one ordered background writer thread for CSV appends (incl. FileLock waits) and
+  pickle checkpoints; checkpoints of the same file are coalesced, so a slow disk never queues stale snapshots
+- install_queue_logging(): routes logging records through a queue so the log file is written by a
+  listener thread instead of the event loop
+"""
+
+import queue
+import asyncio
+import logging
+import threading
+import logging.handlers
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPersistence:
+    def __init__(self, name="persistence"):
+        # a single worker keeps appends and checkpoints in submission order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._latest = {}   # checkpoint key -> (snapshot, dump_fn) waiting to be written
+        self._queued = set()  # checkpoint keys with a write job already queued
+
+    def _track(self, fut):
+        with self._lock:
+            self._pending.add(fut)
+        fut.add_done_callback(self._untrack)
+        return fut
+
+    def _untrack(self, fut):
+        with self._lock:
+            self._pending.discard(fut)
+        if not fut.cancelled() and fut.exception() is not None:
+            logger.warning(f"[AsyncPersistence] background write failed: {fut.exception()}")
+
+    def submit(self, fn, *args):
+        """Run fn(*args) on the writer thread; returns a concurrent.futures.Future."""
+        return self._track(self._executor.submit(fn, *args))
+
+    async def run(self, fn, *args):
+        """Await fn(*args) on the writer thread without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def checkpoint(self, key, snapshot, dump_fn):
+        """
+        Queue dump_fn(snapshot, key) (key is the target path). Pass a copy of the live object as snapshot.
+        If an older snapshot for the same key is still waiting, it is replaced instead of written twice.
+        """
+        with self._lock:
+            self._latest[key] = (snapshot, dump_fn)
+            if key in self._queued:
+                return None
+            self._queued.add(key)
+        return self.submit(self._write_checkpoint, key)
+
+    def _write_checkpoint(self, key):
+        with self._lock:
+            self._queued.discard(key)
+            snapshot, dump_fn = self._latest.pop(key)
+        dump_fn(snapshot, key)
+
+    def flush(self):
+        """Block until everything submitted so far has been written (call outside the event loop)."""
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            for fut in pending:
+                try:
+                    fut.result()
+                except Exception:
+                    pass
+
+    async def aflush(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.flush)
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+
+def install_queue_logging():
+    """Move the root logger's handlers behind a QueueHandler; returns the started QueueListener."""
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if not handlers:
+        return None
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for h in handlers:
+        root.removeHandler(h)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
+def uninstall_queue_logging(listener):
+    """Flush queued records and put the original handlers back on the root logger."""
+    if listener is None:
+        return
+    listener.stop()
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        if isinstance(h, logging.handlers.QueueHandler):
+            root.removeHandler(h)
+    for h in listener.handlers:
+        root.addHandler(h)
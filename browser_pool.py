@@ -0,0 +1,576 @@
+"""
+browser_pool.py
+
+Reusable pool of headless Chrome drivers for the Selenium crawlers (v1/v2).
+
+- Drivers are created lazily, reused across (city, age) tasks and recycled after MAX_PAGES_PER_DRIVER pages
+- Every checkout is health-checked; a dead/hung driver is quit and replaced. A WebDriverException inside a checkout
+  only discards the driver when its session is gone (timeouts of ordinary waits keep the warm driver)
+- Images, fonts, stylesheets and analytics are blocked through CDP (Network.setBlockedURLs)
+- Helpers for condition-based waits replacing the fixed time.sleep() calls of the onboarding wizard
+- run_in_tabs(): a few Chrome processes hosting many isolated tabs (one browser context each), every tab
+  pulling the next (city, age) task from a shared queue
+"""
+
+import os
+import copy
+import json
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.switch_to import SwitchTo
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+
+from network_capture import enable_performance_logging
+
+# ---------------- CONFIG ----------------
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 3))
+TABS_PER_BROWSER = int(os.getenv("TABS_PER_BROWSER", 4))
+MAX_PAGES_PER_DRIVER = int(os.getenv("MAX_PAGES_PER_DRIVER", 50))
+HEADLESS = os.getenv("HEADLESS", "1") != "0"
+PAGE_LOAD_TIMEOUT = int(os.getenv("PAGE_LOAD_TIMEOUT", 60))
+COOKIE_BANNER_TIMEOUT = 5
+RESULTS_TIMEOUT = 30
+NEW_TAB_TIMEOUT = 10
+CLUB_PAGE_TIMEOUT = 15
+WIZARD_TIMEOUT = int(os.getenv("WIZARD_TIMEOUT", 60))
+WEBSITE_URL = os.getenv("WEBSITE_URL", "https://find.englandfootball.com/")
+PLAY_WITH_BUTTON_IDS = {4: "male_football", 5: "female_football"}  # crawl_schema PLAY_WITH_VALUES -> wizard button
+
+BLOCKED_URL_PATTERNS = [
+    # images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # stylesheets (the site's css-xxxx classes are injected by JS, not loaded from .css files)
+    "*.css",
+    # analytics / tracking
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hotjar.com*", "*facebook.net*", "*clarity.ms*", "*cookielaw.org/*/otBannerSdk*",
+]
+# ----------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0              # pages loaded (searches + club pages), counted by the wizard / wait helpers
+        self.cookies_accepted = False
+
+
+class BrowserPool:
+    def __init__(self, size=BROWSER_POOL_SIZE, headless=HEADLESS,
+                 max_pages_per_driver=MAX_PAGES_PER_DRIVER, blocked_urls=BLOCKED_URL_PATTERNS, capture_network=False):
+        self.size = size
+        self.headless = headless
+        self.capture_network = capture_network  # record DevTools Network events for network_capture.py
+        self.max_pages_per_driver = max_pages_per_driver
+        self.blocked_urls = list(blocked_urls)
+        self._idle = queue.LifoQueue()  # LIFO: keep the warmest drivers busy
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _build_options(self, page_load_strategy="eager"):
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("log-level=3")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+        })
+        options.page_load_strategy = page_load_strategy
+        if self.capture_network:
+            enable_performance_logging(options)
+        return options
+
+    def _new_driver(self, page_load_strategy="eager"):
+        driver = webdriver.Chrome(options=self._build_options(page_load_strategy))
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_urls})
+        except WebDriverException as e:
+            logger.warning(f"[BrowserPool] CDP resource blocking unavailable: {e}")
+        logger.info("[BrowserPool] Started new Chrome driver")
+        return PooledDriver(driver)
+
+    def _is_healthy(self, pooled):
+        try:
+            pooled.driver.execute_script("return 1")
+            return len(pooled.driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def is_broken(self, pooled, error):
+        """Whether a WebDriverException means the driver itself is unusable (dead session), not just a slow page."""
+        if isinstance(error, InvalidSessionIdException):
+            return True
+        if isinstance(error, TimeoutException):
+            return False
+        return not self._is_healthy(pooled)
+
+    def _discard(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def acquire(self, timeout=None):
+        """Return a healthy PooledDriver; creates a new one while the pool is below size, else waits for a release."""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return self._new_driver()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                pooled = self._idle.get(timeout=timeout)
+
+            if self._is_healthy(pooled):
+                return pooled
+            logger.warning("[BrowserPool] Driver failed health check, replacing it")
+            self._discard(pooled)
+
+    def release(self, pooled, broken=False):
+        """Return a driver to the pool; recycled when broken or after max_pages_per_driver pages."""
+        if broken or self._closed or pooled.pages >= self.max_pages_per_driver:
+            if not broken and not self._closed:
+                logger.info(f"[BrowserPool] Recycling driver after {pooled.pages} pages")
+            self._discard(pooled)
+            return
+        # leave only the main tab open for the next task
+        try:
+            handles = pooled.driver.window_handles
+            for handle in handles[1:]:
+                pooled.driver.switch_to.window(handle)
+                pooled.driver.close()
+            pooled.driver.switch_to.window(handles[0])
+        except Exception:
+            self._discard(pooled)
+            return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """with pool.driver() as (driver, pooled): ... — one page flow per checkout."""
+        pooled = self.acquire(timeout=timeout)
+        broken = False
+        try:
+            yield pooled.driver, pooled
+        except WebDriverException as e:
+            broken = self.is_broken(pooled, e)
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+
+
+# ---------------- tabs inside one browser ----------------
+def _target_id(handle):
+    """DevTools targetId of a window handle (older chromedrivers prefix it with "CDwindow-")."""
+    return handle[len("CDwindow-"):] if handle.startswith("CDwindow-") else handle
+
+
+class BrowserTab:
+    """One tab of a TabbedBrowser; has the PooledDriver attributes, so the wizard helpers take it as `pooled`."""
+
+    def __init__(self, browser, handle, context_id):
+        self.browser = browser
+        self.handle = handle            # the tab's main window
+        self.context_id = context_id    # its own browser context (cookies, cache, storage); None when shared
+        self.current = handle           # window the tab's commands go to (a club page it opened, ...)
+        self.pages = 0
+        self.cookies_accepted = False
+        self.performance_log = []       # performance log entries of this tab's main window
+        self.driver = browser.tab_driver(self)
+
+
+class TabbedBrowser:
+    """
+    One Chrome process hosting several tabs, each driven by its own thread.
+
+    chromedriver keeps one session per browser and sends commands to its "current" window, so every tab gets a
+    copy of the WebDriver whose execute() takes the browser lock, switches to the tab's window if another tab
+    used the browser last, and runs the command. WebDriverWait polling and page loads happen outside the lock,
+    so the tabs of a browser interleave their waits instead of queueing behind each other.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        # "none": driver.get() returns at once and the tab waits for the new document without holding the lock
+        self.driver = pool._new_driver(page_load_strategy="none").driver
+        self.lock = threading.RLock()
+        self.current = self.driver.current_window_handle
+        self.home = self.current   # never closed: Chrome exits with its last window
+        self.tabs = []
+        self._contexts = True
+        self._blocking = {_target_id(self.home)}   # targets with Network.setBlockedURLs applied (_new_driver did home)
+
+    def _switch(self, handle):
+        if handle != self.current:
+            self.driver.execute(Command.SWITCH_TO_WINDOW, {"handle": handle})
+            self.current = handle
+            self._block_resources(handle)
+
+    def _block_resources(self, handle):
+        """
+        Network.setBlockedURLs only covers the target it is sent to: apply it to every window once, the tabs we
+        create and the ones a Ctrl-click opens. Called under the lock with handle current; requests a Ctrl-click
+        tab sent before it was first switched to are not blocked.
+        """
+        target_id = _target_id(handle)
+        if target_id in self._blocking:
+            return
+        self._blocking.add(target_id)
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.pool.blocked_urls})
+        except WebDriverException as e:
+            logger.warning(f"[TabbedBrowser] CDP resource blocking unavailable: {e}")
+
+    def _cdp(self, cmd, params=None):
+        if self.current is None:
+            self._switch(self.home)
+        return self.driver.execute_cdp_cmd(cmd, params or {})
+
+    def tab_driver(self, tab):
+        driver = copy.copy(self.driver)
+        driver.execute = lambda command, params=None: self._execute(tab, command, params)
+        driver._switch_to = SwitchTo(driver)
+        return driver
+
+    def open_tab(self):
+        with self.lock:
+            context_id = None
+            if self._contexts:
+                try:
+                    context_id = self._cdp("Target.createBrowserContext", {})["browserContextId"]
+                except WebDriverException as e:
+                    self._contexts = False
+                    logger.warning(f"[TabbedBrowser] Browser contexts unavailable, tabs share cookies: {e}")
+            params = {"url": "about:blank"}
+            if context_id:
+                params["browserContextId"] = context_id
+            target_id = self._cdp("Target.createTarget", params)["targetId"]
+            handles = self.driver.execute(Command.W3C_GET_WINDOW_HANDLES)["value"]
+            handle = next((h for h in handles if _target_id(h) == target_id), target_id)
+            tab = BrowserTab(self, handle, context_id)
+            self.tabs.append(tab)
+            self._switch(handle)   # blocks resources before the tab's first navigation
+        return tab
+
+    def _tab_handles(self, tab):
+        """The tab's main window first, then the windows it opened (same browser context, or opener chain)."""
+        targets = {t["targetId"]: t for t in self._cdp("Target.getTargets")["targetInfos"] if t.get("type") == "page"}
+        own = {_target_id(tab.handle)}
+        if tab.context_id:
+            own |= {tid for tid, t in targets.items() if t.get("browserContextId") == tab.context_id}
+        else:
+            while True:
+                opened = {tid for tid, t in targets.items() if t.get("openerId") in own} - own
+                if not opened:
+                    break
+                own |= opened
+        handles = self.driver.execute(Command.W3C_GET_WINDOW_HANDLES)["value"]
+        return sorted((h for h in handles if _target_id(h) in own), key=lambda h: h != tab.handle)
+
+    def _collect_performance_log(self):
+        """chromedriver has one performance log per session: hand every entry to the tab whose window logged it."""
+        by_target = {_target_id(t.handle): t for t in self.tabs}
+        for entry in self.driver.execute(Command.GET_LOG, {"type": "performance"})["value"]:
+            try:
+                tab = by_target.get(json.loads(entry["message"]).get("webview"))
+            except (KeyError, ValueError):
+                continue
+            if tab is not None:
+                tab.performance_log.append(entry)
+
+    def _execute(self, tab, command, params=None):
+        params = params or {}
+        if command == Command.GET:
+            return self._navigate(tab, params["url"])
+        with self.lock:
+            if command == Command.W3C_GET_WINDOW_HANDLES:
+                return {"value": self._tab_handles(tab)}
+            if command == Command.SWITCH_TO_WINDOW:
+                self._switch(params["handle"])
+                tab.current = params["handle"]
+                return {"value": None}
+            if command == Command.GET_LOG and params.get("type") == "performance":
+                self._collect_performance_log()
+                entries, tab.performance_log = tab.performance_log, []
+                return {"value": entries}
+            self._switch(tab.current)
+            # unbound call: WebElements in the response get the tab driver as parent and route through here too
+            response = type(self.driver).execute(tab.driver, command, params)
+            if command == Command.CLOSE:
+                self.current = None
+            return response
+
+    def _navigate(self, tab, url, timeout=PAGE_LOAD_TIMEOUT):
+        """driver.get() for a tab: start the navigation under the lock, wait for the new document outside it."""
+        with self.lock:
+            self._switch(tab.current)
+            self.driver.execute_script("window.__tabNavigating = true")
+            self.driver.execute(Command.GET, {"url": url})
+        deadline = time.time() + timeout
+        while True:
+            time.sleep(0.1)
+            try:
+                if tab.driver.execute_script("return !window.__tabNavigating && document.readyState !== 'loading'"):
+                    return {"value": None}
+            except WebDriverException:
+                pass  # the old document went away mid-script
+            if time.time() >= deadline:
+                raise TimeoutException(f"Timed out loading {url}")
+
+    def reset_tab(self, tab):
+        """Close every window the tab opened and point it back at its main window."""
+        with self.lock:
+            for handle in self._tab_handles(tab):
+                if handle != tab.handle:
+                    self._cdp("Target.closeTarget", {"targetId": _target_id(handle)})
+                    if handle == self.current:
+                        self.current = None
+            tab.current = tab.handle
+
+    def close_tab(self, tab):
+        with self.lock:
+            self.current = None  # may be one of the windows closed below
+            try:
+                for handle in self._tab_handles(tab):
+                    self._cdp("Target.closeTarget", {"targetId": _target_id(handle)})
+                if tab.context_id:
+                    self._cdp("Target.disposeBrowserContext", {"browserContextId": tab.context_id})
+            except WebDriverException:
+                pass
+            if tab in self.tabs:
+                self.tabs.remove(tab)
+
+    def recycle(self, tab, broken=False):
+        """After a task: reuse the tab, or swap it for a fresh one when broken or after max_pages_per_driver pages."""
+        if not broken and tab.pages < self.pool.max_pages_per_driver:
+            try:
+                self.reset_tab(tab)
+                return tab
+            except WebDriverException:
+                pass
+        self.close_tab(tab)
+        return self.open_tab()
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+def run_in_tabs(tasks, handler, browsers=BROWSER_POOL_SIZE, tabs_per_browser=TABS_PER_BROWSER, capture_network=False):
+    """
+    Run handler(driver, tab, task) for every task on browsers x tabs_per_browser tabs. Each tab's thread takes
+    the next task from a shared queue as soon as it is free, so one slow city never leaves the others idle.
+    """
+    pool = BrowserPool(size=browsers, capture_network=capture_network)
+    pending = queue.Queue()
+    for task in tasks:
+        pending.put(task)
+    total = pending.qsize()
+
+    def work(browser):
+        try:
+            tab = browser.open_tab()
+            while True:
+                try:
+                    task = pending.get_nowait()
+                except queue.Empty:
+                    return
+                broken = False
+                try:
+                    handler(tab.driver, tab, task)
+                except WebDriverException as e:
+                    broken = pool.is_broken(tab, e)
+                    logger.error(f"[TabbedBrowser] {task} failed{', replacing the tab' if broken else ''}: {e}")
+                except Exception as e:
+                    logger.error(f"[TabbedBrowser] {task} failed: {e}")
+                tab = browser.recycle(tab, broken)
+        except WebDriverException as e:
+            logger.error(f"[TabbedBrowser] Could not open a tab, stopping this worker: {e}")
+
+    hosts = []
+    try:
+        # inside the try: when a later browser fails to start, the ones already running are closed below
+        for _ in range(browsers):
+            hosts.append(TabbedBrowser(pool))
+        logger.info(f"[TabbedBrowser] {total} tasks on {browsers} browsers x {tabs_per_browser} tabs")
+        threads = [threading.Thread(target=work, args=(host,), daemon=True)
+                   for host in hosts for _ in range(tabs_per_browser)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        for host in hosts:
+            host.close()
+    if not pending.empty():
+        logger.warning(f"[TabbedBrowser] {pending.qsize()} of {total} tasks left unprocessed (no working tab left)")
+
+
+# ---------------- onboarding wizard ----------------
+def button_click_to_searching(driver, age, city, pooled=None, play_with=4, timeout=WIZARD_TIMEOUT):
+    """Run the onboarding wizard for one (city, age, play_with) search; returns False when no results rendered."""
+    # Open the website
+    driver.get(WEBSITE_URL)
+    if pooled is not None:
+        pooled.pages += 1
+    dismiss_cookie_banner(driver, pooled)
+
+    # Start searching
+    searching_button = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "cta_start_searching_now"))
+    )
+    searching_button.click()
+
+    search_people_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "my_self"))
+    )
+    search_people_element.click()
+
+    age_input_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "selected_age"))
+    )
+    age_input_element.clear()
+    age_input_element.send_keys(age)
+
+    next_button_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "onboarding_cta_next_question"))
+    )
+    next_button_element.click()
+
+    football_button = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, PLAY_WITH_BUTTON_IDS.get(play_with, "male_football")))
+    )
+    football_button.click()
+
+    next_button_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "onboarding_cta_next_question"))
+    )
+    next_button_element.click()
+
+    club_football_button_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "club_football"))
+    )
+    club_football_button_element.click()
+
+    all_day_button_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "alldays"))
+    )
+    all_day_button_element.click()
+
+    disability_button_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "disability_not_sure"))
+    )
+    disability_button_element.click()
+
+    enter_post_code_button = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "enter_postcode"))
+    )
+    enter_post_code_button.click()
+
+    post_code_input = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "searchBox"))
+    )
+    post_code_input.click()
+    post_code_input.clear()
+    post_code_input.send_keys(city + ", England")
+
+    # Wait for the address suggestions, then click on the first option in the dropdown
+    WebDriverWait(driver, timeout).until(
+        EC.visibility_of_element_located((By.CLASS_NAME, "line1"))
+    )
+    post_code_input.send_keys(Keys.DOWN)
+    first_option = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.CLASS_NAME, "line1"))
+    )
+    first_option.click()
+
+    next_button_element = WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.ID, "onboarding_cta_next_question"))
+    )
+    next_button_element.click()
+    return wait_for_results(driver)
+
+
+# ---------------- condition-based waits ----------------
+def dismiss_cookie_banner(driver, pooled=None, timeout=COOKIE_BANNER_TIMEOUT):
+    """Accept the OneTrust banner once per driver; the consent cookie makes it disappear for later pages."""
+    if pooled is not None and pooled.cookies_accepted:
+        return
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
+        ).click()
+    except TimeoutException:
+        pass
+    if pooled is not None:
+        pooled.cookies_accepted = True
+
+
+def wait_for_results(driver, timeout=RESULTS_TIMEOUT):
+    """Wait until the recommendation results are rendered instead of sleeping a fixed 10s. Returns False on no results."""
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.ID, "football_recommendations_result_wrapper"))
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_for_club_page(driver, pooled=None, timeout=CLUB_PAGE_TIMEOUT):
+    """Wait for the club "more info" tab to render its heading before scraping it."""
+    if pooled is not None:
+        pooled.pages += 1
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.ID, "club_name_heading"))
+        )
+        return True
+    except TimeoutException:
+        return False
@@ -1,37 +1,184 @@
-from bs4 import BeautifulSoup
-import requests
-import pandas as pd
+#!/usr/bin/env python3
+"""
+city_crawling.py
+
+Location discovery stage: England's cities from the gov.uk list of cities.
+
+- fetch_source(): conditional GET (If-None-Match / If-Modified-Since) against the cached copy of the page
+  (storage/city_source.html + storage/city_source.json); a 304 or an identical body means "unchanged"
+- parse_cities(): the city names of the England section, in page order (the page is downloaded and parsed as a
+  whole first; the names are then yielded one by one)
+- stream_new_cities(): diffs against the previous city set (output/england_city.csv) and yields only the new
+  locations; club_crawling_v3.py --discover submits each one to its city workers as it comes.
+  The generator does not write the city set: the caller saves it (save_cities(), one "name" header) once the new
+  locations are handled, so an interrupted crawl finds them again on the next run
+- Importing this module has no side effects; python city_crawling.py runs the stage on its own
+"""
+
 import os
+import csv
+import json
+import hashlib
+import logging
+import argparse
+from datetime import datetime
 
 OUTPUT_FOLDER_NAME = "output"
-os.makedirs(OUTPUT_FOLDER_NAME, exist_ok=True)
+STORAGE_FOLDER_NAME = "storage"
+
+# ---------------- CONFIG ----------------
+CITY_SOURCE_URL = os.getenv("CITY_SOURCE_URL", "https://www.gov.uk/government/publications/list-of-cities/list-of-cities-html")
+CITY_FILE = f"{OUTPUT_FOLDER_NAME}/england_city.csv"
+CITY_COLUMN = "name"
+CITY_SOURCE_CACHE = f"{STORAGE_FOLDER_NAME}/city_source.json"
+CITY_SOURCE_HTML = f"{STORAGE_FOLDER_NAME}/city_source.html"
+CITY_FETCH_TIMEOUT = float(os.getenv("CITY_FETCH_TIMEOUT", 30))
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "CITY_SOURCE_URL": str,
+    "CITY_FETCH_TIMEOUT": float,
+}
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- fetch ----------------
+def _load_source_cache(cache_file=CITY_SOURCE_CACHE):
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def fetch_source(url=None, force=False, cache_file=CITY_SOURCE_CACHE, html_file=CITY_SOURCE_HTML):
+    """
+    Returns (html, validators, changed). Sends the cached ETag / Last-Modified so an unchanged page costs a 304;
+    servers that ignore them are caught by comparing the body hash.
+    """
+    import httpx
+    url = url or CITY_SOURCE_URL
+    cache = _load_source_cache(cache_file)
+    has_copy = cache.get("url") == url and os.path.exists(html_file)
+    headers = {}
+    if has_copy and not force:
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+
+    resp = httpx.get(url, headers=headers, timeout=CITY_FETCH_TIMEOUT, follow_redirects=True)
+    if resp.status_code == 304 and has_copy:
+        logger.info(f"[CityDiscovery] {url} not modified (304)")
+        with open(html_file, encoding="utf-8") as f:
+            return f.read(), cache, False
+    resp.raise_for_status()
+
+    html = resp.text
+    validators = {
+        "url": url,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "sha256": hashlib.sha256(html.encode("utf-8")).hexdigest(),
+    }
+    changed = force or not has_copy or validators["sha256"] != cache.get("sha256")
+    return html, validators, changed
+
+
+def save_source_cache(html, validators, cache_file=CITY_SOURCE_CACHE, html_file=CITY_SOURCE_HTML):
+    os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+    for path, content in ((html_file, html),
+                          (cache_file, json.dumps({**validators, "fetched": datetime.now().isoformat()}, indent=2))):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+
+
+# ---------------- parse ----------------
+def parse_cities(html):
+    """Yield the England city names in page order (duplicates possible; "*" footnote marks removed)."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    heading = soup.find("h4", {"id": "england"})
+    if heading is None:
+        raise ValueError("England section not found in the list of cities page")
+    for node in heading.find_next().descendants:
+        if '\n' in node:
+            continue
+        city = node.text.replace("*", "").strip()
+        if city:
+            yield city
+
+
+# ---------------- city set ----------------
+def load_city_set(path=CITY_FILE, column=CITY_COLUMN):
+    """Cities of the previous discovery (empty when there was none)."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="", encoding="utf-8") as f:
+        # rows equal to the header come from files written by the old version of this script
+        return {r[column].strip() for r in csv.DictReader(f) if (r.get(column) or "").strip() not in ("", column)}
 
-def get_data(url):
-    url_request = requests.get(url)
-    return url_request.text
 
-city_result = {}  # Initialize an empty dictionary for city results
+def save_cities(cities, path=CITY_FILE, column=CITY_COLUMN):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([column])
+        writer.writerows([c] for c in cities)
+    os.replace(tmp, path)
 
-soup = BeautifulSoup(get_data("https://www.gov.uk/government/publications/list-of-cities/list-of-cities-html"), "html.parser")
 
-# Open the CSV file once before the loop starts
-with open("england_city.csv", "w") as file:
-    file.write("name\n")  # Write header
+def stream_new_cities(url=None, city_file=CITY_FILE, force=False, summary=None):
+    """
+    Yield every location that is not in city_file, in page order. city_file itself is left alone; once the
+    generator is exhausted summary (optional dict) receives {"cities": the current set in page order, "added",
+    "removed", "changed"} for the caller's save_cities(). The page is parsed even when it is unchanged (a 304 reuses
+    the cached copy), so locations of an interrupted run that never made it into city_file are yielded again.
+    """
+    previous = load_city_set(city_file)
+    html, validators, changed = fetch_source(url, force=force)
+    save_source_cache(html, validators)
+    current, added = [], []
+    seen = set()
+    for city in parse_cities(html):
+        if city in seen:
+            continue
+        seen.add(city)
+        current.append(city)
+        if city not in previous:
+            added.append(city)
+            yield city
 
+    removed = sorted(previous - set(current))
+    logger.info(f"[CityDiscovery] {len(current)} locations: {len(added)} new, {len(removed)} removed"
+                + ("" if changed else " (source unchanged)"))
+    if removed:
+        logger.info(f"[CityDiscovery] No longer listed: {', '.join(removed)}")
+    if summary is not None:
+        summary.update({"cities": current, "added": added, "removed": removed, "changed": changed})
 
-city_names = list(soup.find("h4", {"id": "england"}).find_next().descendants)
 
-cities = []
+def main(url=None, city_file=CITY_FILE, force=False):
+    summary = {}
+    for city in stream_new_cities(url, city_file, force=force, summary=summary):
+        print(f"+ {city}")
+    save_cities(summary["cities"], city_file)
+    print(f"{len(summary['cities'])} locations in {city_file}: {len(summary['added'])} new, "
+          f"{len(summary['removed'])} removed" + ("" if summary["changed"] else " (source unchanged)"))
 
-for city_name in city_names:
-    city = city_name.text
-    if '\n' in city_name:
-        continue
-    if '*' in city:
-        city = city.replace("*", "")
-    city_result = {"name": city}
-    cities.append(city_result)
 
-df = pd.DataFrame(cities)
-df.drop_duplicates(inplace=True)
-df.to_csv(f"{OUTPUT_FOLDER_NAME}/england_city.csv", mode='a', header=True, index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    from club_crawling_v3 import load_config
+    globals().update({k: v for k, v in load_config().items() if k in ENV_CONFIG})  # .env settings
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="default: CITY_SOURCE_URL")
+    parser.add_argument("--output", default=CITY_FILE)
+    parser.add_argument("--force", action="store_true", help="ignore the cached page and its validators")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s: %(message)s")
+    main(args.url, args.output, args.force)
@@ -2,34 +2,57 @@
 """
 safe_fast_scraper_final.py
 
-- Read cities from england_city.csv (column "Name")
+- Read cities from england_city.csv (column "Name"), or with --discover take the new locations from the city
+  discovery stage (city_crawling.py); each one is submitted as soon as the diff yields it, and written to
+  output/england_city.csv only after its combos are crawled and checkpointed
 - Ages 5..99, play_with in [4,5] # 4 means Male, 5 means Female
 - Resume at combo level (city, play_with, age) by inspecting output CSV or processed_combos.pkl
 - Multiprocessing per city + asyncio within each process
 - Skip club_name already present in CSV immediately
 - --dry-run to simulate (no external calls)
+- Importing this module has no side effects and loads no heavy dependency (pandas, httpx, tqdm,
+  fake_useragent, uvloop are imported where they are used); setup_runtime() / load_config() do the rest
+- City workers are forked from a forkserver that already has this module and the worker dependencies loaded
 """
 
 import os
+import csv
 import time
 import json
 import random
 import logging
 import argparse
 import pickle
+import multiprocessing
+from collections import deque
 from concurrent.futures import ProcessPoolExecutor
 from functools import partial
 from filelock import FileLock
-import pandas as pd
 import asyncio
-import httpx
-from tqdm import tqdm
-from fake_useragent import UserAgent
-from dotenv import load_dotenv
 import sys
-
-
-load_dotenv()
+import coverage_planning
+from coverage_planning import record_search_observation
+import city_crawling
+import crawl_profiler
+import loop_monitor
+import credential_pool
+import combo_yield
+from async_persistence import AsyncPersistence, install_queue_logging, uninstall_queue_logging
+from loop_monitor import LoopLagMonitor
+from club_name_index import ClubNameIndex, build_club_name_index
+from credential_pool import (CredentialPool, CredentialsUnavailableError, EgressClients, build_egresses,
+                             is_egress_fault, split_list)
+import tail_latency
+import run_history
+from combo_yield import YieldModel, SaturationTracker, prioritize_combos, record_combo_yield
+from crawl_schema import build_club_row, combo_key as make_combo_key, PLAY_WITH_VALUES, AGES
+
+
+class ApiUnavailableError(Exception):
+    """An API endpoint kept failing after all retries (hybrid_crawl.py falls back to the browser on this)."""
+    def __init__(self, endpoint, message):
+        super().__init__(f"{endpoint}: {message}")
+        self.endpoint = endpoint
 
 class AdaptiveLimiter:
     def __init__(self, initial_concurrent, min_concurrent=5, max_concurrent=100):
@@ -39,6 +62,7 @@ class AdaptiveLimiter:
         self.sem = asyncio.Semaphore(self.concurrent)
         self.failed_count = 0
         self.success_count = 0
+        self.trajectory = [(time.monotonic(), self.concurrent)]  # every concurrency change, for run_history.py
 
     async def acquire(self):
         await self.sem.acquire()
@@ -55,6 +79,7 @@ class AdaptiveLimiter:
             for _ in range(diff):
                 self.sem.acquire()  # giảm semaphore
             self.failed_count = 0
+            self.trajectory.append((time.monotonic(), self.concurrent))
             logger.warning(f"[AdaptiveLimiter] Server issues detected, reduced concurrency to {self.concurrent}")
 
     def record_success(self):
@@ -63,16 +88,13 @@ class AdaptiveLimiter:
             self.concurrent += 1
             self.sem.release()
             self.success_count = 0
+            self.trajectory.append((time.monotonic(), self.concurrent))
             logger.info(f"[AdaptiveLimiter] Server stable, increased concurrency to {self.concurrent}")
 
 LOGS_FOLDER_NAME = "logs"
 OUTPUT_FOLDER_NAME = "output"
 STORAGE_FOLDER_NAME = "storage"
 
-os.makedirs(OUTPUT_FOLDER_NAME, exist_ok=True)
-os.makedirs(STORAGE_FOLDER_NAME, exist_ok=True)
-os.makedirs(LOGS_FOLDER_NAME, exist_ok=True)
-
 # ---------------- CONFIG ----------------
 INPUT_FILE = f"{OUTPUT_FOLDER_NAME}/england_city.csv"
 CITY_COLUMN = "name"
@@ -87,18 +109,128 @@ MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 50))  # per-p
 TOTAL_RETRIES = int(os.getenv("TOTAL_RETRIES", 1000000000))
 BATCH_SAVE_SIZE = int(os.getenv("BATCH_SAVE_SIZE", 200))
 RATE_LIMIT_SLEEP = int(os.getenv("RATE_LIMIT_SLEEP", 60))
+COMBO_CONCURRENCY = int(os.getenv("COMBO_CONCURRENCY", 4))   # combos of one city in flight at once (per process)
+
+API_CLUB_RECOMMENDATION_URL = os.getenv("API_CLUB_RECOMMENDATION_URL")
+API_CLUB_INFO_URL = os.getenv("API_CLUB_INFO_URL")
+KEY_CLUB_INFO_AND_RECOMMENDATION_INFO = os.getenv("KEY_CLUB_INFO_AND_RECOMMENDATION_INFO")
+KEY_CLUB_CONTACT_INFO = os.getenv("KEY_CLUB_CONTACT_INFO")
 # ----------------------------------------
 
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO,
-                    format="%(asctime)s [%(levelname)s] %(message)s")
+# Settings load_config() reads (after .env) and workers receive from the parent: name -> type
+ENV_CONFIG = {
+    "MAX_PROCESSES": int,
+    "MAX_CONCURRENT_REQUESTS": int,
+    "TOTAL_RETRIES": int,
+    "BATCH_SAVE_SIZE": int,
+    "RATE_LIMIT_SLEEP": int,
+    "COMBO_CONCURRENCY": int,
+    "API_CLUB_RECOMMENDATION_URL": str,
+    "API_CLUB_INFO_URL": str,
+    "KEY_CLUB_INFO_AND_RECOMMENDATION_INFO": str,
+    "KEY_CLUB_CONTACT_INFO": str,
+}
+# Helper modules with their own ENV_CONFIG: their settings are read and applied together with this module's,
+# so .env values reach them even though they were imported before load_dotenv()
+CONFIG_MODULES = (coverage_planning, city_crawling, crawl_profiler, loop_monitor, credential_pool, tail_latency,
+                  run_history, combo_yield)
+KEY_HEADER = "Ocp-Apim-Subscription-Key"
+# Imported by the forkserver once, so every forked city worker starts with them already loaded
+WORKER_PRELOAD_MODULES = ["httpx", "tqdm", "filelock", "fake_useragent"]
+
 logger = logging.getLogger(__name__)
 
+_user_agents = None
+_credentials = None
+_radius_observed = set()  # locations whose search radius this process already recorded (one observation each)
+
+
+# ---------------- runtime setup ----------------
+def load_config():
+    """Read .env + environment once (in the parent); the result is passed to every worker."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    config = {}
+    for module in (sys.modules[__name__],) + CONFIG_MODULES:
+        for name, cast in module.ENV_CONFIG.items():
+            value = os.getenv(name)
+            config[name] = cast(value) if value is not None else getattr(module, name)
+    return config
+
+
+def apply_config(config):
+    """Set the settings on this module and on every module in CONFIG_MODULES."""
+    for module in (sys.modules[__name__],) + CONFIG_MODULES:
+        for name in module.ENV_CONFIG:
+            if name in (config or {}):
+                setattr(module, name, config[name])
+
+
+def setup_runtime():
+    """Folders, log file and event-loop policy; safe to call more than once."""
+    os.makedirs(OUTPUT_FOLDER_NAME, exist_ok=True)
+    os.makedirs(STORAGE_FOLDER_NAME, exist_ok=True)
+    os.makedirs(LOGS_FOLDER_NAME, exist_ok=True)
+    logging.basicConfig(filename=LOG_FILE, level=logging.INFO,
+                        format="%(asctime)s [%(levelname)s] %(message)s")
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except Exception:
+        pass
+
+
+def init_worker(config):
+    """ProcessPoolExecutor initializer: take the parent's config instead of re-reading .env."""
+    apply_config(config)
+    setup_runtime()
+
+
+def make_process_pool(max_workers, config):
+    """Pool whose workers fork from a preloaded forkserver (falls back to the platform default start method)."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(list(dict.fromkeys(["__main__", __name__] + WORKER_PRELOAD_MODULES)))
+    else:
+        ctx = None
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                               initializer=init_worker, initargs=(config,))
 
-try:
-    import uvloop
-    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
-except Exception:
-    pass
+
+def get_credentials(share=None, max_wait=None):
+    """
+    Per-process key pools: "club" (recommendation + club info) and "contact", sharing the API_EGRESS routes.
+    share = this process's part of every key's rate (default 1 / MAX_PROCESSES).
+    max_wait = longest wait for an ejected key before CredentialsUnavailableError (None: wait it out).
+    """
+    global _credentials
+    if _credentials is None:
+        share = share if share is not None else 1.0 / max(1, MAX_PROCESSES)
+        egresses = build_egresses(share=share)
+        _credentials = {
+            "club": CredentialPool("club", split_list(KEY_CLUB_INFO_AND_RECOMMENDATION_INFO), egresses, share,
+                                   max_wait=max_wait),
+            "contact": CredentialPool("contact", split_list(KEY_CLUB_CONTACT_INFO), egresses, share,
+                                      max_wait=max_wait),
+        }
+        logger.info(f"[Credentials] {len(_credentials['club'].keys)} club key(s), "
+                    f"{len(_credentials['contact'].keys)} contact key(s), {len(egresses)} egress route(s)")
+    return _credentials
+
+
+def make_egress_clients():
+    import httpx
+    # per-request timeouts are set by tail_latency; this is only the upper bound
+    return EgressClients(httpx.Timeout(tail_latency.MAX_REQUEST_TIMEOUT, connect=10.0))
+
+
+def random_user_agent():
+    # UserAgent() loads its browser database; build it once per process, not per request
+    global _user_agents
+    if _user_agents is None:
+        from fake_useragent import UserAgent
+        _user_agents = UserAgent()
+    return _user_agents.random
 
 # ---------------- helpers ----------------
 def safe_load_pickle(path, default):
@@ -117,8 +249,10 @@ def atomic_pickle_dump(obj, path):
     os.replace(tmp, path)
 
 def load_cities(path=INPUT_FILE, column=CITY_COLUMN):
+    import pandas as pd
     df = pd.read_csv(path)
-    return sorted(df[column].dropna().unique().tolist())
+    # old city_crawling.py runs appended a second header row
+    return sorted(c for c in df[column].dropna().unique().tolist() if c != column)
 
 def load_existing_output_info(csv_path=CSV_FILE):
     """
@@ -135,23 +269,22 @@ def load_existing_output_info(csv_path=CSV_FILE):
         return existing_club_names, completed_combos
     
     try:
+        import pandas as pd
         df = pd.read_csv(csv_path, usecols=lambda c: c in {"City","PlayWith","Age","Club Name"})
         
         # --- Build dict of club names per city ---
         if "Club Name" in df.columns and "City" in df.columns:
-            for _, r in df.iterrows():
-                city = r["City"]
-                name = str(r["Club Name"]).strip()
+            names = df[["City", "Club Name"]].dropna().drop_duplicates()
+            for city, name in zip(names["City"], names["Club Name"].astype(str).str.strip()):
                 if city and name:
                     existing_club_names.setdefault(city, set()).add(name)
         
         # --- Build completed combos ---
         if {"City","PlayWith","Age"}.issubset(df.columns):
             combos = df[["City","PlayWith","Age"]].drop_duplicates()
-            for _, r in combos.iterrows():
+            for city, play_with, age in zip(combos["City"], combos["PlayWith"], combos["Age"]):
                 try:
-                    key = f"{r['City']}__{int(r['PlayWith'])}__{int(r['Age'])}"
-                    completed_combos.add(key)
+                    completed_combos.add(f"{city}__{int(play_with)}__{int(age)}")
                 except Exception:
                     continue
 
@@ -196,24 +329,16 @@ def save_summary_csv(cities, overall_stats, failed_cities, start_dt, elapsed):
 
     logger.info(f"📝 Summary written to {summary_csv} [{status}]")
 
-# Async-safe append CSV (includes combo columns)
-async def async_append_csv_rows(rows, csv_path=CSV_FILE):
-    if not rows:
-        return
-    df = pd.DataFrame(rows)
-    header = not os.path.exists(csv_path)
-    loop = asyncio.get_event_loop()
-    # run pandas to_csv in thread to avoid blocking event loop
-    await loop.run_in_executor(None, lambda: df.to_csv(csv_path, mode='a', index=False, header=header))
-
 # ---------------- core async fetching per club ----------------
-async def fetch_club_info(client: httpx.AsyncClient, club_id: str, age: int, play_with: int,
-                          city: str, limiter: AdaptiveLimiter, existing_club_names: dict,
+async def fetch_club_info(clients: EgressClients, club_id: str, age: int, play_with: int,
+                          city: str, limiter: AdaptiveLimiter, existing_club_names: ClubNameIndex,
                           combo_key: str, club_cache: dict, processed_clubs_local: dict,
-                          stats: dict, dry_run: bool):
+                          stats: dict, dry_run: bool, fetch_contacts: bool = True):
     """
     Fetch club detail by club_id. Return a dict row to save or None.
+    fetch_contacts=False leaves the contact columns empty (hybrid_crawl.py while the contact endpoint is down).
     """
+    import httpx
     # --- Skip only if same city --- #
     if club_id in club_cache:
         cached_city = club_cache[club_id].get("City") if isinstance(club_cache[club_id], dict) else None
@@ -236,13 +361,15 @@ async def fetch_club_info(client: httpx.AsyncClient, club_id: str, age: int, pla
         "DisabilityType": [{"DisabilityId": i} for i in range(1, 14)],
     }
 
+    with crawl_profiler.stage("user_agent"):
+        user_agent = random_user_agent()
     headers_base = {
         "Content-Type": "application/json",
         "Accept": "gzip, deflate",
         "Connection": "keep-alive",
-        "User-Agent": UserAgent().random, 
-        "Ocp-Apim-Subscription-Key": os.getenv("KEY_CLUB_INFO_AND_RECOMMENDATION_INFO")
+        "User-Agent": user_agent,
     }
+    credentials = get_credentials()
     
 
     async with limiter.sem:
@@ -263,10 +390,22 @@ async def fetch_club_info(client: httpx.AsyncClient, club_id: str, age: int, pla
                     contact_data = {}
                 else:
 
-                    headers = {**headers_base, "User-Agent": f"scraper-bot/{random.randint(1,1000)}",
-                               "Ocp-Apim-Subscription-Key": os.getenv("KEY_CLUB_INFO_AND_RECOMMENDATION_INFO")}  # giữ nguyên headers
-                    resp = await client.post(os.getenv("API_CLUB_INFO_URL"), json=payload, headers=headers, timeout=300.0)
-                    if resp.status_code in (429, 500, 503):
+                    headers = {**headers_base, "User-Agent": f"scraper-bot/{random.randint(1,1000)}"}  # giữ nguyên headers
+                    with crawl_profiler.stage("detail"):
+                        # club info is a read: safe to hedge; timeout follows the endpoint's p99
+                        resp = await tail_latency.hedged(
+                            tail_latency.endpoint("club"),
+                            lambda timeout: credentials["club"].send(clients, "POST", API_CLUB_INFO_URL, KEY_HEADER,
+                                                                     headers=headers, json=payload, timeout=timeout))
+                    if resp.status_code in (401, 403, 429):
+                        # the key is ejected from the pool; the retry goes out with another key
+                        # (or waits for this one's cooldown when it is the only key)
+                        if resp.status_code == 429:
+                            limiter.record_failure()
+                            stats["rate_limited"] += 1
+                        logger.warning(f"Key rejected ({resp.status_code}) at Club {club_id} - Age: {age} - City: {city}. Retry: {attempt+1}/{TOTAL_RETRIES}")
+                        continue
+                    if resp.status_code in (500, 503):
                         limiter.record_failure()
                         logger.error(f"Server errors at Club {club_id} - Age: {age} - City: {city} - Play with: {'Male' if play_with == 4 else 'Female'}. Retry: {attempt+1}/{TOTAL_RETRIES}")
                         stats["rate_limited"] += 1
@@ -276,27 +415,36 @@ async def fetch_club_info(client: httpx.AsyncClient, club_id: str, age: int, pla
                         continue
                     resp.raise_for_status()
                     limiter.record_success()
-                    data = resp.json()
+                    with crawl_profiler.stage("parse"):
+                        data = resp.json()
                     
                     club_name = (data.get("ClubName","") or "").strip()
-                    if city in existing_club_names and club_name in existing_club_names[city]:
+                    if existing_club_names.contains(city, club_name):
                         stats["skipped_name"] += 1
                         logger.warning(f"[SKIP] Club '{club_name}' already exists in city '{city}'. Skipping.")
                         return None
                     contact_data = {}  # fetch contact như cũ
                     #                     contact_data = {}
-                    wgs_id = data.get("WgsClubId")
+                    wgs_id = data.get("WgsClubId") if fetch_contacts else None
                     if wgs_id:
                         try:
-                            contact_resp = await client.get(
-                                f"https://hcdeapimngt1.azure-api.net/external/v1/orgs/{wgs_id}/clubcontact",
-                                headers={"Ocp-Apim-Subscription-Key": os.getenv("KEY_CLUB_CONTACT_INFO"), "User-Agent": f"scraper-bot/{random.randint(1,1000)}"},
-                                timeout=300.0
-                            )
+                            with crawl_profiler.stage("contact"):
+                                contact_resp = await tail_latency.hedged(
+                                    tail_latency.endpoint("contact"),
+                                    lambda timeout: credentials["contact"].send(
+                                        clients, "GET",
+                                        f"https://hcdeapimngt1.azure-api.net/external/v1/orgs/{wgs_id}/clubcontact",
+                                        KEY_HEADER,
+                                        headers={"User-Agent": f"scraper-bot/{random.randint(1,1000)}"},
+                                        timeout=timeout
+                                    ))
                             if contact_resp.status_code == 200:
-                                contact_data = contact_resp.json()
+                                with crawl_profiler.stage("parse"):
+                                    contact_data = contact_resp.json()
+                            else:
+                                stats["contact_errors"] = stats.get("contact_errors", 0) + 1
                         except Exception:
-                            pass
+                            stats["contact_errors"] = stats.get("contact_errors", 0) + 1
 
                 # xử lý dữ liệu bình thường
                 club_name = (data.get("ClubName","") or "").strip()
@@ -312,52 +460,36 @@ async def fetch_club_info(client: httpx.AsyncClient, club_id: str, age: int, pla
                 #         logger.warning(f"[SKIP] Club {club_id} in city '{city}' already in cache. Skipping.")
                 #         return None
 
-                # --- Skip duplicate name **same city** ---
-                if city in existing_club_names and club_name in existing_club_names[city]:
+                # --- Skip duplicate name **same city** (claim is atomic across worker processes) ---
+                if not await existing_club_names.aclaim(city, club_name):
                     stats["skipped_name"] += 1
                     logger.warning(f"[SKIP] Club '{club_name}' already exists in city '{city}'. Skipping.")
                     return None
 
-                teams_info = data.get("TeamsInfo", {}) or {}
-                football_types_list = []
-                football_types_list.extend(teams_info.get("FootballType", []) or [])
-                football_types_list.extend(teams_info.get("Gender", []) or [])
-                football_types_list.extend(teams_info.get("DisabilityType", []) or [])
-
-                row = {
-                    "City": city,
-                    "PlayWith": play_with,
-                    "Age": age,
-                    "Club Name": club_name,
-                    "Club Address": ", ".join(filter(None, [data.get("AddressLine1",""), data.get("City",""), data.get("PostCode","")])),
-                    "Accredited To": data.get("ClubCounty","") or "",
-                    "Football Types": ", ".join(filter(None, football_types_list)),
-                    "Team Numbers": data.get("TeamsCount",0) or 0,
-                    "Contact Name": contact_data.get("individualName","") or "",
-                    "Contact Phone": contact_data.get("phone","") or "",
-                    "Contact Email": contact_data.get("email","") or "",
-                    "Contact Website": contact_data.get("website","") or ""
-                }
+                with crawl_profiler.stage("parse"):
+                    row = build_club_row(city, play_with, age, data, contact_data)
 
                 # update caches
-                existing_club_names.setdefault(city, set()).add(club_name)
                 club_cache[club_id] = row
                 processed_clubs_local.setdefault(combo_key, set()).add(club_id)
                 stats["success"] += 1
                 return row
 
+            except CredentialsUnavailableError:
+                # no key left to try (revoked / rejected): let the caller decide, retrying here would only spin
+                stats["failed"] += 1
+                raise
             except httpx.HTTPStatusError as http_error:
                 limiter.record_failure()
                 stats["http_errors"] += 1
-                print(f"Error for http status error: {http_error}. Retry: {attempt+1}/{TOTAL_RETRIES}")
                 logger.error(f"Error for http status error: {http_error}. Retry: {attempt+1}/{TOTAL_RETRIES}", exc_info=True)
                 await asyncio.sleep(min(1.0 * (2 ** attempt) + random.random(), 10.0))
             except Exception as exception_error:
                 stats["other_errors"] += 1
-                print(f"Error for exception_error: {exception_error}. Retry: {attempt+1}/{TOTAL_RETRIES}")
                 logger.error(f"Error for exception_error: {exception_error}. Retry: {attempt+1}/{TOTAL_RETRIES}", exc_info=True)
                 await asyncio.sleep(min(0.5 * (2 ** attempt) + random.random(), 10.0))
         stats["failed"] += 1
+        stats["errors"] = stats.get("errors", 0) + 1   # retries used up: this club is missing from the output
         return None
 # ---------------- fetch list-of-clubs for a combo ----------------
 def extract_clubids_from_recommendation(api_general_info_data):
@@ -370,11 +502,18 @@ def extract_clubids_from_recommendation(api_general_info_data):
                 clubs.append({cid: d.get("FootballType","")})
     return clubs
 
-async def process_combo_async(city, play_with, age, existing_club_names, club_cache, processed_clubs_local, stats, dry_run=False):
-    combo_key = f"{city}__{play_with}__{age}"
+async def process_combo_async(city, play_with, age, existing_club_names, club_cache, processed_clubs_local, stats,
+                              dry_run=False, discovery=None, limiter=None, clients=None, fetch_contacts=True):
+    """
+    discovery (optional dict) receives "club_ids": every ClubId the recommendation returned for this combo.
+    limiter / clients: the city worker's shared ones; a combo run on its own gets private ones.
+    fetch_contacts=False skips the per-club contact lookup.
+    """
+    combo_key = make_combo_key(city, play_with, age)
     # Recommendation API call (one sync call inside thread to keep simple)
     # In dry_run simulate a bunch of club ids
-    limiter = AdaptiveLimiter(MAX_CONCURRENT_REQUESTS, min_concurrent=5, max_concurrent=MAX_CONCURRENT_REQUESTS)
+    if limiter is None:
+        limiter = AdaptiveLimiter(MAX_CONCURRENT_REQUESTS, min_concurrent=5, max_concurrent=MAX_CONCURRENT_REQUESTS)
     api_general_info_data = None
     
     if dry_run:
@@ -383,11 +522,13 @@ async def process_combo_async(city, play_with, age, existing_club_names, club_ca
     else:
         # Use httpx sync client in executor to avoid event-loop blocking for big single POST
         loop = asyncio.get_event_loop()
-        def sync_post():
-            import httpx as _httpx
-            headers = {"User-Agent": f"scraper-bot/{random.randint(1,1000)}", "Ocp-Apim-Subscription-Key": os.getenv("KEY_CLUB_INFO_AND_RECOMMENDATION_INFO")}
-            with _httpx.Client(http2=True, headers=headers, timeout=300.0) as client:
-                resp = client.post(os.getenv("API_CLUB_RECOMMENDATION_URL"), json={
+        import httpx
+        keys = get_credentials()["club"]
+        def sync_post(route, timeout):
+            headers = {"User-Agent": f"scraper-bot/{random.randint(1,1000)}", KEY_HEADER: route.key.value or ""}
+            transport = httpx.HTTPTransport(http2=True, **route.egress.transport_kwargs())
+            with httpx.Client(transport=transport, headers=headers, timeout=timeout) as client:
+                resp = client.post(API_CLUB_RECOMMENDATION_URL, json={
                     "SearchForUser": "Someone else",
                     "Age": str(age),
                     "PlayWith": play_with,
@@ -407,174 +548,349 @@ async def process_combo_async(city, play_with, age, existing_club_names, club_ca
                 return resp.json()
         for current_retry in range(TOTAL_RETRIES):
             try:
-                api_general_info_data = await loop.run_in_executor(None, sync_post)
+                route = await keys.acquire()
+            except CredentialsUnavailableError as e:
+                raise ApiUnavailableError("recommendation", f"[{city}][{play_with}][{age}] {e}") from e
+            try:
+                with crawl_profiler.stage("recommendation"):
+                    # runs in a thread, so it cannot be hedged (no cancellation); the timeout still adapts
+                    api_general_info_data = await tail_latency.timed(
+                        tail_latency.endpoint("recommendation"),
+                        lambda timeout: loop.run_in_executor(None, sync_post, route, timeout))
+                keys.report(route, 200)
                 break
-            except Exception as e:
+            except BaseException as e:
+                if isinstance(e, httpx.HTTPStatusError):
+                    keys.report(route, e.response.status_code, e.response.headers.get("Retry-After"))
+                elif is_egress_fault(e):
+                    keys.report(route)
+                else:
+                    # timeouts included: a slow server says nothing about the key or the egress
+                    keys.release(route)
+                if not isinstance(e, Exception):
+                    raise
                 logger.warning(f"[{city}][{play_with}][{age}] recommendation API failed: {e}. Retry: {current_retry+1}/{TOTAL_RETRIES}", exc_info=True)
-                print(f"[{city}][{play_with}][{age}] recommendation API failed: {e}. Retry: {current_retry+1}/{TOTAL_RETRIES}")
                 await asyncio.sleep(min(0.5 * (2 ** current_retry) + random.random(), 10.0))
+        if api_general_info_data is None:
+            raise ApiUnavailableError("recommendation", f"[{city}][{play_with}][{age}] failed after {TOTAL_RETRIES} retries")
+
+    if not dry_run and api_general_info_data and city not in _radius_observed:
+        # feed coverage_planning.py so it can learn the effective search radius (every combo of a city
+        # searches around the same point, so one observation per location is enough)
+        try:
+            if await loop.run_in_executor(None, record_search_observation, city, api_general_info_data):
+                _radius_observed.add(city)
+        except Exception as e:
+            logger.warning(f"[{city}][{play_with}][{age}] could not record search radius: {e}")
 
     clubs_dicts = extract_clubids_from_recommendation(api_general_info_data)
+    if discovery is not None:
+        discovery["club_ids"] = [cid for d in clubs_dicts for cid in d]
     if not clubs_dicts:
         return []
 
     # now do async detail fetch for each club id
-    timeout = httpx.Timeout(300.0, connect=10.0)
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
     rows_to_save = []
-    
-    async with httpx.AsyncClient(http2=True, timeout=timeout) as client:
+    own_clients = clients is None
+    if own_clients:
+        clients = make_egress_clients()
+    try:
         tasks = [
-            fetch_club_info(client, list(d.keys())[0], age, play_with, city, limiter,
-                            existing_club_names, combo_key, club_cache, processed_clubs_local, stats, dry_run)
+            fetch_club_info(clients, list(d.keys())[0], age, play_with, city, limiter,
+                            existing_club_names, combo_key, club_cache, processed_clubs_local, stats, dry_run,
+                            fetch_contacts)
             for d in clubs_dicts
         ]
         raw_results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if own_clients:
+            await clients.aclose()
     for r in raw_results:
         if isinstance(r, dict):
             rows_to_save.append(r)
+        elif isinstance(r, CredentialsUnavailableError):
+            raise ApiUnavailableError("club", f"[{city}][{play_with}][{age}] {r}") from r
     return rows_to_save
 
 # ---------------- process city (per-process) ----------------
-async def async_append_csv_rows_safe(rows, csv_path=CSV_FILE):
-    """Append rows to CSV safely across multiple processes, preserving main columns."""
+def append_csv_rows_locked(rows, csv_path=CSV_FILE):
+    """Append rows to CSV safely across multiple processes, preserving main columns. Blocking: run off the loop."""
     if not rows:
         return
-    df = pd.DataFrame(rows)
+    # csv module instead of a DataFrame: keeps pandas out of the worker processes
     main_cols = ["City", "PlayWith", "Age"]
-    other_cols = [c for c in df.columns if c not in main_cols]
-    df = df[main_cols + other_cols]
-    header = not os.path.exists(csv_path)
-    lock = FileLock(CSV_LOCK_FILE)
+    other_cols = list(dict.fromkeys(c for r in rows for c in r if c not in main_cols))
+    with FileLock(CSV_LOCK_FILE):
+        header = not os.path.exists(csv_path)
+        with open(csv_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=main_cols + other_cols)
+            if header:
+                writer.writeheader()
+            writer.writerows(rows)
+
+async def async_append_csv_rows_safe(rows, csv_path=CSV_FILE):
+    """Async wrapper: waiting for the FileLock and writing both happen in a worker thread."""
+    if not rows:
+        return
     loop = asyncio.get_event_loop()
-    with lock:
-        await loop.run_in_executor(None, lambda: df.to_csv(csv_path, mode='a', index=False, header=header))
+    await loop.run_in_executor(None, append_csv_rows_locked, rows, csv_path)
+
+def is_retryable_combo_error(error):
+    """Transport errors and 5xx may pass on another attempt; anything else (no usable key, an endpoint
+    that already used up its own retries, a bug) would fail the same way again."""
+    import httpx
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+async def process_combo_with_retries(city, play_with, age, existing_club_names, club_cache,
+                                     processed_clubs_local, stats, dry_run=False, discovery=None,
+                                     limiter=None, clients=None):
+    """
+    Combo-level retries around process_combo_async; backoff awaits instead of time.sleep().
+    Only is_retryable_combo_error() errors are retried; the others, and the last retryable one, are raised.
+    """
+    for attempt in range(1, TOTAL_RETRIES + 1):
+        try:
+            return await process_combo_async(
+                city, play_with, age,
+                existing_club_names,
+                club_cache,
+                processed_clubs_local,
+                stats,
+                dry_run=dry_run,
+                discovery=discovery,
+                limiter=limiter,
+                clients=clients
+            )
+        except Exception as e:
+            if not is_retryable_combo_error(e) or attempt >= TOTAL_RETRIES:
+                raise
+            logger.warning(f"[{city}][{play_with}/{age}] attempt {attempt} failed: {e}", exc_info=True)
+            await asyncio.sleep(min(0.5 * (2 ** attempt) + random.random(), 10.0) + 1 + random.random())
+    return []
 
 def process_city_worker(args):
     city = args.get("city", "Unknown")
     pending_combos = args.get("pending_combos", [])
     dry_run = args.get("dry_run", False)
+    profile_dir = args.get("profile_dir")
+    saturation = SaturationTracker() if args.get("saturation") else None
+    if profile_dir:
+        crawl_profiler.start(profile_dir, city)
 
     start = time.time()
     logger.info(f"Process start for city {city}, combos={len(pending_combos)}, dry_run={dry_run}")
 
-    existing_club_names, combos_from_csv = load_existing_output_info(CSV_FILE)
+    # shared mmap index built by the parent; nothing per-city is loaded into this process
+    existing_club_names = ClubNameIndex()
     club_cache = safe_load_pickle(CACHE_FILE, {}) or {}
     processed_combos_global = safe_load_pickle(PROCESSED_FILE, set()) or set()
     processed_clubs_local = {}
-    processed_combos_buffer = set()
 
-    stats = {"success":0,"failed":0,"http_errors":0,"other_errors":0,
-             "rate_limited":0,"skipped_name":0,"skipped_cache":0,"no_name":0}
+    # "failed" also counts combos that found nothing; "errors" only requests / combos that gave up on an error
+    stats = {"success":0,"failed":0,"errors":0,"http_errors":0,"other_errors":0,"contact_errors":0,
+             "rate_limited":0,"skipped_name":0,"skipped_cache":0,"no_name":0,"saturated_skipped":0,"combos":0}
+    # ClubIds this city already knows about; a combo's yield is the share of its ClubIds not in here yet
+    seen_club_ids = {cid for cid, v in club_cache.items() if isinstance(v, dict) and v.get("City") == city}
 
+    from tqdm import tqdm
     total = len(pending_combos)
     pbar = tqdm(total=total, desc=f"City: {city}", ncols=100)
+    queue = deque(pending_combos)   # highest expected yield first
 
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
+    # Nothing below may block the loop: log I/O goes through a listener thread,
+    # CSV appends / pickle checkpoints through the persistence thread
+    log_listener = install_queue_logging()
+    persistence = AsyncPersistence()
+    existing_club_names.submit = persistence.submit  # name claims are batched onto the writer thread
+    lag_monitor = LoopLagMonitor(loop, name=city).start()
+    # per-run performance counters (this process may have crawled other cities before)
+    tail_latency.reset_run_stats()
+    write_bytes_start = run_history.process_write_bytes()
+    # one limiter for every combo of this city
+    limiter = AdaptiveLimiter(MAX_CONCURRENT_REQUESTS, min_concurrent=5, max_concurrent=MAX_CONCURRENT_REQUESTS)
 
-    try:
-        for (play_with, age) in pending_combos:
-            combo_key = f"{city}__{play_with}__{age}"
-            if combo_key in processed_combos_global:
+    async def run_combo(play_with, age, limiter, clients):
+        combo_key = make_combo_key(city, play_with, age)
+        discovery = {}
+        try:
+            rows = await process_combo_with_retries(
+                city, play_with, age,
+                existing_club_names,
+                club_cache,
+                processed_clubs_local,
+                stats,
+                dry_run=dry_run,
+                discovery=discovery,
+                limiter=limiter,
+                clients=clients
+            )
+        except Exception as e:
+            # not marked as processed: the next run picks the combo up again
+            logger.error(f"[{city}][{play_with}/{age}] combo failed: {e}", exc_info=True)
+            stats["failed"] += 1
+            stats["errors"] += 1
+            pbar.update(1)
+            return
+
+        if "club_ids" in discovery:
+            returned_ids = set(discovery["club_ids"])
+            new_ids = returned_ids - seen_club_ids
+            seen_club_ids.update(new_ids)
+            if saturation is not None:
+                saturation.observe(len(returned_ids), len(new_ids))
+            if not dry_run:
+                persistence.submit(record_combo_yield, city, play_with, age, len(returned_ids), len(new_ids))
+
+        if rows:
+            # write / checkpoint stages are timed on the writer thread, where the I/O actually happens
+            persistence.submit(crawl_profiler.timed("write", append_csv_rows_locked), rows, CSV_FILE)
+        else:
+            stats["failed"] += 1
+
+        # checkpoint as soon as the combo is done; back-to-back snapshots are coalesced by the writer thread
+        stats["combos"] += 1
+        processed_combos_global.add(combo_key)
+        persistence.checkpoint(PROCESSED_FILE, set(processed_combos_global),
+                               crawl_profiler.timed("checkpoint", atomic_pickle_dump))
+        pbar.update(1)
+
+    async def combo_runner(clients):
+        while queue:
+            if saturation is not None and saturation.saturated():
+                skipped = len(queue)
+                queue.clear()
+                stats["saturated_skipped"] += skipped
+                logger.info(f"[{city}] saturated: {saturation.window_yield():.1%} new ClubIds over the last "
+                            f"{len(saturation.recent)} combos, skipping {skipped} remaining combos")
+                pbar.update(skipped)
+                return
+            play_with, age = queue.popleft()
+            if make_combo_key(city, play_with, age) in processed_combos_global:
                 pbar.set_postfix_str(f"skip {play_with}/{age}")
                 pbar.update(1)
                 continue
+            await run_combo(play_with, age, limiter, clients)
 
-            attempt = 0
-            rows = []
-            while attempt < TOTAL_RETRIES:
-                attempt += 1
-                try:
-                    rows = loop.run_until_complete(process_combo_async(
-                        city, play_with, age,
-                        existing_club_names,
-                        club_cache,
-                        processed_clubs_local,
-                        stats,
-                        dry_run=dry_run
-                    ))
-                    break
-                    # if not rows:
-                    #     logger.warning(f"[{city}][{play_with}/{age}] attempt {attempt} got 0 rows")
-                    #     if attempt < TOTAL_RETRIES:
-                    #         time.sleep(1 + random.random())  # nhẹ nhàng jitter
-                except Exception as e:
-                    logger.warning(f"[{city}][{play_with}/{age}] attempt {attempt} failed: {e}", exc_info=True)
-                    print(f"[{city}][{play_with}/{age}] attempt {attempt} failed: {e}")
-                    time.sleep(min(0.5 * (2 ** attempt) + random.random(), 10.0))
-                    if attempt < TOTAL_RETRIES:
-                        time.sleep(1 + random.random())
-
-            if rows:
-                loop.run_until_complete(async_append_csv_rows(rows, CSV_FILE))
-            else:
-                stats["failed"] += 1
-
-            # mark combo done
-            processed_combos_buffer.add(combo_key)
-            if len(processed_combos_buffer) >= 20:
-                processed_combos_global.update(processed_combos_buffer)
-                try:
-                    atomic_pickle_dump(processed_combos_global, PROCESSED_FILE)
-                except Exception as e:
-                    logger.warning(f"Failed to dump processed_combos: {e}", exc_info=True)
-                    print(f"Failed to dump processed_combos: {e}")
-                processed_combos_buffer.clear()
-
-            pbar.update(1)
+    async def crawl_city():
+        # one set of HTTP clients for every combo of this city
+        refresher = asyncio.ensure_future(existing_club_names.refresh_periodically())
+        try:
+            async with make_egress_clients() as clients:
+                await asyncio.gather(*(combo_runner(clients) for _ in range(max(1, COMBO_CONCURRENCY))))
+        finally:
+            refresher.cancel()
 
+    try:
+        loop.run_until_complete(crawl_city())
     finally:
-        if processed_combos_buffer:
-            processed_combos_global.update(processed_combos_buffer)
-        try:
-            atomic_pickle_dump(processed_combos_global, PROCESSED_FILE)
-            atomic_pickle_dump(club_cache, CACHE_FILE)
-        except Exception as e:
-            logger.warning(f"Final dump failed: {e}")
+        persistence.checkpoint(PROCESSED_FILE, set(processed_combos_global), atomic_pickle_dump)
+        persistence.checkpoint(CACHE_FILE, dict(club_cache), atomic_pickle_dump)
+        persistence.close()
+        lag_monitor.stop()
         loop.close()
         pbar.close()
+        if profile_dir:
+            crawl_profiler.stop()
+        uninstall_queue_logging(log_listener)
 
     elapsed = time.time() - start
-    logger.info(f"Process done for city {city} elapsed {elapsed:.1f}s stats={stats}")
-    return {"city": city, "elapsed": elapsed, "stats": stats}
+    loop_lag = lag_monitor.summary()
+    logger.info(f"Process done for city {city} elapsed {elapsed:.1f}s stats={stats} loop_lag={loop_lag}")
+    latency = tail_latency.summaries()
+    if latency:
+        logger.info(f"[Latency] {city}: {latency}")
+    if _credentials is not None:
+        logger.info(f"[Credentials] {city}: " + ", ".join(f"{name} {c['requests']} req / {c['rejected']} rejected"
+                                                        for pool in _credentials.values()
+                                                        for name, c in pool.summary().items()))
+    perf = run_history.worker_profile(limiter, write_bytes_start, stats["combos"])
+    return {"city": city, "elapsed": elapsed, "stats": stats, "loop_lag": loop_lag, "latency": latency, "perf": perf}
 
 # ---------------- main ----------------
 def build_pending_combos_for_city(city, existing_combo_set):
     # returns list of (play_with, age) combos that are NOT present in existing_combo_set
     pending = []
-    for play_with in [4,5]:
-        for age in range(5, 100):  # 5..99 inclusive
-            key = f"{city}__{play_with}__{age}"
+    for play_with in PLAY_WITH_VALUES:
+        for age in AGES:  # 5..99 inclusive
+            key = make_combo_key(city, play_with, age)
             if key not in existing_combo_set:
                 pending.append((play_with, age))
     return pending
 
-def main(dry_run=False):
+def main(dry_run=False, input_file=INPUT_FILE, profile=False, saturation=False, discover=False):
     from datetime import datetime
+    from tqdm import tqdm
 
-    # Load cities và combo đã crawl
-    cities = load_cities(INPUT_FILE, CITY_COLUMN)
+    config = load_config()
+    apply_config(config)
+    setup_runtime()
+
+    # Load combo đã crawl
     _, combos_from_csv = load_existing_output_info(CSV_FILE)
     processed_from_pickle = safe_load_pickle(PROCESSED_FILE, set()) or set()
     existing_combo_set = set().union(combos_from_csv, processed_from_pickle)
+    build_club_name_index(CSV_FILE)
 
+    recorder = run_history.RunRecorder(config, dry_run=dry_run, csv_path=CSV_FILE)
     start_time = time.time()
     start_dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     logger.info(f"🚀 Crawl started at {start_dt}")
-
-    # Build per-city pending combos
-    city_args = []
-    for city in cities:
-        pending = build_pending_combos_for_city(city, existing_combo_set)
-        if pending:
-            city_args.append({"city": city, "pending_combos": pending, "dry_run": dry_run})
-        else:
-            logger.info(f"City {city} already fully completed, skipping.")
-
-    if not city_args:
-        print("No pending combos — everything is complete.")
-        return
+    # one folder per run; every worker process writes its own profile into it
+    profile_dir = os.path.join(crawl_profiler.PROFILE_FOLDER_NAME, datetime.now().strftime("%Y%m%d_%H%M%S")) if profile else None
+
+    # Build per-city pending combos, highest expected yield first
+    yield_model = YieldModel.load()
+
+    def build_city_args(city_stream):
+        for city in city_stream:
+            pending = prioritize_combos(city, build_pending_combos_for_city(city, existing_combo_set), yield_model)
+            if pending:
+                yield {"city": city, "pending_combos": pending, "dry_run": dry_run,
+                       "profile_dir": profile_dir, "saturation": saturation}
+            else:
+                logger.info(f"City {city} already fully completed, skipping.")
+
+    discovery = None
+    if discover:
+        # only new locations, against the canonical city file (--input may be a search-points CSV)
+        import itertools
+        import httpx
+        cities, discovery, unfinished = [], {}, set()
+
+        def discovered():
+            for city in city_crawling.stream_new_cities(summary=discovery):
+                cities.append(city)
+                yield city
+
+        def submitted(args):
+            for arg in args:
+                unfinished.add(arg["city"])
+                yield arg
+
+        city_args = submitted(build_city_args(discovered()))
+        try:
+            first = next(city_args, None)
+        except (httpx.HTTPError, OSError, ValueError) as e:
+            logger.error(f"[CityDiscovery] Could not read the city source: {e}")
+            print(f"City discovery failed: {e}")
+            return
+        if first is None:
+            city_crawling.save_cities(discovery["cities"])
+            print("No new locations discovered — nothing to crawl.")
+            return
+        city_args = itertools.chain([first], city_args)
+        pool_size = MAX_PROCESSES
+    else:
+        cities = load_cities(input_file, CITY_COLUMN)
+        city_args = list(build_city_args(cities))
+        if not city_args:
+            print("No pending combos — everything is complete.")
+            return
+        pool_size = min(MAX_PROCESSES, len(city_args))
 
     # Tổng thống kê toàn bộ
     overall_stats = {
@@ -583,10 +899,12 @@ def main(dry_run=False):
         "skipped_name": 0,
         "skipped_other": 0,
     }
+    saturated_skipped = 0
     failed_cities = []
+    loop_lag_total = {"stalls": 0, "max_lag_ms": 0.0, "total_lag_ms": 0.0}
 
     # Run multiprocessing
-    with ProcessPoolExecutor(max_workers=min(MAX_PROCESSES, len(city_args))) as executor:
+    with make_process_pool(pool_size, config) as executor:
         futures = [executor.submit(process_city_worker, arg) for arg in city_args]
 
         for fut in tqdm(futures, desc="Cities", ncols=100):
@@ -594,6 +912,7 @@ def main(dry_run=False):
                 try:
                     res = fut.result()
                     logger.info(f"City finished: {res['city']} elapsed {res['elapsed']:.1f}s")
+                    recorder.add_city(res)
                     
                     # Update overall_stats
                     stats = res.get("stats", {})
@@ -601,16 +920,30 @@ def main(dry_run=False):
                     overall_stats["saved"] += stats.get("success",0)
                     overall_stats["skipped_name"] += stats.get("skipped_name",0)
                     overall_stats["skipped_other"] += stats.get("skipped_cache",0) + stats.get("no_name",0) + stats.get("other_errors",0)
+                    saturated_skipped += stats.get("saturated_skipped",0)
+
+                    loop_lag = res.get("loop_lag", {})
+                    loop_lag_total["stalls"] += loop_lag.get("stalls", 0)
+                    loop_lag_total["total_lag_ms"] += loop_lag.get("total_lag_ms", 0.0)
+                    loop_lag_total["max_lag_ms"] = max(loop_lag_total["max_lag_ms"], loop_lag.get("max_lag_ms", 0.0))
                     
                     # Nếu có failed trong city
                     if stats.get("failed",0) > 0:
                         failed_cities.append(res['city'])
+                    if discovery is not None and stats.get("errors",0) == 0:
+                        # crawled without errors (empty searches are fine): the location is known from now on.
+                        # Unfinished ones are left out of the city file, so the next --discover run yields them again
+                        unfinished.discard(res['city'])
+                        city_crawling.save_cities([c for c in discovery["cities"] if c not in unfinished])
                     break
                 except Exception as e:
                     logger.exception(f"City future error: {e}. Retry: {current_retry+1}", exc_info=True)
                     print(f"City future error: {e}. Retry: {current_retry+1}")
                     time.sleep(min(0.5 * (2 ** current_retry) + random.random(), 10.0))
 
+    if discovery is not None:
+        city_crawling.save_cities([c for c in discovery["cities"] if c not in unfinished])
+
     # Log tổng kết
     elapsed = time.time() - start_time
     hours, remainder = divmod(int(elapsed), 3600)
@@ -624,6 +957,15 @@ def main(dry_run=False):
         f"Skipped (Other): {overall_stats['skipped_other']}"
     )
 
+    if saturated_skipped:
+        logger.info(f"[SATURATION] {saturated_skipped} low-yield combos skipped; run without --saturation to crawl them")
+
+    if loop_lag_total["stalls"]:
+        logger.warning(
+            f"[LOOP LAG] {loop_lag_total['stalls']} event-loop stalls, max {loop_lag_total['max_lag_ms']:.0f} ms, "
+            f"total {loop_lag_total['total_lag_ms']:.0f} ms (stacks in the log)"
+        )
+
     if failed_cities:
         logger.warning(f"⚠️ {len(failed_cities)} cities failed: {', '.join(failed_cities)}")
     else:
@@ -634,10 +976,29 @@ def main(dry_run=False):
 
     # Save summary CSV
     save_summary_csv(cities, overall_stats, failed_cities, start_dt, elapsed)
+
+    # Performance profile of this run + comparison with the previous comparable run
+    run_profile = recorder.finish(status="SUCCESS" if not failed_cities else "FAILED", saved=overall_stats["saved"])
+    run_history.log_regressions(run_profile)
+    run_history.save_run(run_profile)
+
+    if profile_dir:
+        merged_path, summary_path = crawl_profiler.merge_profiles(profile_dir)
+        print(f"Profile written: {merged_path} (flamegraph folded stacks), {summary_path} (per-stage timings)")
     
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--dry-run", action="store_true", help="simulate requests (no real API calls)")
+    parser.add_argument("--input", default=INPUT_FILE,
+                        help="locations CSV (column 'name'), e.g. output/england_search_points.csv from coverage_planning.py")
+    parser.add_argument("--profile", action="store_true",
+                        help="sample every worker process and time each stage; results under logs/profile/")
+    parser.add_argument("--saturation", action="store_true",
+                        help="stop a city once new-club discovery drops below SATURATION_THRESHOLD")
+    parser.add_argument("--discover", action="store_true",
+                        help="refresh the city list (conditional fetch) and crawl only the new locations "
+                             "(diffed against output/england_city.csv; --input is not used)")
     args = parser.parse_args()
-    main(dry_run=args.dry_run)
\ No newline at end of file
+    main(dry_run=args.dry_run, input_file=args.input, profile=args.profile, saturation=args.saturation,
+         discover=args.discover)
\ No newline at end of file
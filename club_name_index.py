@@ -0,0 +1,200 @@
+"""
+club_name_index.py
+
+Shared (city, club name) membership index for the v3 worker processes.
+
+- build_club_name_index(): run once by the parent; hashes every normalized (City, Club Name) of the output CSV
+  to 64 bits and writes them as one sorted array (storage/club_names.idx)
+- ClubNameIndex: workers mmap that file read-only (pages are shared by the OS between processes, nothing is
+  copied per worker) and binary-search it
+- Names found during the run go to an append-only side log (storage/club_names.log) of 8-byte hashes;
+  claim_many() checks and appends a whole batch under one file lock, so two processes never both accept the same club
+- Nothing here blocks an event loop: contains() only looks at memory, refresh() (side-log catch-up) is run
+  periodically in an executor, and aclaim() batches the claims of concurrent coroutines into one claim_many()
+  call on a writer thread (the worker's persistence thread, or the default executor)
+"""
+
+import os
+import csv
+import mmap
+import bisect
+import asyncio
+import hashlib
+import logging
+import threading
+from array import array
+
+from filelock import FileLock
+
+from row_sink import normalize_key_part
+
+STORAGE_FOLDER_NAME = "storage"
+
+# ---------------- CONFIG ----------------
+NAME_INDEX_FILE = f"{STORAGE_FOLDER_NAME}/club_names.idx"
+NAME_LOG_FILE = f"{STORAGE_FOLDER_NAME}/club_names.log"
+NAME_LOCK_FILE = os.path.join(STORAGE_FOLDER_NAME, "club_names.lock")
+NAME_REFRESH_SECONDS = 2.0   # how often a worker catches up with names other workers claimed
+# ----------------------------------------
+
+HASH_TYPECODE = "Q"   # unsigned 64-bit, native byte order (the files never leave this machine)
+RECORD_SIZE = 8
+
+logger = logging.getLogger(__name__)
+
+
+def name_hash(city, name):
+    key = f"{normalize_key_part(city)}\x1f{normalize_key_part(name)}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=RECORD_SIZE).digest(), "big")
+
+
+def build_club_name_index(csv_path, index_path=NAME_INDEX_FILE, log_path=NAME_LOG_FILE,
+                          city_column="City", name_column="Club Name"):
+    """(Re)build the sorted hash file from the output CSV and start an empty side log. Returns the entry count."""
+    hashes = set()
+    if os.path.exists(csv_path):
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                name = (r.get(name_column) or "").strip()
+                if name:
+                    hashes.add(name_hash(r.get(city_column), name))
+    arr = array(HASH_TYPECODE, sorted(hashes))
+
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    with FileLock(NAME_LOCK_FILE):
+        tmp = index_path + ".tmp"
+        with open(tmp, "wb") as f:
+            arr.tofile(f)
+        os.replace(tmp, index_path)
+        # everything the side log held is either in the CSV now or was never written
+        open(log_path, "wb").close()
+    logger.info(f"[ClubNameIndex] {len(arr)} (city, name) keys indexed from {csv_path} -> {index_path}")
+    return len(arr)
+
+
+class ClubNameIndex:
+    def __init__(self, index_path=NAME_INDEX_FILE, log_path=NAME_LOG_FILE, submit=None):
+        """submit(fn, *args) -> concurrent.futures.Future runs aclaim() batches (e.g. AsyncPersistence.submit)."""
+        self.index_path = index_path
+        self.log_path = log_path
+        self.submit = submit
+        self._base = None
+        if os.path.exists(index_path) and os.path.getsize(index_path) >= RECORD_SIZE:
+            with open(index_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._base = memoryview(self._mmap).cast(HASH_TYPECODE)
+        self._recent = set()    # hashes read from the side log (only names found during this run)
+        self._log_offset = 0
+        self._log_lock = threading.Lock()   # refresh() and claim_many() may run on different threads
+        self._pending_claims = []           # (hash, asyncio.Future) waiting for the next batch
+        self._claim_task = None
+
+    def __len__(self):
+        return (0 if self._base is None else len(self._base)) + len(self._recent)
+
+    def _in_base(self, h):
+        if self._base is None:
+            return False
+        i = bisect.bisect_left(self._base, h)
+        return i < len(self._base) and self._base[i] == h
+
+    def _read_log(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        usable = len(data) - len(data) % RECORD_SIZE
+        if usable:
+            self._recent.update(array(HASH_TYPECODE, data[:usable]))
+            self._log_offset += usable
+
+    def refresh(self):
+        """Pick up hashes other processes appended to the side log since the last read. Blocking: run off the loop."""
+        with self._log_lock:
+            self._read_log()
+
+    async def refresh_periodically(self, interval=NAME_REFRESH_SECONDS):
+        """Run refresh() in the default executor every interval seconds until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await loop.run_in_executor(None, self.refresh)
+            except OSError as e:
+                logger.warning(f"[ClubNameIndex] side log refresh failed: {e}")
+
+    def _known(self, h):
+        return self._in_base(h) or h in self._recent
+
+    def contains(self, city, name):
+        """In-memory check (base index + side log as of the last refresh); may miss very recent claims."""
+        return self._known(name_hash(city, name))
+
+    def claim_many(self, hashes):
+        """
+        Claim every hash under one file lock; returns one bool per hash (True: the caller owns it).
+        A hash repeated inside the batch is owned by its first occurrence. Blocking: run off the loop.
+        """
+        results = [not self._known(h) for h in hashes]
+        if not any(results):
+            return results
+        with self._log_lock, FileLock(NAME_LOCK_FILE):
+            self._read_log()
+            new = []
+            for i, h in enumerate(hashes):
+                if results[i] and not self._known(h):
+                    self._recent.add(h)
+                    new.append(h)
+                else:
+                    results[i] = False
+            if new:
+                with open(self.log_path, "ab") as f:
+                    f.write(array(HASH_TYPECODE, new).tobytes())
+                self._log_offset += len(new) * RECORD_SIZE  # the read above took the log up to our own records
+        return results
+
+    def claim(self, city, name):
+        """Record (city, name) unless some process already has; True when the caller owns the club. Blocking."""
+        return self.claim_many([name_hash(city, name)])[0]
+
+    def add_many(self, pairs):
+        """Record (city, name) pairs written by another path (browser tier). Blocking: run off the loop."""
+        self.claim_many([name_hash(city, name) for city, name in pairs])
+
+    async def aclaim(self, city, name):
+        """
+        claim() for coroutines: claims made while a batch is in flight are queued and go out together in the
+        next claim_many() call, so the file lock is taken once per batch instead of once per club.
+        """
+        h = name_hash(city, name)
+        if self._known(h):
+            return False
+        future = asyncio.get_running_loop().create_future()
+        self._pending_claims.append((h, future))
+        if self._claim_task is None:
+            self._claim_task = asyncio.ensure_future(self._run_claims())
+        return await future
+
+    async def _run_claims(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.sleep(0)  # let the coroutines scheduled in this loop iteration join the first batch
+            while self._pending_claims:
+                batch, self._pending_claims = self._pending_claims, []
+                hashes = [h for h, _ in batch]
+                try:
+                    if self.submit is not None:
+                        results = await asyncio.wrap_future(self.submit(self.claim_many, hashes))
+                    else:
+                        results = await loop.run_in_executor(None, self.claim_many, hashes)
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future), owned in zip(batch, results):
+                    if not future.done():
+                        future.set_result(owned)
+        finally:
+            self._claim_task = None
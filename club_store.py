@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+club_store.py
+
+Indexed local query service over the crawled club data.
+
+- ingest: loads output/clubs_data.csv (or any crawler CSV, v1/v2 columns included) into an SQLite store
+  (storage/clubs.sqlite) with indexes on (City, PlayWith, Age), Age and postcode district, plus an FTS5
+  index over club name and football types
+- Ingest is incremental: the store remembers how far it read each CSV and only parses the rows appended since
+  (the crawlers only ever append); a rewritten / truncated CSV is re-read from the start
+- serve: small local HTTP API (stdlib ThreadingHTTPServer) with pagination; --watch re-ingests every N seconds.
+  Requests borrow connections from a small pool (QUERY_POOL_SIZE) instead of opening one per request thread
+- age is the age the club was crawled under, not the ages it caters for: v3 / hybrid keep a club once per city,
+  so that is the first (play_with, age) combo that returned it. age / age_min / age_max filter on that value
+
+    GET /clubs?city=Leeds&play_with=female&age=12&q=futsal&limit=20&offset=0
+    GET /clubs?district=LS6&age_min=10&age_max=14&q=walk*
+    GET /stats
+    POST /ingest
+"""
+
+import io
+import os
+import re
+import csv
+import json
+import time
+import queue
+import sqlite3
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from crawl_schema import SELENIUM_TO_CLUB_COLUMNS
+from row_sink import normalize_key_part
+
+OUTPUT_FOLDER_NAME = "output"
+STORAGE_FOLDER_NAME = "storage"
+
+# ---------------- CONFIG ----------------
+CLUBS_CSV_FILE = f"{OUTPUT_FOLDER_NAME}/clubs_data.csv"
+CLUB_STORE_FILE = f"{STORAGE_FOLDER_NAME}/clubs.sqlite"
+QUERY_HOST = os.getenv("QUERY_HOST", "127.0.0.1")
+QUERY_PORT = int(os.getenv("QUERY_PORT", 8765))
+QUERY_PAGE_SIZE = int(os.getenv("QUERY_PAGE_SIZE", 50))
+QUERY_MAX_PAGE_SIZE = int(os.getenv("QUERY_MAX_PAGE_SIZE", 500))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 5000))
+QUERY_POOL_SIZE = int(os.getenv("QUERY_POOL_SIZE", 8))   # idle SQLite connections kept for the HTTP handler threads
+# ----------------------------------------
+
+# outward code of a UK postcode ("LS6 2AB" -> "LS6"); the API addresses end with the postcode
+POSTCODE_RE = re.compile(r"\b([A-Z]{1,2}[0-9][A-Z0-9]?)\s*[0-9][A-Z]{2}\b")
+PLAY_WITH_ALIASES = {"4": 4, "male": 4, "m": 4, "5": 5, "female": 5, "f": 5}
+
+# store column -> CSV column
+STORE_COLUMNS = {
+    "city": "City",
+    "play_with": "PlayWith",
+    "age": "Age",
+    "club_name": "Club Name",
+    "club_address": "Club Address",
+    "accredited_to": "Accredited To",
+    "football_types": "Football Types",
+    "team_numbers": "Team Numbers",
+    "contact_name": "Contact Name",
+    "contact_phone": "Contact Phone",
+    "contact_email": "Contact Email",
+    "contact_website": "Contact Website",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clubs (
+    id INTEGER PRIMARY KEY,
+    city TEXT, play_with INTEGER, age INTEGER, club_name TEXT, club_address TEXT, accredited_to TEXT,
+    football_types TEXT, team_numbers INTEGER, contact_name TEXT, contact_phone TEXT, contact_email TEXT,
+    contact_website TEXT,
+    city_key TEXT NOT NULL, name_key TEXT NOT NULL, postcode_district TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_clubs_city ON clubs (city_key, play_with, age);
+CREATE INDEX IF NOT EXISTS idx_clubs_age ON clubs (age, play_with);
+CREATE INDEX IF NOT EXISTS idx_clubs_district ON clubs (postcode_district, play_with, age);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS clubs_fts USING fts5(
+    club_name, football_types, content='clubs', content_rowid='id', tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3 4'
+);
+CREATE TRIGGER IF NOT EXISTS clubs_ai AFTER INSERT ON clubs BEGIN
+    INSERT INTO clubs_fts (rowid, club_name, football_types) VALUES (new.id, new.club_name, new.football_types);
+END;
+CREATE TRIGGER IF NOT EXISTS clubs_ad AFTER DELETE ON clubs BEGIN
+    INSERT INTO clubs_fts (clubs_fts, rowid, club_name, football_types)
+    VALUES ('delete', old.id, old.club_name, old.football_types);
+END;
+
+-- dedup key: play_with / age are NULL for v1/v2 rows, and NULLs never collide in a plain UNIQUE constraint
+CREATE UNIQUE INDEX IF NOT EXISTS idx_clubs_key
+    ON clubs (city_key, COALESCE(play_with, -1), COALESCE(age, -1), name_key);
+
+CREATE TABLE IF NOT EXISTS ingest_state (
+    source TEXT PRIMARY KEY,
+    byte_offset INTEGER NOT NULL,
+    header TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    updated TEXT NOT NULL
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def postcode_district(address):
+    matches = POSTCODE_RE.findall((address or "").upper())
+    return matches[-1] if matches else None
+
+
+def _int_or_none(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_play_with(value):
+    if value in (None, ""):
+        return None
+    play_with = PLAY_WITH_ALIASES.get(str(value).strip().lower())
+    if play_with is None:
+        raise ValueError(f"play_with must be 4/5 or male/female, got {value!r}")
+    return play_with
+
+
+def parse_int(name, value):
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+
+
+def fts_query(text):
+    """Free text -> FTS5 MATCH expression: every word must match; "futs*" is a prefix search."""
+    terms = re.findall(r"(\w+)(\*?)", text or "")
+    return " AND ".join(f'"{word}"{star}' for word, star in terms)
+
+
+def to_store_row(row):
+    """CSV row (unified or legacy v1/v2 columns) -> clubs table values; None when there is no club name."""
+    if "Address" in row and "Club Address" not in row:
+        row = {SELENIUM_TO_CLUB_COLUMNS.get(k, k): v for k, v in row.items()}
+    name = (row.get("Club Name") or "").strip()
+    if not name:
+        return None
+    values = {col: (row.get(csv_col) or "").strip() for col, csv_col in STORE_COLUMNS.items()}
+    values["club_name"] = name
+    values["play_with"] = _int_or_none(values["play_with"])
+    values["age"] = _int_or_none(values["age"])
+    values["team_numbers"] = _int_or_none(values["team_numbers"])
+    values["city_key"] = normalize_key_part(values["city"])
+    values["name_key"] = normalize_key_part(name)
+    values["postcode_district"] = postcode_district(values["club_address"])
+    return values
+
+
+class ClubStore:
+    def __init__(self, path=CLUB_STORE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # ThreadingHTTPServer starts a thread per request: connections are pooled, not kept per thread
+        self._pool = queue.LifoQueue(maxsize=QUERY_POOL_SIZE)
+        self._ingest_lock = threading.Lock()
+        with self.connection() as conn:
+            with conn:
+                self._drop_null_key_duplicates(conn)
+            conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _drop_null_key_duplicates(conn):
+        """Stores built before idx_clubs_key may hold repeated v1/v2 rows (NULL play_with / age): keep the first."""
+        exists = "SELECT 1 FROM sqlite_master WHERE name = ?"
+        if not conn.execute(exists, ("clubs",)).fetchone() or conn.execute(exists, ("idx_clubs_key",)).fetchone():
+            return
+        removed = conn.execute(
+            "DELETE FROM clubs WHERE id NOT IN (SELECT MIN(id) FROM clubs "
+            "GROUP BY city_key, COALESCE(play_with, -1), COALESCE(age, -1), name_key)"
+        ).rowcount
+        if removed:
+            logger.info(f"[ClubStore] Removed {removed} duplicate clubs before adding the dedup index")
+
+    def _connect(self):
+        # check_same_thread=False: a pooled connection serves whichever thread borrows it next (one at a time)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")   # readers never wait for an ingest
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool (a new one when none is idle) and give it back afterwards."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ---------------- ingest ----------------
+    def ingest_csv(self, csv_path=CLUBS_CSV_FILE):
+        """Add the rows appended to csv_path since the last ingest. Returns the number of new clubs stored."""
+        with self._ingest_lock:
+            if not os.path.exists(csv_path):
+                logger.warning(f"[ClubStore] {csv_path} not found, nothing to ingest")
+                return 0
+            source = os.path.abspath(csv_path)
+            with self.connection() as conn:
+                state = conn.execute("SELECT byte_offset, header FROM ingest_state WHERE source = ?", (source,)).fetchone()
+                offset, header = (state["byte_offset"], json.loads(state["header"])) if state else (0, None)
+
+                with open(csv_path, "rb") as f:
+                    first_line = f.readline()
+                    if header is not None and (os.path.getsize(csv_path) < offset or
+                                               next(csv.reader([first_line.decode("utf-8-sig")]), []) != header):
+                        logger.info(f"[ClubStore] {csv_path} was rewritten, re-reading it from the start")
+                        offset, header = 0, None
+                    if header is None:
+                        header = next(csv.reader([first_line.decode("utf-8-sig")]), [])
+                        offset = len(first_line)
+                    f.seek(offset)
+                    data = f.read()
+
+                # only complete lines: a crawler may be in the middle of appending the last one
+                data = data[:data.rfind(b"\n") + 1]
+                added = 0
+                batch = []
+                for values in csv.reader(io.StringIO(data.decode("utf-8"), newline="")):
+                    row = to_store_row(dict(zip(header, values)))
+                    if row is not None:
+                        batch.append(row)
+                    if len(batch) >= INGEST_BATCH_SIZE:
+                        added += self._insert(conn, batch)
+                        batch = []
+                added += self._insert(conn, batch)
+
+                with conn:
+                    conn.execute(
+                        "INSERT INTO ingest_state (source, byte_offset, header, rows, updated) VALUES (?, ?, ?, ?, datetime('now')) "
+                        "ON CONFLICT (source) DO UPDATE SET byte_offset = excluded.byte_offset, header = excluded.header, "
+                        "rows = ingest_state.rows + excluded.rows, updated = excluded.updated",
+                        (source, offset + len(data), json.dumps(header), added),
+                    )
+                if added:
+                    logger.info(f"[ClubStore] {added} new clubs ingested from {csv_path}")
+                return added
+
+    @staticmethod
+    def _insert(conn, rows):
+        if not rows:
+            return 0
+        columns = list(rows[0].keys())
+        sql = (f"INSERT OR IGNORE INTO clubs ({', '.join(columns)}) "
+               f"VALUES ({', '.join(':' + c for c in columns)})")
+        # rowcount is sqlite3_changes() summed over the batch: rows actually inserted, without the ignored duplicates
+        # and without the FTS trigger writes (conn.total_changes counts those too)
+        with conn:
+            return conn.executemany(sql, rows).rowcount
+
+    # ---------------- queries ----------------
+    def search(self, city=None, play_with=None, age=None, age_min=None, age_max=None, district=None, q=None,
+               limit=QUERY_PAGE_SIZE, offset=0):
+        """
+        Filtered, paginated club lookup; every filter is optional. Returns {"total", "limit", "offset", "items"}.
+        age / age_min / age_max match the age the club was crawled under (see the module docstring).
+        Raises ValueError for a malformed filter.
+        """
+        where, params = [], []
+        if city:
+            where.append("city_key = ?")
+            params.append(normalize_key_part(city))
+        play_with = parse_play_with(play_with)
+        if play_with is not None:
+            where.append("play_with = ?")
+            params.append(play_with)
+        for name, value, op in (("age", age, "="), ("age_min", age_min, ">="), ("age_max", age_max, "<=")):
+            value = parse_int(name, value)
+            if value is not None:
+                where.append(f"age {op} ?")
+                params.append(value)
+        if district:
+            where.append("postcode_district = ?")
+            params.append(district.strip().upper())
+        match = fts_query(q)
+        if match:
+            if where:
+                # the B-tree filters narrow it down first; each candidate is then checked with one FTS rowid probe
+                where.append("EXISTS (SELECT 1 FROM clubs_fts WHERE clubs_fts MATCH ? AND rowid = clubs.id)")
+            else:
+                where.append("id IN (SELECT rowid FROM clubs_fts WHERE clubs_fts MATCH ?)")
+            params.append(match)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        limit = parse_int("limit", limit)
+        limit = max(1, min(QUERY_PAGE_SIZE if limit is None else limit, QUERY_MAX_PAGE_SIZE))
+        offset = max(0, parse_int("offset", offset) or 0)
+
+        with self.connection() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM clubs {clause}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT {', '.join(STORE_COLUMNS)}, postcode_district FROM clubs {clause} ORDER BY id LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        items = [{**{STORE_COLUMNS[k]: r[k] for k in STORE_COLUMNS}, "Postcode District": r["postcode_district"]}
+                 for r in rows]
+        return {"total": total, "limit": limit, "offset": offset, "items": items}
+
+    def stats(self):
+        with self.connection() as conn:
+            return {
+                "clubs": conn.execute("SELECT COUNT(*) FROM clubs").fetchone()[0],
+                "cities": conn.execute("SELECT COUNT(DISTINCT city_key) FROM clubs").fetchone()[0],
+                "sources": [dict(r) for r in conn.execute("SELECT source, byte_offset, rows, updated FROM ingest_state")],
+            }
+
+
+# ---------------- HTTP API ----------------
+SEARCH_PARAMS = ("city", "play_with", "age", "age_min", "age_max", "district", "q", "limit", "offset")
+
+
+def make_handler(store, csv_path):
+    class ClubQueryHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/clubs":
+                query = {k: v[-1] for k, v in parse_qs(url.query).items() if k in SEARCH_PARAMS}
+                start = time.perf_counter()
+                try:
+                    result = store.search(**query)
+                except (ValueError, sqlite3.OperationalError) as e:
+                    self._send(400, {"error": str(e)})
+                    return
+                result["took_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                self._send(200, result)
+            elif url.path == "/stats":
+                self._send(200, store.stats())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path == "/ingest":
+                try:
+                    added = store.ingest_csv(csv_path)
+                except Exception as e:   # unreadable / malformed CSV, locked store: JSON error, no traceback
+                    logger.error(f"[ClubStore] Ingest of {csv_path} failed: {e}")
+                    self._send(500, {"error": f"ingest failed: {e}"})
+                    return
+                self._send(200, {"added": added})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            logger.debug(f"[ClubStore] {self.address_string()} {format % args}")
+
+    return ClubQueryHandler
+
+
+def watch_ingest(store, csv_path, interval, stop):
+    while not stop.wait(interval):
+        try:
+            store.ingest_csv(csv_path)
+        except Exception as e:
+            logger.error(f"[ClubStore] Background ingest failed: {e}")
+
+
+def serve(store, csv_path=CLUBS_CSV_FILE, host=QUERY_HOST, port=QUERY_PORT, watch=0):
+    store.ingest_csv(csv_path)
+    server = ThreadingHTTPServer((host, port), make_handler(store, csv_path))
+    stop = threading.Event()
+    if watch > 0:
+        threading.Thread(target=watch_ingest, args=(store, csv_path, watch, stop), daemon=True).start()
+    logger.info(f"[ClubStore] Serving {store.path} on http://{host}:{port}/clubs")
+    print(f"Serving club queries on http://{host}:{port}/clubs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=CLUB_STORE_FILE, help="SQLite store")
+    parser.add_argument("--csv", default=CLUBS_CSV_FILE, help="crawler output CSV to ingest")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ingest", help="ingest the rows appended since the last run")
+    serve_parser = sub.add_parser("serve", help="run the local HTTP API")
+    serve_parser.add_argument("--host", default=QUERY_HOST)
+    serve_parser.add_argument("--port", type=int, default=QUERY_PORT)
+    serve_parser.add_argument("--watch", type=float, default=0, help="re-ingest the CSV every N seconds (0 = off)")
+    query_parser = sub.add_parser("query", help="one lookup, printed as JSON")
+    for name in SEARCH_PARAMS:
+        query_parser.add_argument(f"--{name.replace('_', '-')}", dest=name)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s: %(message)s")
+    store = ClubStore(args.db)
+    if args.command == "ingest":
+        added = store.ingest_csv(args.csv)
+        print(f"{added} new clubs ingested, {store.stats()['clubs']} in {args.db}")
+    elif args.command == "serve":
+        serve(store, args.csv, args.host, args.port, args.watch)
+    else:
+        query = {k: getattr(args, k) for k in SEARCH_PARAMS if getattr(args, k) is not None}
+        try:
+            result = store.search(**query)
+        except (ValueError, sqlite3.OperationalError) as e:   # same checks as GET /clubs (400 there)
+            query_parser.error(str(e))
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
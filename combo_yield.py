@@ -0,0 +1,142 @@
+"""
+combo_yield.py
+
+Yield-aware scheduling for the v3 crawler.
+
+- Yield of a combo = fraction of the ClubIds it returned that were new for its city
+  (0 when the search returned nothing); every real run appends one row per combo to storage/combo_yield.csv
+- prioritize_combos(): orders a city's pending (play_with, age) combos by expected yield, estimated from
+  the combo's own history, shrunk towards the (play_with, age) average over all cities, shrunk towards the
+  overall average. A combo without history of its own is scored with that average, so it is ranked between
+  the known good and the known poor combos rather than last; equal scores keep the default order
+- SaturationTracker: the "saturation stop" — once new-club discovery over the last SATURATION_WINDOW combos
+  falls below SATURATION_THRESHOLD, the rest of the city is skipped (not marked processed, so a later
+  run without --saturation still picks them up)
+"""
+
+import os
+import csv
+import logging
+from collections import deque
+from datetime import datetime
+
+from filelock import FileLock
+
+STORAGE_FOLDER_NAME = "storage"
+
+# ---------------- CONFIG ----------------
+YIELD_HISTORY_FILE = f"{STORAGE_FOLDER_NAME}/combo_yield.csv"
+YIELD_LOCK_FILE = os.path.join(STORAGE_FOLDER_NAME, "combo_yield.lock")
+
+YIELD_PRIOR_WEIGHT = float(os.getenv("YIELD_PRIOR_WEIGHT", 2.0))      # pseudo-observations given to the shrinkage prior
+SATURATION_THRESHOLD = float(os.getenv("SATURATION_THRESHOLD", 0.02))  # new ClubIds / returned ClubIds over the window
+SATURATION_WINDOW = int(os.getenv("SATURATION_WINDOW", 20))           # combos looked at by the saturation stop
+SATURATION_MIN_COMBOS = int(os.getenv("SATURATION_MIN_COMBOS", 40))   # never stop a city before this many combos
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "YIELD_PRIOR_WEIGHT": float,
+    "SATURATION_THRESHOLD": float,
+    "SATURATION_WINDOW": int,
+    "SATURATION_MIN_COMBOS": int,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def combo_yield(returned, new):
+    return new / returned if returned else 0.0
+
+
+def record_combo_yield(city, play_with, age, returned, new, path=YIELD_HISTORY_FILE):
+    """Append one combo's discovery result. Safe across processes."""
+    row = {
+        "Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "City": city,
+        "PlayWith": play_with,
+        "Age": age,
+        "Returned": returned,
+        "New": new,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with FileLock(YIELD_LOCK_FILE):
+        file_exists = os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=row.keys())
+            if not file_exists:
+                writer.writeheader()
+            writer.writerow(row)
+    return row
+
+
+class YieldModel:
+    """Per-combo, per-(play_with, age) and overall yield sums from storage/combo_yield.csv."""
+
+    def __init__(self, prior_weight=None):
+        self.prior_weight = YIELD_PRIOR_WEIGHT if prior_weight is None else prior_weight
+        self.by_combo = {}      # (city, play_with, age) -> [sum of yields, observations]
+        self.by_slot = {}       # (play_with, age) -> [sum of yields, observations]
+        self.total = [0.0, 0]
+
+    @classmethod
+    def load(cls, path=YIELD_HISTORY_FILE, prior_weight=None):
+        model = cls(prior_weight)
+        if not os.path.exists(path):
+            return model
+        with open(path, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                try:
+                    model.add(r["City"], int(r["PlayWith"]), int(r["Age"]), int(r["Returned"]), int(r["New"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        logger.info(f"[YieldModel] {model.total[1]} combo observations loaded from {path}")
+        return model
+
+    def add(self, city, play_with, age, returned, new):
+        y = combo_yield(returned, new)
+        for table, key in ((self.by_combo, (city, play_with, age)), (self.by_slot, (play_with, age))):
+            s = table.setdefault(key, [0.0, 0])
+            s[0] += y
+            s[1] += 1
+        self.total[0] += y
+        self.total[1] += 1
+
+    def _shrink(self, stats, prior):
+        if not stats:
+            return prior
+        return (stats[0] + self.prior_weight * prior) / (stats[1] + self.prior_weight)
+
+    def expected_yield(self, city, play_with, age):
+        """Expected fraction of new ClubIds, or None when nothing at all has been recorded yet."""
+        if not self.total[1]:
+            return None
+        overall = self.total[0] / self.total[1]
+        slot = self._shrink(self.by_slot.get((play_with, age)), overall)
+        return self._shrink(self.by_combo.get((city, play_with, age)), slot)
+
+
+def prioritize_combos(city, pending_combos, model):
+    """Sort (play_with, age) combos by expected yield, highest first; ties keep their original order."""
+    if model is None or not model.total[1]:
+        return list(pending_combos)
+    return sorted(pending_combos, key=lambda c: -model.expected_yield(city, c[0], c[1]))
+
+
+class SaturationTracker:
+    def __init__(self, threshold=None, window=None, min_combos=None):
+        window = SATURATION_WINDOW if window is None else window
+        self.threshold = SATURATION_THRESHOLD if threshold is None else threshold
+        self.min_combos = max(SATURATION_MIN_COMBOS if min_combos is None else min_combos, window)
+        self.recent = deque(maxlen=window)   # (returned, new) per processed combo
+        self.seen = 0
+
+    def observe(self, returned, new):
+        self.recent.append((returned, new))
+        self.seen += 1
+
+    def window_yield(self):
+        return combo_yield(sum(r for r, _ in self.recent), sum(n for _, n in self.recent))
+
+    def saturated(self):
+        return self.seen >= self.min_combos and self.window_yield() < self.threshold
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+coverage_planning.py
+
+- Build candidate search points from an offline gazetteer / postcode-district centroid CSV
+  (columns "name", "latitude", "longitude" by default)
+- Learn the effective search radius from the clubs returned by earlier recommendation calls
+  (one observation per location is appended to storage/search_radius.csv by club_crawling_v3.py).
+  This relies on the recommendation API reporting a per-club "Distance" (miles) in RecommendationClubCartDto;
+  the field is not part of any documented contract, so when it is missing a warning is logged and
+  DEFAULT_SEARCH_RADIUS_KM is used instead
+- Greedily choose a near-minimal set of search points so every gazetteer point is covered
+- Write the chosen points to output/england_search_points.csv (column "name"),
+  which club_crawling_v3.py can read with --input
+"""
+
+import os
+import csv
+import math
+import heapq
+import logging
+import argparse
+import statistics
+from datetime import datetime
+
+from filelock import FileLock
+
+OUTPUT_FOLDER_NAME = "output"
+STORAGE_FOLDER_NAME = "storage"
+
+# ---------------- CONFIG ----------------
+GAZETTEER_FILE = f"{OUTPUT_FOLDER_NAME}/england_gazetteer.csv"
+SEARCH_POINTS_FILE = f"{OUTPUT_FOLDER_NAME}/england_search_points.csv"
+RADIUS_OBSERVATIONS_FILE = f"{STORAGE_FOLDER_NAME}/search_radius.csv"
+RADIUS_LOCK_FILE = os.path.join(STORAGE_FOLDER_NAME, "search_radius.lock")
+
+DEFAULT_SEARCH_RADIUS_KM = float(os.getenv("DEFAULT_SEARCH_RADIUS_KM", 16.0))
+RADIUS_SAFETY_FACTOR = float(os.getenv("RADIUS_SAFETY_FACTOR", 0.8))  # shrink learned radius so edges overlap a little
+MIN_OBSERVED_CLUBS = int(os.getenv("MIN_OBSERVED_CLUBS", 5))        # ignore searches that returned too few clubs
+MILES_TO_KM = 1.609344
+EARTH_RADIUS_KM = 6371.0088
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "DEFAULT_SEARCH_RADIUS_KM": float,
+    "RADIUS_SAFETY_FACTOR": float,
+    "MIN_OBSERVED_CLUBS": int,
+}
+
+logger = logging.getLogger(__name__)
+
+_warned_no_distance = False
+
+
+# ---------------- geometry ----------------
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _grid_cell(lat, lon, cell_deg):
+    return int(math.floor(lat / cell_deg)), int(math.floor(lon / cell_deg))
+
+
+# ---------------- gazetteer ----------------
+def load_gazetteer(path=GAZETTEER_FILE, name_column="name", lat_column="latitude", lon_column="longitude"):
+    """Return list of (name, lat, lon); rows with missing/invalid coordinates are dropped, names deduped."""
+    points = []
+    seen = set()
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            name = (r.get(name_column) or "").strip()
+            try:
+                lat = float(r.get(lat_column))
+                lon = float(r.get(lon_column))
+            except (TypeError, ValueError):
+                continue
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            points.append((name, lat, lon))
+    return points
+
+
+# ---------------- radius learning ----------------
+def extract_club_distances_km(api_general_info_data):
+    """
+    Distances (km) of every club in a recommendation response that reports one (API reports miles).
+    Warns once per process when clubs come back without a "Distance" field: radius learning then has nothing to learn from.
+    """
+    global _warned_no_distance
+    distances = []
+    clubs = 0
+    for d in api_general_info_data or []:
+        for c in d.get("RecommendationClubCartDto", []) or []:
+            clubs += 1
+            raw = c.get("Distance", c.get("distance"))
+            try:
+                distances.append(float(raw) * MILES_TO_KM)
+            except (TypeError, ValueError):
+                continue
+    if clubs and not distances and not _warned_no_distance:
+        _warned_no_distance = True
+        logger.warning(f"[Coverage] recommendation response has {clubs} clubs but no 'Distance' field; "
+                       f"search radius cannot be learned, coverage_planning.py will use {DEFAULT_SEARCH_RADIUS_KM} km")
+    return distances
+
+
+def record_search_observation(location, api_general_info_data, path=RADIUS_OBSERVATIONS_FILE):
+    """
+    Append (location, club count, max/p90 distance) for one recommendation response. Safe across processes.
+    Callers record one response per location; returns None (nothing written) when the response has no distances.
+    """
+    distances = sorted(extract_club_distances_km(api_general_info_data))
+    if not distances:
+        return None
+    p90 = distances[min(len(distances) - 1, int(len(distances) * 0.9))]
+    row = {
+        "Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Location": location,
+        "Clubs": len(distances),
+        "Max Km": round(distances[-1], 3),
+        "P90 Km": round(p90, 3),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with FileLock(RADIUS_LOCK_FILE):
+        file_exists = os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=row.keys())
+            if not file_exists:
+                writer.writeheader()
+            writer.writerow(row)
+    return row
+
+
+def learn_search_radius_km(path=RADIUS_OBSERVATIONS_FILE, default=None, safety_factor=None, min_clubs=None):
+    """
+    Effective radius = median over searches of the p90 club distance, shrunk by safety_factor.
+    Searches returning fewer than min_clubs clubs are ignored (rural searches are capped by club count, not radius).
+    Only the latest observation of each location counts, so locations crawled many times do not dominate.
+    """
+    default = DEFAULT_SEARCH_RADIUS_KM if default is None else default
+    safety_factor = RADIUS_SAFETY_FACTOR if safety_factor is None else safety_factor
+    min_clubs = MIN_OBSERVED_CLUBS if min_clubs is None else min_clubs
+    radii = {}
+    if os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                try:
+                    if int(r["Clubs"]) >= min_clubs:
+                        radii[r.get("Location", "")] = float(r["P90 Km"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+    if not radii:
+        logger.warning(f"[Coverage] no usable search radius observations in {path}; using the default {default} km")
+        return default
+    return statistics.median(radii.values()) * safety_factor
+
+
+# ---------------- set cover ----------------
+def build_coverage(points, radius_km):
+    """For each point index, the set of point indexes within radius_km (grid-bucketed neighbour search)."""
+    cell_deg = max(radius_km / 111.0, 1e-6)  # 1 degree latitude ~ 111 km; longitude cells are narrower, so scan wider
+    grid = {}
+    for i, (_, lat, lon) in enumerate(points):
+        grid.setdefault(_grid_cell(lat, lon, cell_deg), []).append(i)
+
+    coverage = []
+    for i, (_, lat, lon) in enumerate(points):
+        ci, cj = _grid_cell(lat, lon, cell_deg)
+        lon_span = int(math.ceil(1 / max(math.cos(math.radians(lat)), 0.1)))
+        covered = set()
+        for di in (-1, 0, 1):
+            for dj in range(-lon_span, lon_span + 1):
+                for j in grid.get((ci + di, cj + dj), ()):
+                    _, lat2, lon2 = points[j]
+                    if haversine_km(lat, lon, lat2, lon2) <= radius_km:
+                        covered.add(j)
+        coverage.append(covered)
+    return coverage
+
+
+def plan_search_points(points, radius_km):
+    """
+    Greedy set cover (lazy heap): repeatedly take the point whose radius covers the most uncovered points.
+    Returns the chosen points in pick order (largest coverage first).
+    """
+    coverage = build_coverage(points, radius_km)
+    uncovered = set(range(len(points)))
+    heap = [(-len(c), i) for i, c in enumerate(coverage)]
+    heapq.heapify(heap)
+    chosen = []
+
+    while uncovered and heap:
+        neg_gain, i = heapq.heappop(heap)
+        gain = len(coverage[i] & uncovered)
+        if gain == 0:
+            continue
+        if gain < -neg_gain:
+            # stale entry — push back with updated gain
+            heapq.heappush(heap, (-gain, i))
+            continue
+        chosen.append(points[i])
+        uncovered -= coverage[i]
+
+    return chosen
+
+
+def save_search_points(chosen, path=SEARCH_POINTS_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "latitude", "longitude"])
+        for name, lat, lon in chosen:
+            writer.writerow([name, lat, lon])
+
+
+def main(gazetteer=GAZETTEER_FILE, output=SEARCH_POINTS_FILE, radius_km=None,
+         name_column="name", lat_column="latitude", lon_column="longitude"):
+    points = load_gazetteer(gazetteer, name_column, lat_column, lon_column)
+    if not points:
+        print(f"No usable points in {gazetteer}.")
+        return []
+
+    if radius_km is None:
+        radius_km = learn_search_radius_km()
+    chosen = plan_search_points(points, radius_km)
+    save_search_points(chosen, output)
+
+    msg = (f"Coverage plan: {len(chosen)} search points cover {len(points)} gazetteer points "
+           f"(radius {radius_km:.1f} km) -> {output}")
+    print(msg)
+    logger.info(msg)
+    return chosen
+
+
+if __name__ == "__main__":
+    from club_crawling_v3 import load_config
+    globals().update({k: v for k, v in load_config().items() if k in ENV_CONFIG})  # .env settings
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gazetteer", default=GAZETTEER_FILE, help="offline gazetteer / postcode-district centroid CSV")
+    parser.add_argument("--output", default=SEARCH_POINTS_FILE, help="where to write the chosen search points")
+    parser.add_argument("--radius-km", type=float, default=None, help="override the learned search radius")
+    parser.add_argument("--name-column", default="name")
+    parser.add_argument("--lat-column", default="latitude")
+    parser.add_argument("--lon-column", default="longitude")
+    args = parser.parse_args()
+    main(args.gazetteer, args.output, args.radius_km, args.name_column, args.lat_column, args.lon_column)
@@ -0,0 +1,200 @@
+"""
+crawl_profiler.py
+
+Low-overhead profiling for club_crawling_v3.py --profile.
+
+- StackSampler: background thread sampling every thread's stack every PROFILE_INTERVAL_MS
+  (no tracing hooks, so coroutine-heavy code is not slowed down). Each folded stack starts with its thread name,
+  so run_in_executor work (recommendation JSON decode) and the persistence writer's CSV I/O get their own roots;
+  idle time shows up as selector / queue-wait frames
+- stage(name): wall + CPU timing of crawl stages (recommendation, detail, contact, parse, write);
+  CPU time is exact for synchronous stages, for stages spanning awaits it also includes interleaved tasks
+- timed(name, fn): fn wrapped in stage(name), for work handed to another thread (the persistence writer)
+- Each worker process writes its own files; the parent merges them into a flamegraph-compatible
+  folded-stack file (flamegraph.pl / speedscope / inferno) plus a per-stage summary CSV under logs/profile/
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import glob
+import time
+import logging
+import functools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# ---------------- CONFIG ----------------
+PROFILE_FOLDER_NAME = os.path.join("logs", "profile")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "PROFILE_INTERVAL_MS": float,
+}
+
+logger = logging.getLogger(__name__)
+
+_profiler = None  # active WorkerProfiler in this process, None when profiling is off
+
+
+def _thread_label(name):
+    # pool threads are numbered ("ThreadPoolExecutor-0_3", "persistence_0"): fold them into one root per pool
+    return re.sub(r"_\d+$", "", name).replace(";", "_").replace(" ", "_")
+
+
+class StackSampler:
+    def __init__(self, interval_ms=None):
+        self.interval = (PROFILE_INTERVAL_MS if interval_ms is None else interval_ms) / 1000.0
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(_thread_label(names.get(thread_id, f"thread-{thread_id}")))
+                self.counts[";".join(reversed(stack))] += 1
+
+
+class WorkerProfiler:
+    def __init__(self, output_dir, tag, interval_ms=None):
+        self.output_dir = output_dir
+        self.tag = re.sub(r"[^\w.-]+", "_", str(tag))
+        self.stages = {}
+        self._lock = threading.Lock()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.sampler = StackSampler(interval_ms)
+
+    def record(self, name, wall, cpu):
+        with self._lock:
+            self._record(name, wall, cpu)
+
+    def _record(self, name, wall, cpu):
+        s = self.stages.setdefault(name, {"count": 0, "wall": 0.0, "cpu": 0.0, "max_wall": 0.0})
+        s["count"] += 1
+        s["wall"] += wall
+        s["cpu"] += cpu
+        s["max_wall"] = max(s["max_wall"], wall)
+
+    def dump(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{self.tag}_{os.getpid()}")
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in self.sampler.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + ".stages.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "pid": os.getpid(),
+                "tag": self.tag,
+                "wall": time.perf_counter() - self.start_wall,
+                "cpu": time.process_time() - self.start_cpu,
+                "samples": sum(self.sampler.counts.values()),
+                "stages": self.stages,
+            }, f, indent=2)
+        return base
+
+
+def start(output_dir, tag, interval_ms=None):
+    """Start profiling this process (every thread is sampled; stage() timings may come from any thread)."""
+    global _profiler
+    _profiler = WorkerProfiler(output_dir, tag, interval_ms)
+    _profiler.sampler.start()
+    return _profiler
+
+
+def stop():
+    """Stop sampling and write this process's .folded / .stages.json files."""
+    global _profiler
+    if _profiler is None:
+        return None
+    profiler, _profiler = _profiler, None
+    profiler.sampler.stop()
+    base = profiler.dump()
+    logger.info(f"[Profiler] wrote {base}.folded / .stages.json")
+    return base
+
+
+@contextmanager
+def stage(name):
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    wall0 = time.perf_counter()
+    cpu0 = time.thread_time()
+    try:
+        yield
+    finally:
+        profiler.record(name, time.perf_counter() - wall0, time.thread_time() - cpu0)
+
+
+def timed(name, fn):
+    """fn wrapped in stage(name); the timing is taken in whichever thread ends up calling it."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with stage(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def merge_profiles(output_dir):
+    """Merge every per-process profile in output_dir into merged.folded and stages_summary.csv."""
+    merged = Counter()
+    for path in glob.glob(os.path.join(output_dir, "*.folded")):
+        if os.path.basename(path) == "merged.folded":
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    merged[stack] += int(count)
+
+    totals = {}
+    for path in glob.glob(os.path.join(output_dir, "*.stages.json")):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for name, s in data.get("stages", {}).items():
+            t = totals.setdefault(name, {"count": 0, "wall": 0.0, "cpu": 0.0, "max_wall": 0.0})
+            t["count"] += s["count"]
+            t["wall"] += s["wall"]
+            t["cpu"] += s["cpu"]
+            t["max_wall"] = max(t["max_wall"], s["max_wall"])
+
+    os.makedirs(output_dir, exist_ok=True)
+    merged_path = os.path.join(output_dir, "merged.folded")
+    with open(merged_path, "w", encoding="utf-8") as f:
+        for stack, count in merged.most_common():
+            f.write(f"{stack} {count}\n")
+
+    summary_path = os.path.join(output_dir, "stages_summary.csv")
+    with open(summary_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Stage", "Count", "Wall (s)", "CPU (s)", "Avg Wall (ms)", "Max Wall (ms)"])
+        for name, t in sorted(totals.items(), key=lambda kv: kv[1]["wall"], reverse=True):
+            avg = t["wall"] / t["count"] * 1000 if t["count"] else 0.0
+            writer.writerow([name, t["count"], f"{t['wall']:.3f}", f"{t['cpu']:.3f}", f"{avg:.1f}", f"{t['max_wall'] * 1000:.1f}"])
+
+    logger.info(f"[Profiler] merged {sum(merged.values())} samples -> {merged_path}, stage summary -> {summary_path}")
+    return merged_path, summary_path
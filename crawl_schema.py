@@ -0,0 +1,79 @@
+"""
+crawl_schema.py
+
+Combo model and output schema shared by every engine (v3 API, Selenium network capture, hybrid_crawl.py).
+"""
+
+from collections import namedtuple
+
+PLAY_WITH_VALUES = (4, 5)   # 4 means Male, 5 means Female
+AGES = range(5, 100)        # 5..99 inclusive
+
+# Unified output columns (the v3 / hybrid CSV)
+CLUB_COLUMNS = [
+    "City", "PlayWith", "Age", "Club Name", "Club Address", "Accredited To", "Football Types",
+    "Team Numbers", "Contact Name", "Contact Phone", "Contact Email", "Contact Website",
+]
+
+# Legacy v1/v2 CSV columns and how they map onto the unified ones
+SELENIUM_CLUB_COLUMNS = [
+    "Club Name", "Address", "Accredited To", "Football Types", "Team Numbers",
+    "Contact Name", "Email", "Telephone Number", "Website",
+]
+SELENIUM_TO_CLUB_COLUMNS = {
+    "Club Name": "Club Name",
+    "Address": "Club Address",
+    "Accredited To": "Accredited To",
+    "Football Types": "Football Types",
+    "Team Numbers": "Team Numbers",
+    "Contact Name": "Contact Name",
+    "Email": "Contact Email",
+    "Telephone Number": "Contact Phone",
+    "Website": "Contact Website",
+}
+
+
+class Combo(namedtuple("Combo", ["city", "play_with", "age"])):
+    __slots__ = ()
+
+    @property
+    def key(self):
+        return combo_key(self.city, self.play_with, self.age)
+
+
+def combo_key(city, play_with, age):
+    return f"{city}__{play_with}__{age}"
+
+
+def play_with_label(play_with):
+    return "Male" if play_with == 4 else "Female"
+
+
+def build_club_row(city, play_with, age, data, contact_data):
+    """Map the club detail JSON (+ contact JSON) returned by the API onto CLUB_COLUMNS."""
+    teams_info = data.get("TeamsInfo", {}) or {}
+    football_types_list = []
+    football_types_list.extend(teams_info.get("FootballType", []) or [])
+    football_types_list.extend(teams_info.get("Gender", []) or [])
+    football_types_list.extend(teams_info.get("DisabilityType", []) or [])
+    contact_data = contact_data or {}
+
+    return {
+        "City": city,
+        "PlayWith": play_with,
+        "Age": age,
+        "Club Name": (data.get("ClubName", "") or "").strip(),
+        "Club Address": ", ".join(filter(None, [data.get("AddressLine1", ""), data.get("City", ""), data.get("PostCode", "")])),
+        "Accredited To": data.get("ClubCounty", "") or "",
+        "Football Types": ", ".join(filter(None, football_types_list)),
+        "Team Numbers": data.get("TeamsCount", 0) or 0,
+        "Contact Name": contact_data.get("individualName", "") or "",
+        "Contact Phone": contact_data.get("phone", "") or "",
+        "Contact Email": contact_data.get("email", "") or "",
+        "Contact Website": contact_data.get("website", "") or "",
+    }
+
+
+def to_selenium_row(row):
+    """Unified row -> legacy v1/v2 columns."""
+    return {old: row.get(new, "") for old, new in SELENIUM_TO_CLUB_COLUMNS.items()}
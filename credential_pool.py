@@ -0,0 +1,297 @@
+"""
+credential_pool.py
+
+Spreads v3 API traffic over every subscription key (and optional egress address / proxy) we hold.
+
+- Keys come from the existing env vars, comma-separated:
+  KEY_CLUB_INFO_AND_RECOMMENDATION_INFO=key1,key2  /  KEY_CLUB_CONTACT_INFO=key1,key2
+- API_EGRESS lists where requests leave from: "direct", a proxy URL ("http://10.0.0.5:3128") or a local
+  source address ("local:192.168.1.20"); default "direct"
+- Every key and every egress has its own token bucket (KEY_RATE_PER_SEC / EGRESS_RATE_PER_SEC, split across
+  worker processes) and health state; acquire() hands out the (key, egress) route with the most headroom
+- 429 ejects a key for Retry-After (or KEY_EJECT_SECONDS), 401/403 for KEY_AUTH_EJECT_SECONDS
+- Only connection / proxy errors count against an egress (timeouts are the server being slow, not the route);
+  EGRESS_FAILURES in a row eject it for EGRESS_EJECT_SECONDS, except the last healthy egress, which only backs off
+  (1, 2, 4 ... up to EGRESS_BACKOFF_MAX_SECONDS)
+- A pool built with max_wait raises CredentialsUnavailableError instead of waiting longer than that for a route
+  (hybrid_crawl.py: a revoked single key sends the combo to the browser tier instead of stalling for minutes)
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+# ---------------- CONFIG ----------------
+API_EGRESS = os.getenv("API_EGRESS", "direct")
+KEY_RATE_PER_SEC = float(os.getenv("KEY_RATE_PER_SEC", 0))       # per key, all processes together; 0 = no local cap
+KEY_BURST = float(os.getenv("KEY_BURST", 20))
+EGRESS_RATE_PER_SEC = float(os.getenv("EGRESS_RATE_PER_SEC", 0))  # per egress, all processes together; 0 = no local cap
+EGRESS_BURST = float(os.getenv("EGRESS_BURST", 50))
+KEY_EJECT_SECONDS = float(os.getenv("KEY_EJECT_SECONDS", 60))
+KEY_AUTH_EJECT_SECONDS = float(os.getenv("KEY_AUTH_EJECT_SECONDS", 600))
+EGRESS_FAILURES = int(os.getenv("EGRESS_FAILURES", 3))
+EGRESS_EJECT_SECONDS = float(os.getenv("EGRESS_EJECT_SECONDS", 120))
+EGRESS_BACKOFF_MAX_SECONDS = float(os.getenv("EGRESS_BACKOFF_MAX_SECONDS", 30))
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "API_EGRESS": str,
+    "KEY_RATE_PER_SEC": float,
+    "KEY_BURST": float,
+    "EGRESS_RATE_PER_SEC": float,
+    "EGRESS_BURST": float,
+    "KEY_EJECT_SECONDS": float,
+    "KEY_AUTH_EJECT_SECONDS": float,
+    "EGRESS_FAILURES": int,
+    "EGRESS_EJECT_SECONDS": float,
+    "EGRESS_BACKOFF_MAX_SECONDS": float,
+}
+
+logger = logging.getLogger(__name__)
+
+
+class CredentialsUnavailableError(Exception):
+    """No (key, egress) route will be usable within the pool's max_wait."""
+    def __init__(self, pool, seconds):
+        super().__init__(f"{pool}: no usable key/egress for the next {seconds:.0f}s")
+        self.pool = pool
+        self.seconds = seconds
+
+
+def is_egress_fault(error):
+    """Transport errors that say something about the route itself (as opposed to a slow server)."""
+    import httpx
+    return isinstance(error, (httpx.ConnectError, httpx.ProxyError))
+
+
+def split_list(value):
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate            # tokens per second; 0 disables the bucket
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def headroom(self, now):
+        """Fraction of the bucket that is available (1.0 when the bucket is disabled)."""
+        if self.rate <= 0:
+            return 1.0
+        self._refill(now)
+        return self.tokens / self.capacity
+
+    def wait_time(self, now):
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+
+
+class Credential:
+    """One subscription key or one egress: token bucket + health."""
+
+    def __init__(self, name, value, rate, burst):
+        self.name = name
+        self.value = value
+        self.bucket = TokenBucket(rate, burst)
+        self.ejected_until = 0.0
+        self.failures = 0
+        self.backoffs = 0   # consecutive backoffs instead of an ejection (last healthy egress)
+        self.in_flight = 0
+        self.requests = 0
+        self.rejected = 0
+
+    def healthy(self, now):
+        return now >= self.ejected_until
+
+    def eject(self, seconds, reason):
+        until = time.monotonic() + seconds
+        if until > self.ejected_until:
+            self.ejected_until = until
+            logger.warning(f"[CredentialPool] {self.name} ejected for {seconds:.0f}s ({reason})")
+
+
+class Egress(Credential):
+    def __init__(self, spec, rate=None, burst=None):
+        super().__init__(f"egress:{spec}", spec, EGRESS_RATE_PER_SEC if rate is None else rate,
+                         EGRESS_BURST if burst is None else burst)
+        self.proxy = spec if "://" in spec else None
+        self.local_address = spec.split(":", 1)[1] if spec.startswith("local:") else None
+
+    def transport_kwargs(self):
+        """kwargs for httpx.HTTPTransport / AsyncHTTPTransport."""
+        kwargs = {}
+        if self.proxy:
+            kwargs["proxy"] = self.proxy
+        if self.local_address:
+            kwargs["local_address"] = self.local_address
+        return kwargs
+
+
+def build_egresses(specs=None, share=1.0):
+    specs = split_list(specs if specs is not None else API_EGRESS) or ["direct"]
+    return [Egress(spec, EGRESS_RATE_PER_SEC * share, EGRESS_BURST) for spec in specs]
+
+
+class Route:
+    __slots__ = ("key", "egress", "started")
+
+    def __init__(self, key, egress):
+        self.key = key
+        self.egress = egress
+        self.started = time.monotonic()
+
+
+class CredentialPool:
+    def __init__(self, name, keys, egresses, share=1.0, rate=None, burst=None, max_wait=None):
+        """
+        share: this process's fraction of every bucket (1 / number of worker processes).
+        max_wait: seconds acquire() may wait for an ejected key/egress before raising CredentialsUnavailableError
+        (None: wait as long as it takes).
+        """
+        self.max_wait = max_wait
+        rate = KEY_RATE_PER_SEC if rate is None else rate
+        burst = KEY_BURST if burst is None else burst
+        self.name = name
+        keys = list(dict.fromkeys(keys)) or [None]
+        self.keys = [Credential(f"{name}:{k[:4] + '…' if k else 'no-key'}", k, rate * share, burst) for k in keys]
+        self.egresses = egresses
+
+    def __len__(self):
+        return len(self.keys) * len(self.egresses)
+
+    def _pick(self, now):
+        best, best_score = None, None
+        for key in self.keys:
+            if not key.healthy(now):
+                continue
+            for egress in self.egresses:
+                if not egress.healthy(now):
+                    continue
+                wait = max(key.bucket.wait_time(now), egress.bucket.wait_time(now))
+                headroom = min(key.bucket.headroom(now), egress.bucket.headroom(now))
+                # uncapped buckets tie on headroom: fall back to least busy, then least used
+                score = (wait, -headroom, key.in_flight + egress.in_flight, key.requests + egress.requests)
+                if best_score is None or score < best_score:
+                    best, best_score = (key, egress), score
+        return best, best_score
+
+    async def acquire(self):
+        """Wait for and reserve the (key, egress) route with the most headroom. Always report() it afterwards."""
+        while True:
+            now = time.monotonic()
+            best, score = self._pick(now)
+            if best is None:
+                resume = max(min((c.ejected_until for c in self.keys), default=now),
+                             min((c.ejected_until for c in self.egresses), default=now))
+                if self.max_wait is not None and resume - now > self.max_wait:
+                    raise CredentialsUnavailableError(self.name, resume - now)
+                logger.warning(f"[CredentialPool:{self.name}] every key/egress is ejected, waiting {resume - now:.0f}s")
+                await asyncio.sleep(max(resume - now, 0.05))
+                continue
+            if score[0] > 0:
+                await asyncio.sleep(score[0])
+                continue
+            key, egress = best
+            for c in best:
+                c.bucket.take()
+                c.in_flight += 1
+                c.requests += 1
+            return Route(key, egress)
+
+    def report(self, route, status=None, retry_after=None):
+        """
+        status: HTTP status of the response, None for an egress fault (is_egress_fault(): connection refused,
+        proxy down). Timeouts and other transport errors are not the route's fault: release() those.
+        """
+        key, egress = route.key, route.egress
+        self.release(route)
+        if status is None:
+            egress.failures += 1
+            if egress.failures >= EGRESS_FAILURES:
+                now = time.monotonic()
+                if any(e is not egress and e.healthy(now) for e in self.egresses):
+                    egress.eject(EGRESS_EJECT_SECONDS, f"{egress.failures} connection errors")
+                else:
+                    # never take the last usable egress out for minutes: back off briefly and try it again
+                    egress.eject(min(EGRESS_BACKOFF_MAX_SECONDS, 2 ** egress.backoffs),
+                                 f"{egress.failures} connection errors, last healthy egress backing off")
+                    egress.backoffs += 1
+                egress.failures = 0
+            return
+        egress.failures = 0
+        egress.backoffs = 0
+        if status == 429:
+            key.rejected += 1
+            try:
+                seconds = float(retry_after)
+            except (TypeError, ValueError):
+                seconds = KEY_EJECT_SECONDS
+            key.eject(seconds, "429 quota exceeded")
+        elif status in (401, 403):
+            key.rejected += 1
+            key.eject(KEY_AUTH_EJECT_SECONDS, f"{status} rejected")
+
+    def release(self, route):
+        """Give a route back without judging it (request cancelled or failed for reasons of our own)."""
+        route.key.in_flight -= 1
+        route.egress.in_flight -= 1
+
+    async def send(self, clients, method, url, key_header, headers=None, **kwargs):
+        """One request over the best route; the key goes into key_header and the outcome is reported back."""
+        import httpx
+        route = await self.acquire()
+        headers = {**(headers or {}), key_header: route.key.value or ""}
+        try:
+            resp = await clients.get(route.egress).request(method, url, headers=headers, **kwargs)
+        except (httpx.ConnectError, httpx.ProxyError):
+            self.report(route)
+            raise
+        except BaseException:
+            self.release(route)
+            raise
+        self.report(route, resp.status_code, resp.headers.get("Retry-After"))
+        return resp
+
+    def summary(self):
+        return {c.name: {"requests": c.requests, "rejected": c.rejected} for c in self.keys + self.egresses}
+
+
+class EgressClients:
+    """One httpx.AsyncClient per egress, opened lazily for the lifetime of an `async with` block."""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._clients = {}
+
+    def get(self, egress):
+        import httpx
+        client = self._clients.get(egress.name)
+        if client is None:
+            transport = httpx.AsyncHTTPTransport(http2=True, **egress.transport_kwargs())
+            client = self._clients[egress.name] = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+        return client
+
+    async def __aenter__(self):
+        return self
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+hybrid_crawl.py
+
+Tiered crawl with a single output schema (crawl_schema.CLUB_COLUMNS -> output/clubs_data.csv):
+
+- Every (city, play_with, age) combo goes to the v3 API engine first (HYBRID_API_RETRIES per request)
+- Each endpoint (recommendation / club / contact) has a circuit breaker; when keys are rotated/revoked
+  or the recommendation / club endpoint keeps rejecting us, the breaker opens and combos are routed to a small
+  headless browser pool in network-capture mode (the site's own session) until the API recovers.
+  A combo waits for a free browser before it is committed to that tier and goes back to the API when the
+  breakers half-opened meanwhile, so an outage only moves the combos crawled during it
+- The contact lookup is optional: while its breaker is open, API combos are saved without contact details
+- Combos whose API run lost club details are retried on the browser path as well
+- Resume via the same output CSV / processed_combos.pkl as club_crawling_v3.py
+- --dry-run to simulate (no external calls)
+"""
+
+import os
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import club_crawling_v3 as api
+from crawl_schema import Combo, CLUB_COLUMNS
+from row_sink import CsvRowSink
+from async_persistence import AsyncPersistence
+from loop_monitor import LoopLagMonitor
+from club_name_index import ClubNameIndex, build_club_name_index
+from combo_yield import YieldModel, prioritize_combos
+
+# ---------------- CONFIG ----------------
+HYBRID_API_RETRIES = int(os.getenv("HYBRID_API_RETRIES", 3))      # per-request retries before the browser tier takes over
+HYBRID_API_COMBOS = int(os.getenv("HYBRID_API_COMBOS", 4))        # combos in flight on the API tier
+HYBRID_BROWSERS = int(os.getenv("HYBRID_BROWSERS", 2))            # browser pool size for the fallback tier
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 3))          # consecutive failures before an endpoint is cut off
+BREAKER_COOLDOWN = int(os.getenv("BREAKER_COOLDOWN", 300))        # seconds before probing the API again
+HYBRID_KEY_MAX_WAIT = float(os.getenv("HYBRID_KEY_MAX_WAIT", 30))  # longest wait for an ejected key before the endpoint counts as down
+ENDPOINTS = ("recommendation", "club", "contact")
+API_TIER_ENDPOINTS = ("recommendation", "club")   # contact is optional: its breaker never sends a combo to the browser
+# ----------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointBreaker:
+    def __init__(self, name, failure_threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    def ready(self):
+        """Closed, or open long enough for a probe; unlike allow() it does not take the probe."""
+        return self.opened_at is None or time.time() - self.opened_at >= self.cooldown
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if time.time() - self.opened_at >= self.cooldown:
+            # half-open: let one probe through, next probe after another cooldown
+            self.opened_at = time.time()
+            return True
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"[Breaker:{self.name}] API recovered, routing back to the API tier")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold and self.opened_at is None:
+            self.opened_at = time.time()
+            logger.warning(f"[Breaker:{self.name}] {self.failures} consecutive failures, falling back to browser tier")
+
+
+class HybridContext:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.breakers = {name: EndpointBreaker(name) for name in ENDPOINTS}
+        self.existing_club_names = ClubNameIndex()
+        self.club_cache = api.safe_load_pickle(api.CACHE_FILE, {}) or {}
+        self.processed_combos = api.safe_load_pickle(api.PROCESSED_FILE, set()) or set()
+        self.processed_clubs_local = {}
+        self.stats = {"success":0,"failed":0,"errors":0,"http_errors":0,"other_errors":0,"contact_errors":0,
+                      "rate_limited":0,"skipped_name":0,"skipped_cache":0,"no_name":0}
+        self.tier_counts = {"api": 0, "browser": 0, "failed": 0}
+        self.failed_cities = set()
+        self.sink = CsvRowSink(api.CSV_FILE, CLUB_COLUMNS, key_columns=("City", "Club Name"))
+        self.api_slots = asyncio.Semaphore(HYBRID_API_COMBOS)
+        self.browser_slots = asyncio.Semaphore(HYBRID_BROWSERS)   # taken before a combo is committed to a browser
+        self.browser_executor = ThreadPoolExecutor(max_workers=HYBRID_BROWSERS)
+        self.pool = None
+        self.persistence = AsyncPersistence()
+        self.existing_club_names.submit = self.persistence.submit
+        api.get_credentials(share=1.0, max_wait=HYBRID_KEY_MAX_WAIT)  # single process: every key's full rate
+        self.unsaved_combos = 0
+
+    def api_allowed(self):
+        return all(self.breakers[name].allow() for name in API_TIER_ENDPOINTS)
+
+    def api_ready(self):
+        return all(self.breakers[name].ready() for name in API_TIER_ENDPOINTS)
+
+    def get_pool(self):
+        # Selenium is only needed once something actually degrades
+        if self.pool is None:
+            from browser_pool import BrowserPool
+            self.pool = BrowserPool(size=HYBRID_BROWSERS, capture_network=True)
+        return self.pool
+
+
+# ---------------- tiers ----------------
+async def run_api_combo(ctx, combo):
+    """Returns (rows, needs_fallback) or None when the API tier could not serve this combo."""
+    failed_before = ctx.stats["failed"]
+    contact_before = ctx.stats["contact_errors"]
+    fetch_contacts = ctx.breakers["contact"].allow()
+    if not fetch_contacts:
+        logger.info(f"[API] {combo.key}: contact endpoint down, saving clubs without contact details")
+    try:
+        rows = await api.process_combo_async(
+            combo.city, combo.play_with, combo.age,
+            ctx.existing_club_names, ctx.club_cache, ctx.processed_clubs_local, ctx.stats,
+            dry_run=ctx.dry_run, fetch_contacts=fetch_contacts,
+        )
+    except api.ApiUnavailableError as e:
+        ctx.breakers[e.endpoint].record_failure()
+        logger.warning(f"[API] {combo.key} unavailable: {e}")
+        return None
+    except Exception as e:
+        ctx.breakers["recommendation"].record_failure()
+        logger.warning(f"[API] {combo.key} failed: {e}", exc_info=True)
+        return None
+
+    ctx.breakers["recommendation"].record_success()
+    club_failures = ctx.stats["failed"] - failed_before
+    if club_failures:
+        ctx.breakers["club"].record_failure()
+    else:
+        ctx.breakers["club"].record_success()
+    if fetch_contacts:
+        if ctx.stats["contact_errors"] > contact_before:
+            ctx.breakers["contact"].record_failure()
+        else:
+            ctx.breakers["contact"].record_success()
+    return rows, club_failures > 0
+
+
+def run_browser_combo(ctx, combo):
+    from browser_pool import button_click_to_searching
+    from network_capture import reset_network_log, capture_search_results
+
+    with ctx.get_pool().driver() as (driver, pooled):
+        reset_network_log(driver)
+        if not button_click_to_searching(driver, combo.age, combo.city, pooled, play_with=combo.play_with):
+            return []
+        return capture_search_results(driver, combo.city, combo.play_with, combo.age)
+
+
+async def save_rows(ctx, rows):
+    if not rows:
+        return 0
+    await ctx.persistence.run(ctx.existing_club_names.add_many, [(r["City"], r["Club Name"]) for r in rows])
+    added = await ctx.persistence.run(ctx.sink.add_many, rows)
+    await ctx.persistence.run(ctx.sink.flush)
+    return added
+
+
+def mark_done(ctx, combo):
+    ctx.processed_combos.add(combo.key)
+    ctx.unsaved_combos += 1
+    if ctx.unsaved_combos >= 20:
+        ctx.persistence.checkpoint(api.PROCESSED_FILE, set(ctx.processed_combos), api.atomic_pickle_dump)
+        ctx.unsaved_combos = 0
+
+
+async def crawl_combo(ctx, combo):
+    if combo.key in ctx.processed_combos:
+        return
+    api_failed = False   # the API tier ran this combo and could not serve it: only the browser is left
+    while True:
+        if not api_failed:
+            async with ctx.api_slots:
+                if ctx.api_allowed():
+                    result = await run_api_combo(ctx, combo)
+                    if result is not None:
+                        rows, needs_fallback = result
+                        await save_rows(ctx, rows)
+                        if not needs_fallback or ctx.dry_run:
+                            ctx.tier_counts["api"] += 1
+                            mark_done(ctx, combo)
+                            return
+                    api_failed = True
+
+        async with ctx.browser_slots:
+            # the wait for a browser can outlast the outage: back to the API once its breakers half-opened
+            if not api_failed and ctx.api_ready():
+                continue
+            loop = asyncio.get_running_loop()
+            try:
+                rows = await loop.run_in_executor(ctx.browser_executor, run_browser_combo, ctx, combo)
+            except Exception as e:
+                logger.error(f"[Browser] {combo.key} failed: {e}", exc_info=True)
+                ctx.tier_counts["failed"] += 1
+                ctx.failed_cities.add(combo.city)
+                return
+        added = await save_rows(ctx, rows)
+        ctx.stats["success"] += added
+        ctx.tier_counts["browser"] += 1
+        mark_done(ctx, combo)
+        return
+
+
+# ---------------- main ----------------
+async def main_async(combos, ctx):
+    await asyncio.gather(*(crawl_combo(ctx, combo) for combo in combos))
+
+
+def main(dry_run=False, input_file=api.INPUT_FILE):
+    config = api.load_config()
+    # after .env / the environment: a failing API request must give up quickly so the combo can fall back
+    config["TOTAL_RETRIES"] = HYBRID_API_RETRIES
+    api.apply_config(config)
+    api.setup_runtime()
+    cities = api.load_cities(input_file, api.CITY_COLUMN)
+    _, combos_from_csv = api.load_existing_output_info(api.CSV_FILE)
+    processed_from_pickle = api.safe_load_pickle(api.PROCESSED_FILE, set()) or set()
+    existing_combo_set = set().union(combos_from_csv, processed_from_pickle)
+    build_club_name_index(api.CSV_FILE)
+
+    yield_model = YieldModel.load()
+    combos = [Combo(city, play_with, age)
+              for city in cities
+              for (play_with, age) in prioritize_combos(
+                  city, api.build_pending_combos_for_city(city, existing_combo_set), yield_model)]
+    if not combos:
+        print("No pending combos — everything is complete.")
+        return
+
+    start_time = time.time()
+    start_dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    logger.info(f"🚀 Hybrid crawl started at {start_dt}: {len(combos)} combos")
+
+    ctx = None
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    lag_monitor = LoopLagMonitor(loop, name="hybrid").start()
+    try:
+        ctx = HybridContext(dry_run)
+        loop.run_until_complete(main_async(combos, ctx))
+    finally:
+        lag_monitor.stop()
+        if ctx is not None:
+            ctx.persistence.checkpoint(api.PROCESSED_FILE, set(ctx.processed_combos), api.atomic_pickle_dump)
+            ctx.persistence.checkpoint(api.CACHE_FILE, dict(ctx.club_cache), api.atomic_pickle_dump)
+            ctx.persistence.close()
+            ctx.sink.close()
+            ctx.browser_executor.shutdown(wait=True)
+            if ctx.pool is not None:
+                ctx.pool.close()
+        loop.close()
+
+    elapsed = time.time() - start_time
+    overall_stats = {
+        "total_fetched": ctx.stats["success"],
+        "saved": ctx.sink.written,
+        "skipped_name": ctx.stats["skipped_name"],
+        "skipped_other": ctx.stats["skipped_cache"] + ctx.stats["no_name"] + ctx.stats["other_errors"],
+    }
+    logger.info(f"[HYBRID TIERS] API: {ctx.tier_counts['api']}, Browser: {ctx.tier_counts['browser']}, "
+                f"Failed: {ctx.tier_counts['failed']}, loop lag: {lag_monitor.summary()}")
+    api.save_summary_csv(cities, overall_stats, sorted(ctx.failed_cities), start_dt, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="simulate requests (no real API calls)")
+    parser.add_argument("--input", default=api.INPUT_FILE, help="locations CSV (column 'name')")
+    args = parser.parse_args()
+    main(dry_run=args.dry_run, input_file=args.input)
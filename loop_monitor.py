@@ -0,0 +1,102 @@
+"""
+loop_monitor.py
+
+Event-loop lag watchdog for the crawl workers.
+
+- A heartbeat callback is scheduled on the loop every LOOP_LAG_INTERVAL_MS; a late heartbeat means
+  something blocked the loop (and every in-flight request of that process)
+- A watchdog thread notices a missing heartbeat while the stall is still happening and logs the
+  loop thread's current stack, i.e. the code that is blocking
+- summary() returns stall count / max / total lag for the worker's result and the run logs
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import traceback
+
+# ---------------- CONFIG ----------------
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", 100))
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", 50))
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "LOOP_LAG_THRESHOLD_MS": float,
+    "LOOP_LAG_INTERVAL_MS": float,
+}
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(self, loop, name="", threshold_ms=None, interval_ms=None):
+        self.loop = loop
+        self.name = name
+        self.threshold = (LOOP_LAG_THRESHOLD_MS if threshold_ms is None else threshold_ms) / 1000.0
+        self.interval = (LOOP_LAG_INTERVAL_MS if interval_ms is None else interval_ms) / 1000.0
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._paused = True         # loop not running (between run_until_complete calls)
+        self._stack_reported = False
+        self._handle = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._handle = self.loop.call_soon(self._beat)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+        self._thread.join()
+
+    def _beat(self):
+        now = time.monotonic()
+        if not self._paused:
+            lag = now - self._last_beat - self.interval
+            if lag > self.threshold:
+                self.stalls += 1
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+                logger.warning(f"[LoopLag{':' + self.name if self.name else ''}] event loop blocked for {lag * 1000:.0f} ms")
+        self._paused = False
+        self._stack_reported = False
+        self._last_beat = now
+        self._handle = self.loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            if not self.loop.is_running():
+                self._paused = True
+                continue
+            if self._paused or self._stack_reported:
+                continue
+            since = time.monotonic() - self._last_beat - self.interval
+            if since <= self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._stack_reported = True
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(
+                f"[LoopLag{':' + self.name if self.name else ''}] event loop stalled > {since * 1000:.0f} ms, "
+                f"blocking stack:\n{stack}"
+            )
+
+    def summary(self):
+        return {
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "total_lag_ms": round(self.total_lag * 1000, 1),
+        }
@@ -0,0 +1,250 @@
+"""
+network_capture.py
+
+Network-interception extraction for the Selenium crawlers (EXTRACTION_MODE=network).
+
+The site is driven by the same JSON API as club_crawling_v3.py. Instead of clicking every club card and
+scraping obfuscated css-xxxx classes, we:
+1. run the onboarding wizard once per (city, age) and read the recommendation XHR from Chrome's performance log
+2. replay the club detail / club contact calls from inside the page (same origin, same headers the site used)
+3. harvest those responses from the performance log as well and parse the JSON into rows
+"""
+
+import os
+import json
+import time
+import logging
+
+from crawl_schema import build_club_row
+
+# ---------------- CONFIG ----------------
+RECOMMENDATION_PATH = "/clubrecommendation"
+CLUB_PATH = "/api/club"
+CONTACT_PATH = "/clubcontact"
+CONTACT_URL_TEMPLATE = "https://hcdeapimngt1.azure-api.net/external/v1/orgs/{wgs_id}/clubcontact"
+CAPTURE_TIMEOUT = int(os.getenv("CAPTURE_TIMEOUT", 30))
+IN_PAGE_CONCURRENCY = int(os.getenv("IN_PAGE_CONCURRENCY", 8))
+# ----------------------------------------
+
+logger = logging.getLogger(__name__)
+
+# Runs inside the page: fire the requests with bounded concurrency and return at once; responses are read back
+# from the network log (no async script holding chromedriver while the fetches run, which would block other tabs)
+IN_PAGE_FETCH_SCRIPT = """
+const [requests, concurrency] = [arguments[0], arguments[1]];
+let next = 0;
+async function worker() {
+    while (next < requests.length) {
+        const r = requests[next++];
+        try { await fetch(r.url, {method: r.method, headers: r.headers, body: r.body}); } catch (e) {}
+    }
+}
+Array.from({length: Math.min(concurrency, requests.length)}, worker);
+"""
+REPLAY_TIMEOUT = max(CAPTURE_TIMEOUT, 60)
+
+
+def enable_performance_logging(options):
+    """Ask chromedriver to record DevTools Network events in the "performance" log."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def reset_network_log(driver):
+    """Drop everything buffered so far (call before each page flow)."""
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+
+
+def _classify(url):
+    if RECOMMENDATION_PATH in url:
+        return "recommendation"
+    if CONTACT_PATH in url:
+        return "contact"
+    if url.rstrip("/").endswith(CLUB_PATH):
+        return "club"
+    return None
+
+
+class NetworkRecorder:
+    """Accumulates API request/response events from the performance log across several drains of one page flow."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.requests_by_id = {}
+        self.statuses = {}
+        self.exchanges = []
+
+    def drain(self):
+        """Read the performance log; finished API exchanges are appended to self.exchanges as
+        {kind, url, status, request_headers, request_body, body}."""
+        finished = []
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                request = params.get("request", {})
+                kind = _classify(request.get("url", ""))
+                if kind and request.get("method") != "OPTIONS":
+                    self.requests_by_id[request_id] = {
+                        "kind": kind,
+                        "url": request.get("url"),
+                        "request_headers": request.get("headers", {}),
+                        "request_body": request.get("postData"),
+                    }
+            elif method == "Network.responseReceived":
+                self.statuses[request_id] = params.get("response", {}).get("status")
+            elif method == "Network.loadingFinished" and request_id in self.requests_by_id:
+                finished.append(request_id)
+
+        for request_id in finished:
+            request = self.requests_by_id.pop(request_id)
+            try:
+                raw = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                body = json.loads(raw.get("body") or "null")
+            except Exception as e:
+                logger.warning(f"[capture] could not read body of {request['url']}: {e}")
+                continue
+            if body is not None:
+                self.exchanges.append(dict(request, status=self.statuses.pop(request_id, None), body=body))
+
+    def wait_for(self, kind, expected=1, timeout=CAPTURE_TIMEOUT):
+        """Poll until `expected` exchanges of `kind` were captured (or timeout); returns them."""
+        deadline = time.time() + timeout
+        while True:
+            self.drain()
+            found = [e for e in self.exchanges if e["kind"] == kind]
+            if len(found) >= expected or time.time() >= deadline:
+                return found
+            time.sleep(0.2)
+
+    def replay(self, kind, requests, keys, key_of, timeout=CAPTURE_TIMEOUT):
+        """
+        Fire requests from inside the page and wait for their own responses. keys[i] identifies requests[i];
+        key_of(exchange) gives the key a captured exchange answers (ClubId of the body, org id of the URL).
+        Exchanges captured before the replay (calls the site made on its own) do not count. Returns {key: exchange},
+        preferring a 200 when a key was answered twice; keys left unanswered at the timeout are logged.
+        """
+        self.drain()
+        start = len(self.exchanges)
+        _replay_in_page(self.driver, requests)
+        wanted = set(keys)
+        replies = {}
+        deadline = time.time() + timeout
+        while wanted:
+            self.drain()
+            for e in self.exchanges[start:]:
+                key = key_of(e) if e["kind"] == kind else None
+                if key in wanted and (key not in replies or e["status"] == 200):
+                    replies[key] = e
+            if len(replies) >= len(wanted) or time.time() >= deadline:
+                break
+            time.sleep(0.2)
+        if len(replies) < len(wanted):
+            logger.warning(f"[capture] {len(wanted) - len(replies)} of {len(wanted)} {kind} requests unanswered "
+                           f"after {timeout}s")
+        return replies
+
+
+def _replay_in_page(driver, requests):
+    if requests:
+        driver.execute_script(IN_PAGE_FETCH_SCRIPT, requests, IN_PAGE_CONCURRENCY)
+
+
+def _api_headers(headers):
+    """Keep only the headers fetch() is allowed to set (drop pseudo/forbidden headers chromedriver reports)."""
+    forbidden = {"host", "origin", "referer", "user-agent", "content-length", "connection", "accept-encoding"}
+    return {k: v for k, v in (headers or {}).items() if not k.startswith(":") and k.lower() not in forbidden}
+
+
+def _club_id_of(exchange):
+    try:
+        return json.loads(exchange["request_body"] or "{}").get("ClubId")
+    except (ValueError, AttributeError):
+        return None
+
+
+def _wgs_id_of(exchange):
+    return exchange["url"].split("/orgs/")[-1].split("/")[0]
+
+
+# ---------------- parsing ----------------
+def extract_club_ids(recommendation_body):
+    ids = []
+    for d in recommendation_body or []:
+        for c in d.get("RecommendationClubCartDto", []) or []:
+            cid = c.get("ClubId", "")
+            if cid and cid not in ids:
+                ids.append(cid)
+    return ids
+
+
+def capture_search_results(driver, city=None, play_with=None, age=None):
+    """
+    Call right after the onboarding wizard finished. Returns the club rows (crawl_schema.CLUB_COLUMNS)
+    for this search without touching the DOM of any club card.
+    """
+    recorder = NetworkRecorder(driver)
+    recommendation = next((e for e in recorder.wait_for("recommendation") if e["status"] == 200), None)
+    if recommendation is None:
+        logger.warning("[capture] no recommendation response captured")
+        return []
+
+    club_ids = extract_club_ids(recommendation["body"])
+    if not club_ids:
+        return []
+
+    # --- club details: same payload shape the site posts, with the site's own subscription key ---
+    try:
+        search = json.loads(recommendation["request_body"] or "{}")
+    except ValueError:
+        search = {}
+    headers = _api_headers(recommendation["request_headers"])
+    club_url = recommendation["url"].replace(RECOMMENDATION_PATH, "/club")
+    detail_requests = [{
+        "url": club_url,
+        "method": "POST",
+        "headers": headers,
+        "body": json.dumps({
+            "ClubId": cid,
+            "Age": search.get("Age"),
+            "PlayWith": search.get("PlayWith"),
+            "FootballType": search.get("FootballType", 3),
+            "WeekDays": search.get("WeekDays", "1,2,3,4,5,6,7"),
+            "Disabilityoption": search.get("Disabilityoption", 1),
+            "DisabilityType": search.get("DisabilityType", []),
+        }),
+    } for cid in club_ids]
+    replies = recorder.replay("club", detail_requests, club_ids, _club_id_of, timeout=REPLAY_TIMEOUT)
+    details = [replies[cid]["body"] for cid in club_ids
+               if cid in replies and replies[cid]["status"] == 200 and isinstance(replies[cid]["body"], dict)]
+
+    # --- contacts: reuse the key of a contact call the site made itself, else the one from .env ---
+    site_contact = next((e for e in recorder.exchanges if e["kind"] == "contact"), None)
+    contact_headers = _api_headers(site_contact["request_headers"]) if site_contact else \
+        {"Ocp-Apim-Subscription-Key": os.getenv("KEY_CLUB_CONTACT_INFO") or ""}
+    wgs_ids = sorted({str(d.get("WgsClubId")) for d in details if d.get("WgsClubId")})
+    contact_requests = [{"url": CONTACT_URL_TEMPLATE.format(wgs_id=w), "method": "GET", "headers": contact_headers, "body": None}
+                        for w in wgs_ids]
+    # waits for these requests' own answers: a contact call the site made by itself no longer ends the wait early
+    replies = recorder.replay("contact", contact_requests, wgs_ids, _wgs_id_of, timeout=REPLAY_TIMEOUT)
+    contacts = {wgs_id: e["body"] for wgs_id, e in replies.items()
+                if e["status"] == 200 and isinstance(e["body"], dict)}
+
+    city = city if city is not None else search.get("ReadableLocation", "")
+    play_with = play_with if play_with is not None else search.get("PlayWith")
+    age = age if age is not None else search.get("Age")
+    rows = []
+    for data in details:
+        row = build_club_row(city, play_with, age, data, contacts.get(str(data.get("WgsClubId")), {}))
+        if row["Club Name"]:
+            rows.append(row)
+    logger.info(f"[capture] {len(club_ids)} clubs recommended, {len(rows)} rows captured")
+    return rows
@@ -0,0 +1,107 @@
+"""
+row_sink.py
+
+Thread-safe, buffered, append-only CSV sink for the Selenium crawlers (v1/v2).
+
+- The output file is read once at start-up (key columns only) to seed an in-memory dedupe index
+- add() drops empty rows and rows whose key was already written/buffered; it never re-reads the file
+- flush() appends the buffered rows with the csv module (no pandas concat / full rewrite)
+- v1 and v2 share SELENIUM_CSV_FILE (legacy columns); v3 / hybrid write crawl_schema.CLUB_COLUMNS to clubs_data.csv.
+  A file whose header does not hold the sink's columns is rejected instead of losing fields on append
+"""
+
+import os
+import csv
+import logging
+import threading
+
+from crawl_schema import SELENIUM_CLUB_COLUMNS
+
+# ---------------- CONFIG ----------------
+SINK_BATCH_SIZE = int(os.getenv("SINK_BATCH_SIZE", 50))
+SELENIUM_CSV_FILE = os.path.join("output", "club_data.csv")
+# ----------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key_part(value):
+    return " ".join(str(value or "").split()).casefold()
+
+
+class CsvRowSink:
+    def __init__(self, path, columns=SELENIUM_CLUB_COLUMNS, key_columns=("Club Name",), batch_size=SINK_BATCH_SIZE):
+        self.path = path
+        self.columns = list(columns)
+        self.key_columns = tuple(key_columns)
+        self.batch_size = batch_size
+        self._buffer = []
+        self._seen = set()
+        self._lock = threading.Lock()
+        self.written = 0
+        self.duplicates = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._load_index()
+
+    def _key(self, row):
+        return tuple(normalize_key_part(row.get(c)) for c in self.key_columns)
+
+    def _load_index(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames:
+                if set(reader.fieldnames) != set(self.columns):
+                    raise ValueError(f"{self.path} has columns {reader.fieldnames}, expected {self.columns}; "
+                                     f"write these rows to another file")
+                # keep appending in the column order the file already has
+                self.columns = list(reader.fieldnames)
+            for r in reader:
+                key = self._key(r)
+                if any(key):
+                    self._seen.add(key)
+        logger.info(f"[CsvRowSink] {len(self._seen)} existing keys indexed from {self.path}")
+
+    def add(self, row):
+        """Buffer one row; returns False when it is empty or already known."""
+        if not any(str(row.get(c) or "").strip() for c in self.columns):
+            return False
+        key = self._key(row)
+        with self._lock:
+            if key in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen.add(key)
+            self._buffer.append(row)
+            should_flush = len(self._buffer) >= self.batch_size
+        if should_flush:
+            self.flush()
+        return True
+
+    def add_many(self, rows):
+        return sum(1 for row in rows if self.add(row))
+
+    def flush(self):
+        with self._lock:
+            if not self._buffer:
+                return 0
+            rows, self._buffer = self._buffer, []
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction="ignore")
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+            self.written += len(rows)
+        logger.info(f"[CsvRowSink] appended {len(rows)} rows to {self.path}")
+        return len(rows)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+run_history.py
+
+Performance profile of every v3 run, kept in logs/run_history.jsonl (one JSON object per run), and a report that
+compares a run against a baseline.
+
+- Workers return worker_profile(): per-endpoint latency buckets and response statuses (tail_latency.run_stats()),
+  the AdaptiveLimiter trajectory, peak RSS and bytes written by the process
+- RunRecorder (parent) merges them into one profile: requests/sec, p50/p95/p99 and 429 rate per endpoint,
+  limiter trajectory per city, peak RSS per worker, bytes written, plus the config and library versions
+- python run_history.py report [--run ID] [--baseline ID] [--threshold 0.1]: metric-by-metric comparison, flags every
+  metric that got worse by more than the threshold; exits with 1 when something regressed
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+from datetime import datetime
+
+import tail_latency
+
+LOGS_FOLDER_NAME = "logs"
+
+# ---------------- CONFIG ----------------
+RUN_HISTORY_FILE = f"{LOGS_FOLDER_NAME}/run_history.jsonl"
+REGRESSION_THRESHOLD = float(os.getenv("REGRESSION_THRESHOLD", 0.10))   # relative change counted as a regression
+LIMITER_TRAJECTORY_POINTS = int(os.getenv("LIMITER_TRAJECTORY_POINTS", 50))  # kept per city
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "REGRESSION_THRESHOLD": float,
+    "LIMITER_TRAJECTORY_POINTS": int,
+}
+
+# metric -> (direction, minimum absolute change worth flagging); "lower" means lower is better
+METRICS = {
+    "duration_s": ("lower", 5.0),
+    "combos_per_s": ("higher", 0.05),
+    "rps": ("higher", 0.5),
+    "p50_ms": ("lower", 5.0),
+    "p95_ms": ("lower", 10.0),
+    "p99_ms": ("lower", 20.0),
+    "rate_429": ("lower", 0.005),
+    "timeout_rate": ("lower", 0.005),
+    "error_rate": ("lower", 0.005),
+    "limiter_avg": ("higher", 1.0),
+    "limiter_reductions": ("lower", 3),
+    "peak_rss_mb": ("lower", 20.0),
+    "write_bytes_per_combo": ("lower", 512),
+}
+# totals that grow with the size of the run: only compared between runs that crawled the same number of combos
+SIZE_DEPENDENT_METRICS = ("duration_s",)
+VERSIONED_PACKAGES = ("httpx", "h2", "httpcore", "anyio", "uvloop", "filelock")
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- worker side ----------------
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss   # bytes on macOS, KB elsewhere
+
+
+def process_write_bytes():
+    """Bytes this process has passed to write() so far (Linux /proc/self/io "wchar"), None elsewhere."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def limiter_summary(trajectory, end=None):
+    """[(monotonic time, concurrency), ...] -> time-weighted average, min/max, reductions and a downsampled trace."""
+    end = end or time.monotonic()
+    start = trajectory[0][0]
+    weighted = 0.0
+    for (t, c), (t_next, _) in zip(trajectory, trajectory[1:] + [(end, None)]):
+        weighted += c * (t_next - t)
+    step = max(1, len(trajectory) // LIMITER_TRAJECTORY_POINTS)
+    points = trajectory[::step]
+    if points[-1] != trajectory[-1]:
+        points.append(trajectory[-1])
+    values = [c for _, c in trajectory]
+    return {
+        "avg": round(weighted / (end - start), 2) if end > start else values[-1],
+        "min": min(values),
+        "max": max(values),
+        "final": values[-1],
+        "reductions": sum(1 for a, b in zip(values, values[1:]) if b < a),
+        "trajectory": [[round(t - start, 2), c] for t, c in points],
+    }
+
+
+def worker_profile(limiter, write_bytes_start, combos):
+    """What a city worker returns to the parent (call at the end of process_city_worker)."""
+    write_bytes = process_write_bytes()
+    return {
+        "pid": os.getpid(),
+        "combos": combos,
+        "peak_rss_kb": peak_rss_kb(),
+        "write_bytes": write_bytes - write_bytes_start if None not in (write_bytes, write_bytes_start) else None,
+        "limiter": limiter_summary(limiter.trajectory) if limiter is not None else None,
+        "endpoints": tail_latency.run_stats(),
+    }
+
+
+# ---------------- parent side ----------------
+def _versions():
+    from importlib import metadata
+    versions = {"python": platform.python_version()}
+    for name in VERSIONED_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            pass
+    return versions
+
+
+def _public_config(config):
+    """Config without secrets (keys) or endpoints, so the history can be shared."""
+    return {k: v for k, v in (config or {}).items()
+            if not k.startswith("KEY_CLUB") and "URL" not in k and k != "API_EGRESS"}
+
+
+class RunRecorder:
+    def __init__(self, config=None, dry_run=False, csv_path=None):
+        self.started = time.time()
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.dry_run = dry_run
+        self.config = _public_config(config)
+        self.csv_path = csv_path
+        self.csv_size_start = self._csv_size()
+        self.cities = 0
+        self.combos = 0
+        self.write_bytes = 0
+        self.buckets = {}         # endpoint -> summed latency bucket counts
+        self.statuses = {}        # endpoint -> {status: count}
+        self.limiter = {}         # city -> limiter_summary()
+        self.peak_rss_kb = {}     # pid -> peak RSS
+
+    def _csv_size(self):
+        return os.path.getsize(self.csv_path) if self.csv_path and os.path.exists(self.csv_path) else 0
+
+    def add_city(self, result):
+        perf = result.get("perf")
+        if not perf:
+            return
+        self.cities += 1
+        self.combos += perf.get("combos", 0)
+        self.write_bytes += perf.get("write_bytes") or 0
+        if perf.get("peak_rss_kb"):
+            self.peak_rss_kb[perf["pid"]] = max(self.peak_rss_kb.get(perf["pid"], 0), perf["peak_rss_kb"])
+        if perf.get("limiter"):
+            self.limiter[result.get("city")] = perf["limiter"]
+        for name, ep in perf.get("endpoints", {}).items():
+            buckets = self.buckets.setdefault(name, [0.0] * len(ep["buckets"]))
+            for i, c in enumerate(ep["buckets"]):
+                buckets[i] += c
+            statuses = self.statuses.setdefault(name, {})
+            for status, n in ep["statuses"].items():
+                statuses[str(status)] = statuses.get(str(status), 0) + n
+
+    def _endpoint(self, name, elapsed):
+        histogram = tail_latency.LatencyHistogram(window=float("inf"))
+        histogram.counts = list(self.buckets[name])
+        histogram.total = sum(histogram.counts)
+        statuses = self.statuses.get(name, {})
+        requests = sum(statuses.values())
+
+        def ms(q):
+            value = histogram.quantile(q)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "requests": requests,
+            "rps": round(requests / elapsed, 2) if elapsed else None,
+            "p50_ms": ms(0.5),
+            "p95_ms": ms(0.95),
+            "p99_ms": ms(0.99),
+            "rate_429": round(statuses.get("429", 0) / requests, 4) if requests else 0.0,
+            "timeout_rate": round(statuses.get("timeout", 0) / requests, 4) if requests else 0.0,
+            "error_rate": round(statuses.get("error", 0) / requests, 4) if requests else 0.0,
+            "statuses": statuses,
+        }
+
+    def finish(self, status="", saved=0):
+        elapsed = time.time() - self.started
+        limiters = list(self.limiter.values())
+        rss_mb = {str(pid): round(kb / 1024, 1) for pid, kb in self.peak_rss_kb.items()}
+        return {
+            "run_id": self.run_id,
+            "start": datetime.fromtimestamp(self.started).strftime("%Y-%m-%d %H:%M:%S"),
+            "dry_run": self.dry_run,
+            "status": status,
+            "duration_s": round(elapsed, 1),
+            "cities": self.cities,
+            "combos": self.combos,
+            "saved": saved,
+            "combos_per_s": round(self.combos / elapsed, 3) if elapsed else None,
+            "endpoints": {name: self._endpoint(name, elapsed) for name in self.buckets},
+            "limiter": {
+                "avg": round(sum(l["avg"] for l in limiters) / len(limiters), 2) if limiters else None,
+                "min": min((l["min"] for l in limiters), default=None),
+                "reductions": sum(l["reductions"] for l in limiters),
+                "by_city": self.limiter,
+            },
+            "peak_rss_mb": {"max": max(rss_mb.values(), default=None), "by_worker": rss_mb},
+            "bytes_written": {"csv": self._csv_size() - self.csv_size_start, "workers": self.write_bytes},
+            "config": self.config,
+            "versions": _versions(),
+        }
+
+
+def save_run(profile, path=RUN_HISTORY_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(profile, ensure_ascii=False) + "\n")
+    logger.info(f"📈 Run profile {profile['run_id']} written to {path}")
+
+
+def load_runs(path=RUN_HISTORY_FILE):
+    runs = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue
+    return runs
+
+
+# ---------------- comparison ----------------
+def flat_metrics(profile):
+    """The comparable numbers of a profile as {"duration_s": ..., "club.p95_ms": ..., ...}."""
+    metrics = {
+        "duration_s": profile.get("duration_s"),
+        "combos_per_s": profile.get("combos_per_s"),
+        "limiter_avg": profile.get("limiter", {}).get("avg"),
+        "limiter_reductions": profile.get("limiter", {}).get("reductions"),
+        "peak_rss_mb": profile.get("peak_rss_mb", {}).get("max"),
+    }
+    workers_bytes = profile.get("bytes_written", {}).get("workers")
+    if workers_bytes and profile.get("combos"):
+        metrics["write_bytes_per_combo"] = round(workers_bytes / profile["combos"])
+    for name, ep in profile.get("endpoints", {}).items():
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "rate_429", "timeout_rate", "error_rate"):
+            metrics[f"{name}.{key}"] = ep.get(key)
+    return {k: v for k, v in metrics.items() if v is not None}
+
+
+def compare(run, baseline, threshold=None):
+    """
+    [(metric, baseline value, run value, relative change, regressed), ...] for the metrics both runs have.
+    Size-dependent totals (duration_s) are skipped unless both runs crawled the same number of combos;
+    combos_per_s is the normalized figure that is always compared.
+    """
+    threshold = REGRESSION_THRESHOLD if threshold is None else threshold
+    current, base = flat_metrics(run), flat_metrics(baseline)
+    same_size = run.get("combos") == baseline.get("combos")
+    rows = []
+    for metric in current:
+        if metric not in base or (metric in SIZE_DEPENDENT_METRICS and not same_size):
+            continue
+        direction, min_abs = METRICS[metric.rsplit(".", 1)[-1]]
+        old, new = base[metric], current[metric]
+        change = (new - old) / abs(old) if old else (0.0 if new == old else float("inf"))
+        worse = new > old if direction == "lower" else new < old
+        regressed = worse and abs(change) > threshold and abs(new - old) >= min_abs
+        rows.append((metric, old, new, change, regressed))
+    return rows
+
+
+def find_baseline(runs, run, baseline_id=None):
+    """The requested run, else the latest earlier run of the same kind (dry run vs real)."""
+    if baseline_id:
+        return next((r for r in runs if r.get("run_id") == baseline_id), None)
+    earlier = [r for r in runs if r.get("run_id", "") < run.get("run_id", "") and r.get("dry_run") == run.get("dry_run")]
+    return earlier[-1] if earlier else None
+
+
+def _changed(run, baseline, key):
+    old, new = baseline.get(key, {}), run.get(key, {})
+    return {k: (old.get(k), new.get(k)) for k in sorted(set(old) | set(new)) if old.get(k) != new.get(k)}
+
+
+def log_regressions(run, path=RUN_HISTORY_FILE, threshold=None):
+    """End-of-run check against the previous comparable run; returns the regressed metrics."""
+    baseline = find_baseline(load_runs(path), run)
+    if baseline is None:
+        return []
+    regressed = [r for r in compare(run, baseline, threshold) if r[4]]
+    for metric, old, new, change, _ in regressed:
+        logger.warning(f"[REGRESSION] {metric}: {old} -> {new} ({change:+.0%}) vs run {baseline['run_id']}")
+    return regressed
+
+
+def report(run_id=None, baseline_id=None, threshold=None, path=RUN_HISTORY_FILE):
+    threshold = REGRESSION_THRESHOLD if threshold is None else threshold
+    runs = load_runs(path)
+    if not runs:
+        print(f"No runs recorded in {path}")
+        return 0
+    run = next((r for r in runs if r.get("run_id") == run_id), None) if run_id else runs[-1]
+    if run is None:
+        print(f"Run {run_id} not found in {path}")
+        return 2
+    baseline = find_baseline(runs, run, baseline_id)
+    if baseline is None:
+        print(f"Run {run['run_id']}: no baseline to compare with")
+        return 0
+
+    print(f"Run {run['run_id']} vs baseline {baseline['run_id']} (threshold {threshold:.0%})")
+    if run.get("combos") != baseline.get("combos"):
+        print(f"combos differ ({baseline.get('combos')} -> {run.get('combos')}): duration_s not compared")
+    print(f"{'metric':<28}{'baseline':>12}{'run':>12}{'change':>10}")
+    rows = compare(run, baseline, threshold)
+    for metric, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{metric:<28}{old:>12}{new:>12}{change:>+10.1%}{flag}")
+    for key in ("config", "versions"):
+        for name, (old, new) in _changed(run, baseline, key).items():
+            print(f"{key} changed: {name} {old} -> {new}")
+    regressed = [r for r in rows if r[4]]
+    print(f"{len(regressed)} regression(s)" if regressed else "No regressions")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    from club_crawling_v3 import load_config
+    globals().update({k: v for k, v in load_config().items() if k in ENV_CONFIG})  # .env settings
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+    report_parser = sub.add_parser("report", help="compare a run against a baseline")
+    report_parser.add_argument("--run", help="run id (default: the latest run)")
+    report_parser.add_argument("--baseline", help="run id (default: the previous run of the same kind)")
+    report_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                               help="relative change that counts as a regression (0.1 = 10%%)")
+    report_parser.add_argument("--history", default=RUN_HISTORY_FILE)
+    sub.add_parser("list", help="list recorded runs")
+    args = parser.parse_args()
+    if args.command == "list":
+        for r in load_runs():
+            print(f"{r['run_id']}  {'dry-run' if r.get('dry_run') else 'real':<8} {r.get('duration_s')}s  "
+                  f"{r.get('combos')} combos  {r.get('status', '')}")
+    else:
+        sys.exit(report(args.run, args.baseline, args.threshold, args.history))
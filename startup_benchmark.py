@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+startup_benchmark.py
+
+Measures what a short v3 run pays before its first request:
+
+- cold import time of club_crawling_v3 in a fresh interpreter
+- time from creating the worker pool until every worker is ready to send a request (httpx loaded, config applied)
+- per-worker RSS and USS (private memory, Linux only) right after start-up
+
+for a plain spawn pool vs the preloaded forkserver pool club_crawling_v3.main() uses.
+--baseline adds the same numbers with EAGER_IMPORTS loaded up front, i.e. what the module cost when it
+imported them at the top (before the lazy imports), so the change can be compared on one machine.
+Results are printed and appended to logs/startup_benchmark.csv.
+"""
+
+import os
+import csv
+import sys
+import time
+import argparse
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import club_crawling_v3 as api
+
+BENCHMARK_FILE = os.path.join(api.LOGS_FOLDER_NAME, "startup_benchmark.csv")
+# what club_crawling_v3 used to import at module level
+EAGER_IMPORTS = ("pandas", "httpx", "tqdm", "fake_useragent", "dotenv")
+
+
+def _memory_kb():
+    """(rss, uss) of this process in KB; uss is None where /proc is not available."""
+    rss = uss = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+        with open("/proc/self/smaps_rollup") as f:
+            uss = sum(int(line.split()[1]) for line in f if line.startswith(("Private_Clean:", "Private_Dirty:")))
+    except OSError:
+        import resource
+        rss = rss or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss, uss
+
+
+def _probe(hold):
+    # what a city worker needs before its first request
+    import httpx
+    import tqdm  # noqa: F401
+    httpx.AsyncClient
+    ready = time.time()
+    time.sleep(hold)  # keep this worker busy so every probe lands on a different process
+    rss, uss = _memory_kb()
+    return os.getpid(), ready, rss, uss
+
+
+def _init_eager_worker(config):
+    for name in EAGER_IMPORTS:
+        __import__(name)
+    api.init_worker(config)
+
+
+def measure_import(runs, eager=False):
+    imports = "".join(f"import {name}; " for name in EAGER_IMPORTS) if eager else ""
+    code = f"import time; t = time.perf_counter(); {imports}import club_crawling_v3; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def measure_pool(mode, workers, config, eager=False):
+    start = time.time()
+    if mode == "forkserver":
+        pool = api.make_process_pool(workers, config)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(mode),
+                                   initializer=_init_eager_worker if eager else api.init_worker, initargs=(config,))
+    with pool:
+        results = list(pool.map(_probe, [0.5] * workers))
+    by_pid = {pid: (ready, rss, uss) for pid, ready, rss, uss in results}
+    ready_times = [r[0] - start for r in by_pid.values()]
+    rss = [r[1] for r in by_pid.values() if r[1] is not None]
+    uss = [r[2] for r in by_pid.values() if r[2] is not None]
+    return {
+        "Mode": f"{mode} (eager)" if eager else mode,
+        "Workers": len(by_pid),
+        "First Ready (s)": round(min(ready_times), 3),
+        "All Ready (s)": round(max(ready_times), 3),
+        "Avg RSS (MB)": round(sum(rss) / len(rss) / 1024, 1) if rss else "",
+        "Avg USS (MB)": round(sum(uss) / len(uss) / 1024, 1) if uss else "",
+    }
+
+
+def save_results(rows, path=BENCHMARK_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    file_exists = os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Date"] + list(rows[0].keys()))
+        if not file_exists:
+            writer.writeheader()
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for r in rows:
+            writer.writerow({"Date": date, **r})
+
+
+def main(workers=api.MAX_PROCESSES, import_runs=3, baseline=False):
+    config = api.load_config()
+    import_time = measure_import(import_runs)
+    print(f"import club_crawling_v3: {import_time * 1000:.0f} ms (best of {import_runs})")
+    runs = [("spawn", False, import_time), ("forkserver", False, import_time)]
+    if baseline:
+        eager_time = measure_import(import_runs, eager=True)
+        print(f"import club_crawling_v3 with {', '.join(EAGER_IMPORTS)}: {eager_time * 1000:.0f} ms (best of {import_runs})")
+        runs.insert(0, ("spawn", True, eager_time))
+
+    rows = []
+    for mode, eager, mode_import_time in runs:
+        if mode not in multiprocessing.get_all_start_methods():
+            continue
+        r = measure_pool(mode, workers, config, eager=eager)
+        r["Import (ms)"] = round(mode_import_time * 1000)
+        rows.append(r)
+        print(f"{r['Mode']:>15}: first worker ready {r['First Ready (s)']:.3f}s, all {r['Workers']} ready "
+              f"{r['All Ready (s)']:.3f}s, RSS {r['Avg RSS (MB)']} MB, USS {r['Avg USS (MB)']} MB per worker")
+    save_results(rows)
+    print(f"Results appended to {BENCHMARK_FILE}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=api.MAX_PROCESSES)
+    parser.add_argument("--import-runs", type=int, default=3)
+    parser.add_argument("--baseline", action="store_true", help=f"also measure with {', '.join(EAGER_IMPORTS)} imported eagerly")
+    args = parser.parse_args()
+    main(workers=args.workers, import_runs=args.import_runs, baseline=args.baseline)
@@ -0,0 +1,231 @@
+"""
+tail_latency.py
+
+Tail-latency control for the v3 API calls.
+
+- LatencyHistogram: log-spaced buckets (10% wide) fed with every response time of an endpoint; counts are halved every
+  LATENCY_WINDOW samples so the quantiles follow the current server behaviour
+- EndpointLatency.timeout(): p99 x TIMEOUT_P99_MULTIPLIER, clamped to [MIN_REQUEST_TIMEOUT, MAX_REQUEST_TIMEOUT];
+  MAX_REQUEST_TIMEOUT (the old fixed 300 s) until LATENCY_MIN_SAMPLES responses were seen
+- hedged(): for idempotent requests, fires a duplicate when the first has not answered by the p95; the first
+  successful response wins and the other request is cancelled. HedgeBudget keeps hedges under HEDGE_MAX_RATIO of requests
+- run_stats(): per-run (not decayed) latency buckets and response status counts of every endpoint, for run_history.py
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+
+# ---------------- CONFIG ----------------
+TIMEOUT_P99_MULTIPLIER = float(os.getenv("TIMEOUT_P99_MULTIPLIER", 3.0))
+MIN_REQUEST_TIMEOUT = float(os.getenv("MIN_REQUEST_TIMEOUT", 5.0))
+MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT", 300.0))
+LATENCY_MIN_SAMPLES = int(os.getenv("LATENCY_MIN_SAMPLES", 50))
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", 2000))
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "1") == "1"
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", 0.05))  # at most ~5% extra requests
+# ----------------------------------------
+
+# Settings club_crawling_v3.load_config() reads after .env and apply_config() sets here (name -> type)
+ENV_CONFIG = {
+    "TIMEOUT_P99_MULTIPLIER": float,
+    "MIN_REQUEST_TIMEOUT": float,
+    "MAX_REQUEST_TIMEOUT": float,
+    "LATENCY_MIN_SAMPLES": int,
+    "LATENCY_WINDOW": int,
+    "HEDGE_REQUESTS": lambda value: value == "1",
+    "HEDGE_MAX_RATIO": float,
+}
+
+BUCKET_GROWTH = 1.1
+BUCKET_MIN_SECONDS = 0.001
+BUCKET_COUNT = int(math.log(3600 / BUCKET_MIN_SECONDS, BUCKET_GROWTH)) + 1
+
+logger = logging.getLogger(__name__)
+
+_endpoints = {}  # per-process EndpointLatency by name
+
+
+class LatencyHistogram:
+    def __init__(self, window=None):
+        self.window = LATENCY_WINDOW if window is None else window
+        self.counts = [0.0] * BUCKET_COUNT
+        self.total = 0.0
+        self.samples = 0   # lifetime count (not decayed), used for the warm-up threshold
+
+    @staticmethod
+    def _bucket(seconds):
+        if seconds <= BUCKET_MIN_SECONDS:
+            return 0
+        return min(BUCKET_COUNT - 1, int(math.log(seconds / BUCKET_MIN_SECONDS, BUCKET_GROWTH)) + 1)
+
+    def record(self, seconds):
+        self.counts[self._bucket(seconds)] += 1
+        self.total += 1
+        self.samples += 1
+        if self.total >= self.window:
+            self.counts = [c / 2 for c in self.counts]
+            self.total /= 2
+
+    def quantile(self, q):
+        """Upper bound (seconds) of the bucket holding the q-quantile, None when empty."""
+        if not self.total:
+            return None
+        target = q * self.total
+        running = 0.0
+        for i, c in enumerate(self.counts):
+            running += c
+            if running >= target:
+                return BUCKET_MIN_SECONDS * BUCKET_GROWTH ** i
+        return BUCKET_MIN_SECONDS * BUCKET_GROWTH ** (BUCKET_COUNT - 1)
+
+
+class HedgeBudget:
+    """Each request earns HEDGE_MAX_RATIO of a hedge; a hedge spends a whole one."""
+
+    def __init__(self, ratio=None, burst=5.0):
+        self.ratio = HEDGE_MAX_RATIO if ratio is None else ratio
+        self.burst = burst
+        self.tokens = 0.0
+        self.sent = 0
+
+    def earn(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self):
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.sent += 1
+        return True
+
+
+class EndpointLatency:
+    def __init__(self, name):
+        self.name = name
+        self.histogram = LatencyHistogram()
+        self.budget = HedgeBudget()
+        self.timeouts = 0
+        self.hedge_wins = 0
+        self.reset_run()
+
+    def reset_run(self):
+        """Start the per-run counters (the adaptive histogram keeps what it learned)."""
+        self.run_histogram = LatencyHistogram(window=float("inf"))
+        self.run_statuses = {}   # HTTP status (or "timeout" / "error") -> count
+
+    @property
+    def warmed_up(self):
+        return self.histogram.samples >= LATENCY_MIN_SAMPLES
+
+    def record(self, seconds):
+        self.histogram.record(seconds)
+        self.run_histogram.record(seconds)
+
+    def count(self, status):
+        self.run_statuses[status] = self.run_statuses.get(status, 0) + 1
+
+    def timeout(self):
+        if not self.warmed_up:
+            return MAX_REQUEST_TIMEOUT
+        return min(MAX_REQUEST_TIMEOUT, max(MIN_REQUEST_TIMEOUT, self.histogram.quantile(0.99) * TIMEOUT_P99_MULTIPLIER))
+
+    def hedge_delay(self):
+        return self.histogram.quantile(0.95) if self.warmed_up else None
+
+    def summary(self):
+        q = self.histogram.quantile
+        return {
+            "samples": self.histogram.samples,
+            "p50_ms": round(q(0.5) * 1000) if self.histogram.total else None,
+            "p95_ms": round(q(0.95) * 1000) if self.histogram.total else None,
+            "p99_ms": round(q(0.99) * 1000) if self.histogram.total else None,
+            "timeout_s": round(self.timeout(), 1),
+            "timeouts": self.timeouts,
+            "hedges": self.budget.sent,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+def endpoint(name):
+    """Per-process latency state of one endpoint ("recommendation", "club", "contact")."""
+    if name not in _endpoints:
+        _endpoints[name] = EndpointLatency(name)
+    return _endpoints[name]
+
+
+def summaries():
+    return {name: ep.summary() for name, ep in _endpoints.items()}
+
+
+def reset_run_stats():
+    for ep in _endpoints.values():
+        ep.reset_run()
+
+
+def run_stats():
+    """Per-run latency bucket counts and status counts by endpoint (buckets can be summed across processes)."""
+    return {name: {"buckets": list(ep.run_histogram.counts), "statuses": dict(ep.run_statuses)}
+            for name, ep in _endpoints.items() if ep.run_statuses}
+
+
+async def timed(ep, request_fn):
+    """await request_fn(timeout) with the endpoint's adaptive timeout; the elapsed time feeds the histogram."""
+    import httpx
+    start = time.monotonic()
+    try:
+        # httpx applies a float timeout to each phase (connect, write, pool, and every read), not to the whole
+        # request: a response trickling in can take longer than ep.timeout() in total
+        result = await request_fn(ep.timeout())
+    except httpx.TimeoutException:
+        # censored sample: the real latency was at least this long
+        ep.timeouts += 1
+        ep.count("timeout")
+        ep.record(time.monotonic() - start)
+        raise
+    except httpx.HTTPStatusError as e:
+        ep.count(e.response.status_code)
+        raise
+    except Exception:
+        ep.count("error")
+        raise
+    ep.count(getattr(result, "status_code", 200))
+    ep.record(time.monotonic() - start)
+    return result
+
+
+async def hedged(ep, request_fn):
+    """
+    timed() request that is duplicated once it is slower than the endpoint's p95 (idempotent requests only).
+    The first successful result wins, the other task is cancelled; if both fail the first error is raised.
+    """
+    ep.budget.earn()
+    delay = ep.hedge_delay() if HEDGE_REQUESTS else None
+    if delay is None:
+        return await timed(ep, request_fn)
+
+    first = asyncio.ensure_future(timed(ep, request_fn))
+    pending = {first}
+    error = None
+    try:
+        # cancelled while waiting (combo abandoned, shutdown): the finally cancels whatever is still in flight
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done or not ep.budget.try_spend():
+            return await first
+
+        second = asyncio.ensure_future(timed(ep, request_fn))
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        ep.hedge_wins += 1
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,115 @@
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException, TimeoutException, WebDriverException
+
+import browser_pool
+from browser_pool import BrowserPool, PooledDriver
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current = handle
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.window_handles = ["main"]
+        self.current = "main"
+        self.switch_to = FakeSwitchTo(self)
+
+    def execute_script(self, script, *args):
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+        return 1
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = BrowserPool(size=1, max_pages_per_driver=3)
+    pool.started = []
+
+    def new_driver(page_load_strategy="eager"):
+        pool.started.append(FakeDriver())
+        return PooledDriver(pool.started[-1])
+
+    monkeypatch.setattr(pool, "_new_driver", new_driver)
+    return pool
+
+
+def test_driver_is_reused_between_checkouts(pool):
+    with pool.driver() as (first, _):
+        pass
+    with pool.driver() as (second, _):
+        pass
+    assert first is second
+    assert len(pool.started) == 1
+
+
+def test_wait_timeout_keeps_the_warm_driver(pool):
+    with pytest.raises(TimeoutException):
+        with pool.driver() as (driver, _):
+            raise TimeoutException("results did not render")
+    with pool.driver() as (again, _):
+        pass
+    assert again is driver and not driver.quit_called
+
+
+def test_dead_session_is_replaced(pool):
+    with pytest.raises(InvalidSessionIdException):
+        with pool.driver() as (driver, _):
+            raise InvalidSessionIdException("invalid session id")
+    with pool.driver() as (again, _):
+        pass
+    assert driver.quit_called and again is not driver
+
+
+def test_other_webdriver_errors_replace_only_unhealthy_drivers(pool):
+    with pytest.raises(WebDriverException):
+        with pool.driver() as (driver, _):
+            raise WebDriverException("element click intercepted")
+    assert not driver.quit_called
+    with pytest.raises(WebDriverException):
+        with pool.driver() as (driver, _):
+            driver.alive = False
+            raise WebDriverException("disconnected")
+    assert driver.quit_called
+
+
+def test_release_closes_extra_windows(pool):
+    with pool.driver() as (driver, _):
+        driver.window_handles.append("club tab")
+        driver.current = "club tab"
+    assert driver.window_handles == ["main"] and driver.current == "main"
+
+
+def test_driver_recycled_after_max_pages_loaded_not_checkouts(pool, monkeypatch):
+    class Wait:
+        def __init__(self, driver, timeout):
+            pass
+
+        def until(self, condition):
+            return True
+
+    monkeypatch.setattr(browser_pool, "WebDriverWait", Wait)
+    for _ in range(5):
+        with pool.driver():
+            pass
+    assert len(pool.started) == 1   # checkouts alone never recycle
+
+    with pool.driver() as (driver, pooled):
+        for _ in range(3):
+            assert browser_pool.wait_for_club_page(driver, pooled)
+    assert pooled.pages == 3 and driver.quit_called
+    with pool.driver():
+        pass
+    assert len(pool.started) == 2
@@ -0,0 +1,74 @@
+import asyncio
+import pickle
+
+import pytest
+
+import club_crawling_v3 as api
+
+COMBOS = [(4, age) for age in range(5, 11)]
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    """process_city_worker in tmp_path with a fake process_combo_async; returns what the fake observed."""
+    monkeypatch.chdir(tmp_path)
+    for folder in ("output", "storage", "logs"):
+        (tmp_path / folder).mkdir()
+    monkeypatch.setattr(api, "COMBO_CONCURRENCY", 3)
+    seen = {"in_flight": 0, "max_in_flight": 0, "limiters": set(), "clients": set(), "fail": set(), "snapshots": []}
+
+    async def process_combo_async(city, play_with, age, *args, discovery=None, limiter=None, clients=None, **kwargs):
+        seen["limiters"].add(id(limiter))
+        seen["clients"].add(id(clients))
+        seen["in_flight"] += 1
+        seen["max_in_flight"] = max(seen["max_in_flight"], seen["in_flight"])
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            seen["in_flight"] -= 1
+        if (play_with, age) in seen["fail"]:
+            raise api.ApiUnavailableError("recommendation", "failed after 3 retries")
+        discovery["club_ids"] = [f"{city}_{play_with}_{age}"]
+        return [{"City": city, "PlayWith": play_with, "Age": age, "Club Name": f"Club {age}"}]
+
+    dump = api.atomic_pickle_dump
+
+    def recording_dump(obj, path):
+        if path == api.PROCESSED_FILE:
+            seen["snapshots"].append(set(obj))
+        dump(obj, path)
+
+    monkeypatch.setattr(api, "process_combo_async", process_combo_async)
+    monkeypatch.setattr(api, "atomic_pickle_dump", recording_dump)
+    return seen
+
+
+def _processed():
+    with open(api.PROCESSED_FILE, "rb") as f:
+        return pickle.load(f)
+
+
+def test_combos_run_concurrently_with_shared_limiter_and_clients(worker):
+    result = api.process_city_worker({"city": "Leeds", "pending_combos": list(COMBOS)})
+
+    assert worker["max_in_flight"] == 3
+    assert len(worker["limiters"]) == 1 and len(worker["clients"]) == 1
+    assert result["stats"]["combos"] == len(COMBOS)
+    assert _processed() == {api.make_combo_key("Leeds", pw, age) for pw, age in COMBOS}
+    # checkpoints are written while the city is still running, not only at the end
+    assert len(worker["snapshots"][0]) < len(COMBOS)
+
+
+def test_failed_combo_is_left_for_the_next_run(worker):
+    worker["fail"].add((4, 7))
+    result = api.process_city_worker({"city": "Leeds", "pending_combos": list(COMBOS)})
+
+    assert result["stats"]["failed"] == 1 and result["stats"]["errors"] == 1
+    assert api.make_combo_key("Leeds", 4, 7) not in _processed()
+    assert len(_processed()) == len(COMBOS) - 1
+
+
+def test_processed_combos_are_skipped(worker):
+    api.atomic_pickle_dump({api.make_combo_key("Leeds", 4, 5)}, api.PROCESSED_FILE)
+    result = api.process_city_worker({"city": "Leeds", "pending_combos": list(COMBOS)})
+    assert result["stats"]["combos"] == len(COMBOS) - 1
@@ -0,0 +1,60 @@
+import asyncio
+import csv
+
+import pytest
+
+from club_name_index import ClubNameIndex, build_club_name_index
+
+
+@pytest.fixture
+def index_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # NAME_LOCK_FILE is relative to the working directory
+    (tmp_path / "storage").mkdir()
+    csv_path = tmp_path / "clubs.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["City", "Club Name"])
+        writer.writerow(["Leeds", "Leeds Juniors FC"])
+        writer.writerow(["York", "York  City Youth"])
+    index_path, log_path = str(tmp_path / "names.idx"), str(tmp_path / "names.log")
+    assert build_club_name_index(str(csv_path), index_path, log_path) == 2
+    return index_path, log_path
+
+
+def test_contains_uses_base_index_and_normalizes(index_paths):
+    index = ClubNameIndex(*index_paths)
+    assert index.contains("leeds", "LEEDS JUNIORS FC")
+    assert index.contains("York", "York City Youth")
+    assert not index.contains("York", "Leeds Juniors FC")
+
+
+def test_claim_is_shared_across_instances(index_paths):
+    first, second = ClubNameIndex(*index_paths), ClubNameIndex(*index_paths)
+    assert first.claim("Bath", "Bath Rovers")
+    assert not first.claim("Bath", "Bath Rovers")
+    # the other worker only sees it after a refresh, but a claim always reads the log under the lock
+    assert not second.contains("Bath", "Bath Rovers")
+    assert not second.claim("Bath", "Bath Rovers")
+    second.refresh()
+    assert second.contains("Bath", "Bath Rovers")
+
+
+def test_claim_many_first_occurrence_wins(index_paths):
+    from club_name_index import name_hash
+    index = ClubNameIndex(*index_paths)
+    h = name_hash("Bath", "Bath Rovers")
+    assert index.claim_many([h, h, name_hash("Leeds", "Leeds Juniors FC")]) == [True, False, False]
+
+
+def test_aclaim_batches_concurrent_claims(index_paths):
+    index = ClubNameIndex(*index_paths)
+    batches = []
+    claim_many = index.claim_many
+    index.claim_many = lambda hashes: batches.append(len(hashes)) or claim_many(hashes)
+
+    async def run():
+        names = ["Bath Rovers", "Bath Rovers", "Bath Town", "Leeds Juniors FC"]
+        return await asyncio.gather(*(index.aclaim("Bath" if "Bath" in n else "Leeds", n) for n in names))
+
+    assert asyncio.run(run()) == [True, False, True, False]
+    assert batches == [3]   # the known name never left memory; the rest went out in one batch
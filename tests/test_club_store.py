@@ -0,0 +1,118 @@
+import csv
+import sys
+import threading
+
+import pytest
+
+import club_store
+from club_store import ClubStore
+
+UNIFIED = ["City", "PlayWith", "Age", "Club Name", "Club Address", "Football Types"]
+LEGACY = ["Club Name", "Address", "Accredited To", "Football Types", "Team Numbers", "Contact Name", "Email",
+          "Telephone Number", "Website"]
+
+
+def _write(path, header, rows, mode="w"):
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if mode == "w":
+            writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ClubStore(str(tmp_path / "clubs.sqlite"))
+
+
+def test_ingest_is_incremental_and_dedupes(store, tmp_path):
+    path = tmp_path / "clubs_data.csv"
+    _write(path, UNIFIED, [["Leeds", 4, 10, "Leeds Juniors", "1 Road, Leeds LS6 2AB", "Futsal"],
+                           ["leeds", 4, 10, "LEEDS JUNIORS", "", ""]])
+    assert store.ingest_csv(str(path)) == 1
+    assert store.ingest_csv(str(path)) == 0
+    _write(path, UNIFIED, [["Leeds", 5, 10, "Leeds Juniors", "", ""]], mode="a")
+    assert store.ingest_csv(str(path)) == 1
+    assert store.stats()["clubs"] == 2
+
+
+def test_legacy_rows_without_play_with_or_age_are_deduped(store, tmp_path):
+    path = tmp_path / "club_data.csv"
+    _write(path, LEGACY, [["York Youth", "York YO1 7HH", "", "", "", "", "", "", ""]] * 2)
+    assert store.ingest_csv(str(path)) == 1
+    store.ingest_csv(str(path))
+    assert store.stats()["clubs"] == 1
+
+
+def test_partial_last_line_waits_for_the_next_ingest(store, tmp_path):
+    path = tmp_path / "clubs_data.csv"
+    _write(path, UNIFIED, [["Leeds", 4, 10, "Leeds Juniors", "", ""]])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("Bath,4,10,Bath Rov")
+    assert store.ingest_csv(str(path)) == 1
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("ers,,\n")
+    assert store.ingest_csv(str(path)) == 1
+    assert store.search(city="bath")["items"][0]["Club Name"] == "Bath Rovers"
+
+
+def test_search_filters_and_full_text(store, tmp_path):
+    path = tmp_path / "clubs_data.csv"
+    _write(path, UNIFIED, [["Leeds", 4, 10, "Leeds Juniors", "1 Road, Leeds LS6 2AB", "Futsal, Walking"],
+                           ["Leeds", 5, 12, "Leeds Ladies", "2 Road, Leeds LS1 4AP", "11v11"]])
+    store.ingest_csv(str(path))
+    assert store.search(city="Leeds")["total"] == 2
+    assert [c["Club Name"] for c in store.search(play_with="female")["items"]] == ["Leeds Ladies"]
+    assert store.search(district="ls6")["items"][0]["Postcode District"] == "LS6"
+    assert store.search(q="walk*")["total"] == 1
+    assert store.search(age_min=11, age_max=14)["total"] == 1
+    with pytest.raises(ValueError):
+        store.search(play_with="mixed")
+
+
+def test_malformed_filters_raise_value_error(store):
+    with pytest.raises(ValueError, match="age must be an integer"):
+        store.search(age="abc")
+    with pytest.raises(ValueError, match="limit"):
+        store.search(limit="ten")
+    assert store.search(limit=0)["limit"] == 1
+
+
+def test_cli_query_rejects_bad_filter_like_http(tmp_path, monkeypatch, capsys):
+    db = str(tmp_path / "clubs.sqlite")
+    monkeypatch.setattr(sys, "argv", ["club_store.py", "--db", db, "query", "--age", "abc"])
+    with pytest.raises(SystemExit) as excinfo:
+        club_store.main()
+    assert excinfo.value.code == 2
+    assert "age must be an integer, got 'abc'" in capsys.readouterr().err
+
+
+def test_connections_are_reused_across_request_threads(store, monkeypatch):
+    opened = []
+    connect = store._connect
+
+    def counting_connect():
+        opened.append(True)
+        return connect()
+
+    monkeypatch.setattr(store, "_connect", counting_connect)
+    for _ in range(5):   # ThreadingHTTPServer: a new thread per request
+        thread = threading.Thread(target=store.search, kwargs={"city": "Leeds"})
+        thread.start()
+        thread.join()
+    assert len(opened) == 0   # the connection ClubStore() opened is still pooled
+
+    barrier = threading.Barrier(3)
+
+    def concurrent_request():
+        with store.connection():
+            barrier.wait()
+
+    threads = [threading.Thread(target=concurrent_request) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(opened) == 2 and store._pool.qsize() == 3
+    store.close()
+    assert store._pool.qsize() == 0
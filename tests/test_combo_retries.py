@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+
+import club_crawling_v3 as api
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def attempts(monkeypatch):
+    """process_combo_async raising the queued outcomes in turn, then returning one row; no backoff sleeps."""
+    outcomes = []
+    calls = []
+
+    async def process_combo_async(*args, **kwargs):
+        calls.append(args[:3])
+        if outcomes:
+            raise outcomes.pop(0)
+        return [{"Club Name": "Leeds Juniors"}]
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(api, "process_combo_async", process_combo_async)
+    monkeypatch.setattr(api.asyncio, "sleep", no_sleep)
+    monkeypatch.setattr(api, "TOTAL_RETRIES", 1000000000)
+    return outcomes, calls
+
+
+def _run():
+    return asyncio.run(api.process_combo_with_retries("Leeds", 4, 10, None, {}, {}, {}))
+
+
+def _status_error(code):
+    return httpx.HTTPStatusError(f"{code}", request=None, response=FakeResponse(code))
+
+
+def test_transport_errors_and_5xx_are_retried(attempts):
+    outcomes, calls = attempts
+    outcomes += [httpx.ConnectError("refused"), httpx.ReadTimeout("slow"), _status_error(503)]
+    assert _run() == [{"Club Name": "Leeds Juniors"}]
+    assert len(calls) == 4
+
+
+@pytest.mark.parametrize("error", [
+    api.ApiUnavailableError("recommendation", "failed after 3 retries"),
+    api.CredentialsUnavailableError("club", 600),
+    _status_error(401),
+    KeyError("ClubId"),
+])
+def test_other_errors_are_raised_at_once(attempts, error):
+    outcomes, calls = attempts
+    outcomes.append(error)
+    with pytest.raises(type(error)):
+        _run()
+    assert len(calls) == 1
+
+
+def test_last_retryable_error_is_raised(attempts, monkeypatch):
+    outcomes, calls = attempts
+    monkeypatch.setattr(api, "TOTAL_RETRIES", 2)
+    outcomes += [httpx.ConnectError("refused")] * 2
+    with pytest.raises(httpx.ConnectError):
+        _run()
+    assert len(calls) == 2
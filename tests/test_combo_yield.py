@@ -0,0 +1,66 @@
+import pytest
+
+from combo_yield import SaturationTracker, YieldModel, prioritize_combos
+
+
+def test_expected_yield_is_none_without_history():
+    assert YieldModel(prior_weight=2).expected_yield("Leeds", 4, 10) is None
+
+
+def test_expected_yield_shrinks_towards_slot_and_overall():
+    model = YieldModel(prior_weight=2)
+    model.add("Leeds", 4, 10, returned=10, new=10)   # yield 1.0
+    model.add("York", 4, 12, returned=10, new=0)     # yield 0.0
+    # overall 0.5; slot (4, 10) = (1 + 2 * 0.5) / 3; combo = (1 + 2 * slot) / 3
+    slot = (1 + 2 * 0.5) / 3
+    assert model.expected_yield("Leeds", 4, 10) == pytest.approx((1 + 2 * slot) / 3)
+    # unseen combo and slot: the overall mean
+    assert model.expected_yield("Bath", 5, 20) == pytest.approx(0.5)
+
+
+def test_yield_model_load_skips_bad_rows(tmp_path):
+    path = tmp_path / "yield.csv"
+    path.write_text("Date,City,PlayWith,Age,Returned,New\n"
+                    "d,Leeds,4,10,10,5\n"
+                    "d,Leeds,4,x,10,5\n", encoding="utf-8")
+    model = YieldModel.load(str(path))
+    assert model.total[1] == 1
+
+
+def test_prioritize_combos_keeps_order_without_history():
+    combos = [(4, 10), (5, 10)]
+    assert prioritize_combos("Leeds", combos, YieldModel()) == combos
+
+
+def test_prioritize_combos_highest_yield_first():
+    model = YieldModel(prior_weight=0)
+    model.add("Leeds", 4, 10, 10, 1)
+    model.add("Leeds", 5, 10, 10, 9)
+    assert prioritize_combos("Leeds", [(4, 10), (5, 10)], model) == [(5, 10), (4, 10)]
+
+
+def test_prioritize_combos_ranks_unseen_combos_at_the_average():
+    model = YieldModel(prior_weight=0)
+    model.add("Leeds", 4, 10, 10, 9)   # 0.9
+    model.add("Leeds", 5, 10, 10, 1)   # 0.1
+    # (4, 12) has no history anywhere: scored at the overall mean 0.5
+    assert prioritize_combos("Leeds", [(5, 10), (4, 12), (4, 10)], model) == [(4, 10), (4, 12), (5, 10)]
+
+
+def test_saturation_waits_for_min_combos():
+    tracker = SaturationTracker(threshold=0.1, window=3, min_combos=5)
+    for _ in range(4):
+        tracker.observe(returned=10, new=0)
+    assert not tracker.saturated()
+    tracker.observe(returned=10, new=0)
+    assert tracker.saturated()
+
+
+def test_saturation_looks_at_the_window_only():
+    tracker = SaturationTracker(threshold=0.1, window=2, min_combos=0)
+    tracker.observe(10, 0)
+    tracker.observe(10, 0)
+    assert tracker.saturated()
+    tracker.observe(10, 5)   # window is now (10, 0), (10, 5): yield 0.25
+    assert not tracker.saturated()
+    assert tracker.window_yield() == pytest.approx(0.25)
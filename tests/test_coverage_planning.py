@@ -0,0 +1,43 @@
+import pytest
+
+import coverage_planning
+from coverage_planning import haversine_km, learn_search_radius_km, plan_search_points
+
+
+def _covers(chosen, points, radius_km):
+    return all(any(haversine_km(lat, lon, c_lat, c_lon) <= radius_km for _, c_lat, c_lon in chosen)
+               for _, lat, lon in points)
+
+
+def test_plan_search_points_covers_every_point():
+    # two clusters ~100 km apart plus an isolated point
+    points = [("Leeds", 53.80, -1.55), ("Bradford", 53.79, -1.75), ("Wakefield", 53.68, -1.50),
+              ("London", 51.51, -0.13), ("Westminster", 51.50, -0.14), ("Truro", 50.26, -5.05)]
+    chosen = plan_search_points(points, radius_km=20)
+    assert _covers(chosen, points, 20)
+    assert len(chosen) == 3
+    assert chosen[-1][0] == "Truro"   # largest coverage first
+
+
+def test_plan_search_points_zero_radius_keeps_every_point():
+    points = [("A", 52.0, -1.0), ("B", 52.5, -1.5)]
+    assert sorted(p[0] for p in plan_search_points(points, radius_km=0)) == ["A", "B"]
+
+
+def test_extract_club_distances_converts_miles():
+    data = [{"RecommendationClubCartDto": [{"Distance": 1}, {"distance": "2.5"}, {"Distance": None}]}]
+    assert coverage_planning.extract_club_distances_km(data) == pytest.approx([1.609344, 4.02336])
+
+
+def test_learn_search_radius_uses_latest_observation_per_location(tmp_path):
+    path = tmp_path / "radius.csv"
+    path.write_text("Date,Location,Clubs,Max Km,P90 Km\n"
+                    "d,Leeds,30,50,40\n"
+                    "d,Leeds,30,20,10\n"
+                    "d,York,30,20,10\n"
+                    "d,Ripon,2,90,90\n", encoding="utf-8")
+    assert learn_search_radius_km(str(path), safety_factor=1.0, min_clubs=10) == 10
+
+
+def test_learn_search_radius_falls_back_to_default(tmp_path):
+    assert learn_search_radius_km(str(tmp_path / "missing.csv"), default=7.5) == 7.5
@@ -0,0 +1,74 @@
+import csv
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import crawl_profiler
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_thread_label_folds_pool_threads_into_one_root():
+    assert crawl_profiler._thread_label("ThreadPoolExecutor-0_3") == "ThreadPoolExecutor-0"
+    assert crawl_profiler._thread_label("persistence_0") == "persistence"
+    assert crawl_profiler._thread_label("Main Thread;x") == "Main_Thread_x"
+
+
+def test_sampler_roots_stacks_at_their_thread(tmp_path):
+    sampler = crawl_profiler.StackSampler(interval_ms=1)
+    worker = threading.Thread(target=_busy, args=(0.2,), name="persistence_0")
+    sampler.start()
+    worker.start()
+    worker.join()
+    sampler.stop()
+    roots = {stack.split(";")[0] for stack in sampler.counts}
+    assert "persistence" in roots
+    assert "stack-sampler" not in roots
+    assert any(stack.startswith("persistence;") and "_busy" in stack for stack in sampler.counts)
+
+
+def test_stage_is_a_no_op_without_a_profiler():
+    crawl_profiler.stop()
+    with crawl_profiler.stage("parse"):
+        pass
+    assert crawl_profiler.timed("write", lambda x: x + 1)(1) == 2
+
+
+def test_timed_records_in_the_calling_thread(tmp_path):
+    profiler = crawl_profiler.start(str(tmp_path), "Leeds", interval_ms=1)
+    try:
+        write = crawl_profiler.timed("write", _busy)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(write, 0.05).result()
+        with crawl_profiler.stage("parse"):
+            time.sleep(0.05)
+    finally:
+        base = crawl_profiler.stop()
+
+    write_stage, parse_stage = profiler.stages["write"], profiler.stages["parse"]
+    assert write_stage["count"] == 1 and write_stage["cpu"] > 0.02   # thread CPU of the pool thread that ran it
+    assert parse_stage["wall"] >= 0.05 and parse_stage["cpu"] < 0.02   # waiting is wall time, not CPU
+    with open(base + ".stages.json", encoding="utf-8") as f:
+        assert set(json.load(f)["stages"]) == {"write", "parse"}
+
+
+def test_merge_profiles_sums_processes(tmp_path):
+    for pid, (count, wall) in enumerate([(2, 1.0), (3, 2.0)]):
+        (tmp_path / f"w_{pid}.folded").write_text(f"MainThread;main (x.py:1) {count}\n", encoding="utf-8")
+        (tmp_path / f"w_{pid}.stages.json").write_text(json.dumps({"stages": {
+            "detail": {"count": count, "wall": wall, "cpu": 0.1, "max_wall": wall / count}}}), encoding="utf-8")
+
+    merged_path, summary_path = crawl_profiler.merge_profiles(str(tmp_path))
+    # merging twice must not count merged.folded itself
+    merged_path, summary_path = crawl_profiler.merge_profiles(str(tmp_path))
+
+    with open(merged_path, encoding="utf-8") as f:
+        assert f.read() == "MainThread;main (x.py:1) 5\n"
+    with open(summary_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[1] == ["detail", "5", "3.000", "0.200", "600.0", "666.7"]
@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+import pytest
+
+import credential_pool
+from credential_pool import CredentialPool, CredentialsUnavailableError, build_egresses
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeClients:
+    def __init__(self, outcome):
+        self.outcome = outcome
+
+    def get(self, egress):
+        return self
+
+    async def request(self, method, url, headers=None, **kwargs):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def _pool(keys=("key-a", "key-b"), egresses="direct", max_wait=None):
+    return CredentialPool("club", list(keys), build_egresses(egresses), rate=0, burst=1, max_wait=max_wait)
+
+
+def _acquire(pool):
+    return asyncio.run(pool.acquire())
+
+
+def test_requests_are_spread_over_keys():
+    pool = _pool()
+    used = []
+    for _ in range(4):
+        route = _acquire(pool)
+        used.append(route.key.value)
+        pool.report(route, 200)
+    assert sorted(used) == ["key-a", "key-a", "key-b", "key-b"]
+
+
+def test_rate_limited_key_is_ejected_for_retry_after():
+    pool = _pool()
+    route = _acquire(pool)
+    pool.report(route, 429, "120")
+    for _ in range(3):
+        other = _acquire(pool)
+        assert other.key is not route.key
+        pool.report(other, 200)
+    assert route.key.rejected == 1
+
+
+def test_rejected_single_key_raises_after_max_wait(monkeypatch):
+    monkeypatch.setattr(credential_pool, "KEY_AUTH_EJECT_SECONDS", 600)
+    pool = _pool(keys=("only-key",), max_wait=30)
+    pool.report(_acquire(pool), 401)
+    with pytest.raises(CredentialsUnavailableError) as excinfo:
+        _acquire(pool)
+    assert excinfo.value.seconds > 30
+
+
+def test_connection_errors_eject_an_egress_but_only_back_off_the_last(monkeypatch):
+    monkeypatch.setattr(credential_pool, "EGRESS_FAILURES", 2)
+    monkeypatch.setattr(credential_pool, "EGRESS_EJECT_SECONDS", 120)
+    pool = CredentialPool("club", ["key-a"], build_egresses("direct,http://proxy:3128"), rate=0, burst=1)
+    direct, proxy = pool.egresses
+    for _ in range(2):
+        pool.report(credential_pool.Route(pool.keys[0], proxy))
+    now = credential_pool.time.monotonic()
+    assert proxy.ejected_until - now > 100
+
+    for _ in range(2):
+        pool.report(credential_pool.Route(pool.keys[0], direct))
+    assert 0 < direct.ejected_until - credential_pool.time.monotonic() <= 1   # first backoff: 1 s
+    assert direct.backoffs == 1
+
+
+def test_send_counts_connect_errors_but_not_timeouts():
+    pool = _pool(keys=("key-a",))
+    egress = pool.egresses[0]
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(pool.send(FakeClients(httpx.ReadTimeout("slow")), "GET", "https://x", "Key"))
+    assert egress.failures == 0 and egress.in_flight == 0
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(pool.send(FakeClients(httpx.ConnectError("refused")), "GET", "https://x", "Key"))
+    assert egress.failures == 1 and egress.in_flight == 0
+
+    resp = asyncio.run(pool.send(FakeClients(FakeResponse(403)), "GET", "https://x", "Key"))
+    assert resp.status_code == 403
+    assert egress.failures == 0 and pool.keys[0].rejected == 1
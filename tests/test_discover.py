@@ -0,0 +1,56 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import city_crawling
+import club_crawling_v3 as api
+
+PAGE = ["Leeds", "York", "Bath", "Hull"]
+
+
+@pytest.fixture
+def discover_run(tmp_path, monkeypatch):
+    """main(discover=True) in tmp_path: the page lists PAGE, Leeds is already known, workers run in threads."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+    city_crawling.save_cities(["Leeds"])
+    monkeypatch.setattr(city_crawling, "fetch_source", lambda url=None, force=False: ("<html>", {}, True))
+    monkeypatch.setattr(city_crawling, "parse_cities", lambda html: iter(PAGE))
+    monkeypatch.setattr(api, "load_existing_output_info", lambda path: ({}, set()))
+    monkeypatch.setattr(api, "build_club_name_index", lambda path: None)
+    monkeypatch.setattr(api, "make_process_pool", lambda workers, config: ThreadPoolExecutor(max_workers=1))
+    outcomes = {}   # city -> stats the fake worker reports
+    crawled = []
+
+    def process_city_worker(args):
+        crawled.append(args["city"])
+        stats = {"success": 0, "failed": 0, "errors": 0, **outcomes.get(args["city"], {})}
+        return {"city": args["city"], "elapsed": 0.0, "stats": stats}
+
+    monkeypatch.setattr(api, "process_city_worker", process_city_worker)
+
+    def run():
+        api.main(dry_run=True, discover=True)
+        with open(city_crawling.CITY_FILE, newline="", encoding="utf-8") as f:
+            return [row[city_crawling.CITY_COLUMN] for row in csv.DictReader(f)]
+
+    return run, outcomes, crawled
+
+
+def test_empty_combos_do_not_keep_a_city_out_of_the_city_file(discover_run):
+    run, outcomes, crawled = discover_run
+    outcomes["York"] = {"failed": 12}   # searches that found nothing
+    outcomes["Bath"] = {"failed": 3, "errors": 1}   # a combo gave up on an error
+    assert run() == ["Leeds", "York", "Hull"]
+    assert crawled == ["York", "Bath", "Hull"]
+
+
+def test_city_with_errors_is_crawled_again_by_the_next_run(discover_run):
+    run, outcomes, crawled = discover_run
+    outcomes["Bath"] = {"errors": 2}
+    run()
+    outcomes.clear()
+    crawled.clear()
+    assert run() == PAGE
+    assert crawled == ["Bath"]
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import hybrid_crawl
+from crawl_schema import Combo
+from hybrid_crawl import EndpointBreaker, HybridContext
+
+
+class FakeContext:
+    """The parts of HybridContext that crawl_combo / run_api_combo touch, without files or keys."""
+
+    api_allowed = HybridContext.api_allowed
+    api_ready = HybridContext.api_ready
+
+    def __init__(self, browsers=1, cooldown=300):
+        self.dry_run = False
+        self.breakers = {name: EndpointBreaker(name, failure_threshold=1, cooldown=cooldown)
+                         for name in hybrid_crawl.ENDPOINTS}
+        self.processed_combos = set()
+        self.stats = {"success": 0, "failed": 0, "contact_errors": 0}
+        self.tier_counts = {"api": 0, "browser": 0, "failed": 0}
+        self.failed_cities = set()
+        self.api_slots = asyncio.Semaphore(4)
+        self.browser_slots = asyncio.Semaphore(browsers)
+        self.browser_executor = ThreadPoolExecutor(max_workers=browsers)
+        self.existing_club_names = self.club_cache = self.processed_clubs_local = None
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    calls = {"api": [], "browser": []}
+
+    async def run_api_combo(ctx, combo):
+        calls["api"].append(combo.key)
+        for breaker in ctx.breakers.values():
+            breaker.record_success()
+        return [], False
+
+    def run_browser_combo(ctx, combo):
+        calls["browser"].append(combo.key)
+        time.sleep(0.3)
+        return []
+
+    async def save_rows(ctx, rows):
+        return 0
+
+    monkeypatch.setattr(hybrid_crawl, "run_api_combo", run_api_combo)
+    monkeypatch.setattr(hybrid_crawl, "run_browser_combo", run_browser_combo)
+    monkeypatch.setattr(hybrid_crawl, "save_rows", save_rows)
+    monkeypatch.setattr(hybrid_crawl, "mark_done", lambda ctx, combo: ctx.processed_combos.add(combo.key))
+    return calls
+
+
+def _crawl(ctx, combos):
+    async def run():
+        await asyncio.gather(*(hybrid_crawl.crawl_combo(ctx, combo) for combo in combos))
+    try:
+        asyncio.run(run())
+    finally:
+        ctx.browser_executor.shutdown(wait=True)
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown():
+    breaker = EndpointBreaker("club", failure_threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow() and not breaker.ready()
+    time.sleep(0.15)
+    assert breaker.ready() and breaker.ready()   # ready() does not use up the probe
+    assert breaker.allow()
+    assert not breaker.allow()                   # one probe per cooldown
+    breaker.record_success()
+    assert breaker.allow() and breaker.failures == 0
+
+
+def test_combos_return_to_api_once_breaker_half_opens(tiers):
+    ctx = FakeContext(browsers=1, cooldown=0.2)
+    ctx.breakers["club"].record_failure()
+    combos = [Combo("Leeds", "male", age) for age in (8, 9, 10)]
+
+    _crawl(ctx, combos)
+
+    # the first combo took the only browser; the others waited for it, outlasted the cooldown and went back to the API
+    assert len(tiers["browser"]) == 1
+    assert len(tiers["api"]) == 2
+    assert ctx.tier_counts == {"api": 2, "browser": 1, "failed": 0}
+    assert ctx.processed_combos == {combo.key for combo in combos}
+
+
+def test_contact_breaker_does_not_send_combos_to_browser(tiers):
+    ctx = FakeContext()
+    ctx.breakers["contact"].record_failure()
+
+    _crawl(ctx, [Combo("Leeds", "female", 12)])
+
+    assert tiers["browser"] == [] and len(tiers["api"]) == 1
+
+
+def test_api_run_skips_contacts_while_contact_breaker_is_open(monkeypatch):
+    seen = []
+
+    async def process_combo_async(*args, dry_run, fetch_contacts):
+        seen.append(fetch_contacts)
+        return [{"City": "Leeds", "Club Name": "Leeds Juniors"}]
+
+    monkeypatch.setattr(hybrid_crawl.api, "process_combo_async", process_combo_async)
+    ctx = FakeContext()
+    ctx.breakers["contact"].record_failure()
+    combo = Combo("Leeds", "female", 12)
+
+    rows, needs_fallback = asyncio.run(hybrid_crawl.run_api_combo(ctx, combo))
+    assert seen == [False]
+    assert rows and not needs_fallback
+    assert ctx.breakers["contact"].opened_at is not None   # not closed by a run that skipped contacts
+
+    ctx.breakers["contact"] = EndpointBreaker("contact")
+    asyncio.run(hybrid_crawl.run_api_combo(ctx, combo))
+    assert seen == [False, True]
+
+
+def test_main_overrides_total_retries_after_config_is_loaded(monkeypatch):
+    monkeypatch.setenv("TOTAL_RETRIES", "1000")
+    monkeypatch.setattr(hybrid_crawl, "HYBRID_API_RETRIES", 3)
+    applied = {}
+
+    class Stop(Exception):
+        pass
+
+    def apply_config(config):
+        applied.update(config)
+        raise Stop
+
+    monkeypatch.setattr(hybrid_crawl.api, "apply_config", apply_config)
+    with pytest.raises(Stop):
+        hybrid_crawl.main(dry_run=True)
+    assert applied["TOTAL_RETRIES"] == 3
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import threading
+import time
+
+from async_persistence import AsyncPersistence, install_queue_logging, uninstall_queue_logging
+from loop_monitor import LoopLagMonitor
+
+
+def _blocking_checkpoint():
+    time.sleep(0.3)
+
+
+def test_monitor_reports_stall_with_blocking_stack(caplog):
+    loop = asyncio.new_event_loop()
+    monitor = LoopLagMonitor(loop, name="Leeds", threshold_ms=100, interval_ms=20).start()
+
+    async def crawl():
+        await asyncio.sleep(0.05)
+        _blocking_checkpoint()
+        await asyncio.sleep(0.05)
+
+    try:
+        with caplog.at_level(logging.WARNING, logger="loop_monitor"):
+            loop.run_until_complete(crawl())
+    finally:
+        monitor.stop()
+        loop.close()
+
+    summary = monitor.summary()
+    assert summary["stalls"] == 1
+    assert 150 < summary["max_lag_ms"] < 1000
+    stack_logs = [r.getMessage() for r in caplog.records if "blocking stack" in r.getMessage()]
+    assert stack_logs and "_blocking_checkpoint" in stack_logs[0]
+
+
+def test_monitor_ignores_time_between_run_until_complete_calls():
+    loop = asyncio.new_event_loop()
+    monitor = LoopLagMonitor(loop, threshold_ms=100, interval_ms=20).start()
+    try:
+        loop.run_until_complete(asyncio.sleep(0.05))
+        time.sleep(0.3)   # the loop is not running: nothing is blocked
+        loop.run_until_complete(asyncio.sleep(0.05))
+    finally:
+        monitor.stop()
+        loop.close()
+    assert monitor.summary()["stalls"] == 0
+
+
+def test_checkpoints_of_one_file_are_coalesced():
+    persistence = AsyncPersistence()
+    gate = threading.Event()
+    written = []
+    persistence.submit(gate.wait)   # keep the writer busy while checkpoints queue up
+
+    first = persistence.checkpoint("processed.pkl", {1}, lambda snap, key: written.append((key, snap)))
+    assert persistence.checkpoint("processed.pkl", {1, 2}, lambda snap, key: written.append((key, snap))) is None
+    persistence.checkpoint("cache.pkl", {"a": 1}, lambda snap, key: written.append((key, snap)))
+    persistence.checkpoint("processed.pkl", {1, 2, 3}, lambda snap, key: written.append((key, snap)))
+    gate.set()
+    persistence.close()
+
+    assert first is not None
+    assert written == [("processed.pkl", {1, 2, 3}), ("cache.pkl", {"a": 1})]
+
+
+def test_checkpoint_after_write_started_is_written_again():
+    persistence = AsyncPersistence()
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    def slow_dump(snapshot, key):
+        started.set()
+        release.wait()
+        written.append(snapshot)
+
+    persistence.checkpoint("processed.pkl", 1, slow_dump)
+    started.wait()
+    persistence.checkpoint("processed.pkl", 2, slow_dump)
+    release.set()
+    persistence.close()
+    assert written == [1, 2]
+
+
+def test_run_keeps_submission_order_and_does_not_block_loop():
+    persistence = AsyncPersistence()
+    order = []
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        persistence.submit(order.append, "append")
+        await persistence.run(time.sleep, 0.1)
+        await persistence.run(order.append, "flush")
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(main()) >= 5
+    persistence.close()
+    assert order == ["append", "flush"]
+
+
+def test_queue_logging_round_trip(tmp_path):
+    root = logging.getLogger()
+    handler = logging.FileHandler(tmp_path / "run.log")
+    root.addHandler(handler)
+    old_level = root.level
+    root.setLevel(logging.INFO)
+    try:
+        listener = install_queue_logging()
+        assert handler not in root.handlers
+        logging.getLogger("club_crawling_v3").info("queued record")
+        uninstall_queue_logging(listener)
+        assert handler in root.handlers
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(old_level)
+        handler.close()
+    assert "queued record" in (tmp_path / "run.log").read_text()
@@ -0,0 +1,85 @@
+import json
+
+import network_capture
+from network_capture import NetworkRecorder, capture_search_results
+
+API = "https://hcdeapimngt1.azure-api.net/external/v1"
+SITE_API = "https://find.englandfootball.test/api"
+
+
+class FakePage:
+    """Performance log + response bodies of a driver; the in-page replay answers after `delay` log reads."""
+
+    def __init__(self, delay=0, answer=None):
+        self.log, self.bodies, self.later = [], {}, []
+        self.delay = delay
+        self.answer = answer or (lambda request: (200, {}))
+        self.next_id = 0
+
+    def exchange(self, url, status, body, method="GET", post_data=None, headers=None):
+        self.next_id += 1
+        rid = str(self.next_id)
+        request = {"url": url, "method": method, "headers": headers or {}, "postData": post_data}
+        events = [("Network.requestWillBeSent", {"requestId": rid, "request": request}),
+                  ("Network.responseReceived", {"requestId": rid, "response": {"status": status}}),
+                  ("Network.loadingFinished", {"requestId": rid})]
+        self.bodies[rid] = json.dumps(body)
+        return [{"message": json.dumps({"message": {"method": m, "params": p}})} for m, p in events]
+
+    def get_log(self, kind):
+        due = [entries for reads_left, entries in self.later if reads_left <= 0]
+        self.later = [(reads_left - 1, entries) for reads_left, entries in self.later if reads_left > 0]
+        entries, self.log = self.log + [e for batch in due for e in batch], []
+        return entries
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {"body": self.bodies[params["requestId"]]}
+
+    def execute_script(self, script, requests, concurrency):
+        for i, r in enumerate(requests):
+            status, body = self.answer(r)
+            self.later.append((self.delay + i, self.exchange(r["url"], status, body, r["method"], r["body"])))
+
+
+def test_replay_waits_for_its_own_answers_not_the_sites_calls(monkeypatch):
+    monkeypatch.setattr(network_capture.time, "sleep", lambda s: None)
+    page = FakePage(delay=2, answer=lambda r: (200, {"org": r["url"]}))
+    # the site fetched two contacts by itself before the replay: they must not satisfy the wait
+    page.log += page.exchange(f"{API}/orgs/1/clubcontact", 200, {"site": 1})
+    page.log += page.exchange(f"{API}/orgs/9/clubcontact", 200, {"site": 9})
+    recorder = NetworkRecorder(page)
+    requests = [{"url": f"{API}/orgs/{w}/clubcontact", "method": "GET", "headers": {}, "body": None} for w in ("1", "2")]
+    replies = recorder.replay("contact", requests, ["1", "2"], network_capture._wgs_id_of, timeout=5)
+    assert set(replies) == {"1", "2"}
+    assert replies["1"]["body"] == {"org": f"{API}/orgs/1/clubcontact"}
+
+
+def test_replay_prefers_a_200_and_logs_missing_answers(monkeypatch, caplog):
+    monkeypatch.setattr(network_capture.time, "sleep", lambda s: None)
+    clock = iter(range(0, 1000, 10))
+    monkeypatch.setattr(network_capture.time, "time", lambda: next(clock))
+    page = FakePage(answer=lambda r: (500, None) if "A" in r["body"] else (200, {"ClubId": "B"}))
+    recorder = NetworkRecorder(page)
+    requests = [{"url": f"{SITE_API}/club", "method": "POST", "headers": {}, "body": json.dumps({"ClubId": c})}
+                for c in ("A", "B")]
+    replies = recorder.replay("club", requests, ["A", "B"], network_capture._club_id_of, timeout=15)
+    assert set(replies) == {"B"}   # a null body is never captured as an exchange
+    assert "1 of 2 club requests unanswered" in caplog.text
+
+
+def test_capture_search_results_builds_rows_from_replayed_calls(monkeypatch):
+    monkeypatch.setattr(network_capture.time, "sleep", lambda s: None)
+
+    def answer(request):
+        if request["url"].endswith("/club"):
+            cid = json.loads(request["body"])["ClubId"]
+            return 200, {"ClubName": f"Club {cid}", "WgsClubId": f"w{cid}"}
+        return 200, {"email": request["url"].split("/orgs/")[1].split("/")[0] + "@club.test"}
+
+    page = FakePage(delay=1, answer=answer)
+    recommendation = [{"RecommendationClubCartDto": [{"ClubId": "1"}, {"ClubId": "2"}]}]
+    page.log += page.exchange(f"{SITE_API}/clubrecommendation", 200, recommendation, "POST",
+                              json.dumps({"Age": 12, "PlayWith": 4}), {"Ocp-Apim-Subscription-Key": "k"})
+    rows = capture_search_results(page, "Leeds", 4, 12)
+    assert sorted(r["Club Name"] for r in rows) == ["Club 1", "Club 2"]
+    assert sorted(r["Contact Email"] for r in rows) == ["w1@club.test", "w2@club.test"]
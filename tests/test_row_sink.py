@@ -0,0 +1,46 @@
+import csv
+
+import pytest
+
+from crawl_schema import SELENIUM_CLUB_COLUMNS
+from row_sink import CsvRowSink
+
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_new_file_gets_one_header_and_dedupes(tmp_path):
+    path = tmp_path / "out" / "club_data.csv"
+    with CsvRowSink(str(path), batch_size=10) as sink:
+        assert sink.add({"Club Name": "Leeds Juniors", "Email": "a@b.c"})
+        assert not sink.add({"Club Name": "  leeds   JUNIORS "})
+        assert not sink.add({"Club Name": ""})
+    rows = _read(path)
+    assert rows[0] == list(SELENIUM_CLUB_COLUMNS)
+    assert len(rows) == 2
+    assert sink.duplicates == 1
+
+
+def test_existing_file_is_indexed_and_its_column_order_kept(tmp_path):
+    path = tmp_path / "club_data.csv"
+    columns = list(reversed(SELENIUM_CLUB_COLUMNS))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerow({"Club Name": "York Youth", "Address": "York"})
+    with CsvRowSink(str(path)) as sink:
+        assert not sink.add({"Club Name": "York Youth"})
+        assert sink.add({"Club Name": "Bath Rovers", "Address": "Bath"})
+    rows = _read(path)
+    assert rows[0] == columns
+    assert dict(zip(columns, rows[-1]))["Address"] == "Bath"
+    assert sum(1 for r in rows if r == columns) == 1
+
+
+def test_header_mismatch_raises(tmp_path):
+    path = tmp_path / "clubs_data.csv"
+    path.write_text("City,PlayWith,Age,Club Name\nLeeds,4,10,Leeds Juniors\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        CsvRowSink(str(path))
@@ -0,0 +1,42 @@
+import pytest
+
+import run_history
+
+
+def _run(**kwargs):
+    profile = {"combos": 100, "duration_s": 100.0, "combos_per_s": 1.0,
+               "endpoints": {"club": {"p95_ms": 200.0, "rate_429": 0.0}}}
+    profile.update(kwargs)
+    return profile
+
+
+def _by_metric(rows):
+    return {metric: (change, regressed) for metric, _, _, change, regressed in rows}
+
+
+def test_compare_flags_worse_metrics_beyond_threshold():
+    rows = _by_metric(run_history.compare(_run(combos_per_s=0.5, endpoints={"club": {"p95_ms": 400.0}}),
+                                          _run(), threshold=0.1))
+    assert rows["combos_per_s"] == (pytest.approx(-0.5), True)
+    assert rows["club.p95_ms"] == (pytest.approx(1.0), True)
+    assert "club.rate_429" not in rows   # only metrics both runs have
+
+
+def test_compare_ignores_improvements_and_tiny_changes():
+    rows = _by_metric(run_history.compare(_run(combos_per_s=2.0, endpoints={"club": {"p95_ms": 205.0}}),
+                                          _run(), threshold=0.01))
+    assert not rows["combos_per_s"][1]
+    assert not rows["club.p95_ms"][1]   # +2.5% but below the 10 ms minimum
+
+
+def test_duration_only_compared_between_runs_of_equal_size():
+    bigger = _run(combos=200, duration_s=200.0)
+    assert "duration_s" not in _by_metric(run_history.compare(bigger, _run()))
+    slower = _run(duration_s=150.0)
+    assert _by_metric(run_history.compare(slower, _run()))["duration_s"][1]
+
+
+def test_find_baseline_same_kind_only():
+    runs = [{"run_id": "1", "dry_run": False}, {"run_id": "2", "dry_run": True}, {"run_id": "3", "dry_run": False}]
+    assert run_history.find_baseline(runs, runs[2])["run_id"] == "1"
+    assert run_history.find_baseline(runs, runs[1]) is None
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import club_crawling_v3 as api
+import loop_monitor
+import startup_benchmark
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _python(code, cwd):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO, os.environ.get("PYTHONPATH")])))
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def test_import_is_lazy_and_side_effect_free(tmp_path):
+    out = _python("import sys, club_crawling_v3; "
+                  f"print(sorted(m for m in {startup_benchmark.EAGER_IMPORTS!r} if m in sys.modules))", tmp_path)
+    assert out.stdout.strip() == "[]"
+    assert os.listdir(tmp_path) == []   # no output/, logs/ or storage/ until setup_runtime()
+
+
+def test_load_config_covers_helper_modules(monkeypatch):
+    monkeypatch.setenv("LOOP_LAG_THRESHOLD_MS", "250")
+    monkeypatch.setenv("TOTAL_RETRIES", "7")
+    monkeypatch.setattr(loop_monitor, "LOOP_LAG_THRESHOLD_MS", loop_monitor.LOOP_LAG_THRESHOLD_MS)
+    monkeypatch.setattr(api, "TOTAL_RETRIES", api.TOTAL_RETRIES)
+
+    config = api.load_config()
+    assert config["LOOP_LAG_THRESHOLD_MS"] == 250.0
+    assert config["TOTAL_RETRIES"] == 7
+
+    api.apply_config(config)
+    assert loop_monitor.LOOP_LAG_THRESHOLD_MS == 250.0
+    assert api.TOTAL_RETRIES == 7
+
+
+def test_apply_config_ignores_missing_and_unknown_names(monkeypatch):
+    monkeypatch.setattr(api, "TOTAL_RETRIES", 5)
+    api.apply_config({"NOT_A_SETTING": 1})
+    api.apply_config(None)
+    assert api.TOTAL_RETRIES == 5
+    assert not hasattr(api, "NOT_A_SETTING")
+
+
+def test_baseline_import_loads_the_eager_modules(monkeypatch):
+    monkeypatch.setattr(startup_benchmark, "EAGER_IMPORTS", ("json", "csv"))
+    monkeypatch.chdir(REPO)
+    assert startup_benchmark.measure_import(1, eager=True) > 0
+    assert startup_benchmark.measure_import(1) > 0
@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.command import Command
+
+import browser_pool
+from browser_pool import BrowserPool, PooledDriver, TabbedBrowser
+
+
+class FakeChrome:
+    """One chromedriver session: window handles, a current window and a log of CDP commands per window."""
+
+    def __init__(self):
+        self.handles = ["CDwindow-HOME"]
+        self.current_window_handle = self.current = "CDwindow-HOME"
+        self.targets = {"HOME": {"targetId": "HOME", "type": "page"}}
+        self.cdp = []
+        self.quit_called = False
+
+    def execute(self, command, params=None):
+        if command == Command.SWITCH_TO_WINDOW:
+            self.current = params["handle"]
+            return {"value": None}
+        if command == Command.W3C_GET_WINDOW_HANDLES:
+            return {"value": list(self.handles)}
+        raise AssertionError(f"unexpected command {command}")
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((self.current, cmd, params))
+        if cmd == "Target.createBrowserContext":
+            return {"browserContextId": f"ctx{len(self.targets)}"}
+        if cmd == "Target.createTarget":
+            target_id = f"T{len(self.targets)}"
+            self.open_window(target_id, browserContextId=params.get("browserContextId"))
+            return {"targetId": target_id}
+        if cmd == "Target.getTargets":
+            return {"targetInfos": list(self.targets.values())}
+        if cmd == "Target.closeTarget":
+            self.targets.pop(params["targetId"])
+            self.handles.remove(f"CDwindow-{params['targetId']}")
+        return {}
+
+    def open_window(self, target_id, **info):
+        self.targets[target_id] = {"targetId": target_id, "type": "page", **info}
+        self.handles.append(f"CDwindow-{target_id}")
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    pool = BrowserPool(size=1)
+    monkeypatch.setattr(pool, "_new_driver", lambda page_load_strategy="eager": PooledDriver(FakeChrome()))
+    return TabbedBrowser(pool)
+
+
+def _blocked(chrome):
+    return [window for window, cmd, _ in chrome.cdp if cmd == "Network.setBlockedURLs"]
+
+
+def test_every_tab_and_opened_window_gets_resource_blocking_once(browser):
+    chrome = browser.driver
+    first, second = browser.open_tab(), browser.open_tab()
+    assert first.context_id != second.context_id
+    assert _blocked(chrome) == [first.handle, second.handle]
+
+    # a club page the first tab opened with Ctrl-click
+    chrome.open_window("CLUB", browserContextId=first.context_id)
+    assert browser._tab_handles(first) == [first.handle, "CDwindow-CLUB"]
+    assert browser._tab_handles(second) == [second.handle]
+    browser._execute(first, Command.SWITCH_TO_WINDOW, {"handle": "CDwindow-CLUB"})
+    browser._execute(second, Command.SWITCH_TO_WINDOW, {"handle": second.handle})
+    browser._execute(first, Command.SWITCH_TO_WINDOW, {"handle": "CDwindow-CLUB"})
+    assert _blocked(chrome) == [first.handle, second.handle, "CDwindow-CLUB"]
+
+
+def test_reset_tab_closes_only_its_own_windows(browser):
+    chrome = browser.driver
+    first, second = browser.open_tab(), browser.open_tab()
+    chrome.open_window("CLUB", browserContextId=first.context_id)
+    first.current = "CDwindow-CLUB"
+
+    browser.reset_tab(first)
+    assert "CDwindow-CLUB" not in chrome.handles
+    assert first.current == first.handle
+    assert second.handle in chrome.handles
+
+
+class FakeHost:
+    started = []
+
+    def __init__(self, pool, fail=False):
+        if fail:
+            raise WebDriverException("chrome failed to start")
+        self.closed = False
+        FakeHost.started.append(self)
+
+    def open_tab(self):
+        return type("Tab", (), {"driver": None})()
+
+    def recycle(self, tab, broken=False):
+        return tab
+
+    def close(self):
+        self.closed = True
+
+
+def test_started_browsers_are_closed_when_a_later_one_fails(monkeypatch):
+    FakeHost.started = []
+    monkeypatch.setattr(browser_pool, "TabbedBrowser", lambda pool: FakeHost(pool, fail=len(FakeHost.started) == 2))
+    with pytest.raises(WebDriverException):
+        browser_pool.run_in_tabs(["Leeds"], lambda driver, tab, task: None, browsers=3, tabs_per_browser=1)
+    assert len(FakeHost.started) == 2
+    assert all(host.closed for host in FakeHost.started)
+
+
+def test_tabs_pull_tasks_from_one_queue_and_survive_handler_errors(monkeypatch):
+    FakeHost.started = []
+    monkeypatch.setattr(browser_pool, "TabbedBrowser", FakeHost)
+    done, lock = [], threading.Lock()
+
+    def handler(driver, tab, task):
+        if task == ("York", 9):
+            raise ValueError("no results")
+        with lock:
+            done.append(task)
+
+    tasks = [(city, age) for city in ("Leeds", "York") for age in range(5, 15)]
+    browser_pool.run_in_tabs(tasks, handler, browsers=2, tabs_per_browser=3)
+    assert sorted(done) == sorted(t for t in tasks if t != ("York", 9))
+    assert all(host.closed for host in FakeHost.started)
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+import tail_latency
+from tail_latency import BUCKET_GROWTH, EndpointLatency, HedgeBudget, LatencyHistogram
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, label):
+        self.label = label
+
+
+def _warm_endpoint(monkeypatch, seconds=0.01, budget=5.0):
+    monkeypatch.setattr(tail_latency, "LATENCY_MIN_SAMPLES", 10)
+    monkeypatch.setattr(tail_latency, "HEDGE_REQUESTS", True)
+    ep = EndpointLatency("club")
+    for _ in range(20):
+        ep.record(seconds)
+    ep.budget = HedgeBudget(ratio=0, burst=budget)
+    ep.budget.tokens = budget
+    return ep
+
+
+def test_quantile_empty_histogram():
+    assert LatencyHistogram(window=100).quantile(0.5) is None
+
+
+def test_quantile_is_bucket_upper_bound_within_ten_percent():
+    hist = LatencyHistogram(window=10_000)
+    for ms in range(1, 101):
+        hist.record(ms / 1000)
+    p50, p99 = hist.quantile(0.5), hist.quantile(0.99)
+    assert 0.050 <= p50 <= 0.050 * BUCKET_GROWTH
+    assert 0.099 <= p99 <= 0.099 * BUCKET_GROWTH
+    assert p50 < p99
+
+
+def test_histogram_decays_old_samples():
+    hist = LatencyHistogram(window=100)
+    for _ in range(99):
+        hist.record(1.0)
+    for _ in range(150):
+        hist.record(0.01)
+    # the slow samples were halved at every window: the median follows the recent fast ones
+    assert hist.quantile(0.5) < 0.02
+    assert hist.samples == 249
+
+
+def test_hedge_budget_caps_the_hedge_ratio():
+    budget = HedgeBudget(ratio=0.125, burst=2)
+    spent = 0
+    for _ in range(100):
+        budget.earn()
+        spent += budget.try_spend()
+    assert spent == budget.sent == 12   # 100 x 0.125 = 12.5 hedges earned
+
+
+def test_hedge_budget_burst_limit():
+    budget = HedgeBudget(ratio=1.0, burst=2)
+    for _ in range(10):
+        budget.earn()
+    assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+    assert budget.tokens == pytest.approx(0)
+
+
+def test_timeout_is_p99_times_multiplier_after_warm_up(monkeypatch):
+    monkeypatch.setattr(tail_latency, "LATENCY_MIN_SAMPLES", 10)
+    monkeypatch.setattr(tail_latency, "MIN_REQUEST_TIMEOUT", 5.0)
+    monkeypatch.setattr(tail_latency, "TIMEOUT_P99_MULTIPLIER", 3.0)
+    ep = EndpointLatency("club")
+    assert ep.timeout() == tail_latency.MAX_REQUEST_TIMEOUT
+    for _ in range(10):
+        ep.record(0.01)
+    assert ep.timeout() == 5.0   # clamped to MIN_REQUEST_TIMEOUT
+    for _ in range(100):
+        ep.record(4.0)
+    assert 12.0 <= ep.timeout() <= 12.0 * BUCKET_GROWTH
+
+
+def test_hedge_wins_and_slow_request_is_cancelled(monkeypatch):
+    ep = _warm_endpoint(monkeypatch)
+    calls, cancelled = [], []
+
+    async def request(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        return FakeResponse(len(calls))
+
+    async def main():
+        result = await tail_latency.hedged(ep, request)
+        await asyncio.sleep(0)   # let the cancellation reach the slow request
+        return result
+
+    assert asyncio.run(main()).label == 2
+    assert cancelled == [True]
+    assert ep.budget.sent == 1 and ep.hedge_wins == 1
+
+
+def test_no_hedge_without_budget(monkeypatch):
+    ep = _warm_endpoint(monkeypatch, budget=0)
+    calls = []
+
+    async def request(timeout):
+        calls.append(timeout)
+        await asyncio.sleep(0.05)
+        return FakeResponse(len(calls))
+
+    assert asyncio.run(tail_latency.hedged(ep, request)).label == 1
+    assert len(calls) == 1 and ep.budget.sent == 0